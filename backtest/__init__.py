@@ -0,0 +1,17 @@
+from collector.lazy import lazy_exports
+
+# The search module (joblib, scikit-optimize) is only loaded when used.
+_EXPORTS = {
+    'load_panels': '.engine',
+    'simulate': '.engine',
+    'run_backtest': '.engine',
+    'FeatureStore': '.search',
+    'load_features': '.search',
+    'evaluate': '.search',
+    'grid_search': '.search',
+    'bayes_search': '.search',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
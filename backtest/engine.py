@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from collector.symbols import map_by_asset
+from database.funding_panel import PANEL_EXCHANGE_A, PANEL_EXCHANGE_B
+from database.rollups import candle_table
+
+HOUR_MS = 60 * 60 * 1000
+
+def ffill(arr):
+    """
+    Forward-fill NaNs down the time axis of a (time x asset) array.
+    """
+    mask = np.isnan(arr)
+    idx = np.where(~mask, np.arange(arr.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    filled = arr[idx, np.arange(arr.shape[1])]
+    return filled
+
+def _pivot(df, column, grid, assets, fill=np.nan):
+    out = np.full((len(grid), len(assets)), fill, dtype=np.float64)
+    if df.empty:
+        return out
+    rows = np.searchsorted(grid, df['ts'].to_numpy())
+    cols = pd.Categorical(df['asset'], categories=assets).codes
+    out[rows, cols] = df[column].to_numpy()
+    return out
+
+def _table_exists(con, table):
+    return con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [table]
+    ).fetchone()[0] > 0
+
+def _map_assets(con, exchange_a, exchange_b):
+    tickers = con.execute(
+        "SELECT DISTINCT exchange, ticker FROM fundings WHERE exchange IN (?, ?)", [exchange_a, exchange_b]
+    ).fetchdf()
+    map_a = map_by_asset(tickers.loc[tickers['exchange'] == exchange_a, 'ticker'])
+    map_b = map_by_asset(tickers.loc[tickers['exchange'] == exchange_b, 'ticker'])
+    assets = sorted(set(map_a) & set(map_b))
+    return pd.DataFrame(
+        [(exchange_a, map_a[a][0], a) for a in assets] + [(exchange_b, map_b[a][0], a) for a in assets],
+        columns=['exchange', 'ticker', 'asset'])
+
+def load_panels(con, exchange_a='binance_futures', exchange_b='hyperliquid', start_ts=None, end_ts=None,
+                use_funding_panel=True):
+    """
+    Load aligned hourly (time x asset) matrices for every base asset listed on both exchanges.
+
+    Funding comes from the precomputed `funding_panel` table (see
+    database.FundingAligner) when it exists for this exchange pair;
+    otherwise it is aligned on the fly from `fundings`. Prices come from the
+    `ohlcv_1h` rollup (see database.OHLCVRollups) when candles are collected
+    finer than 1h.
+
+    :param con: duckdb connection holding `fundings` and `ohlcv`
+    :param exchange_a: First leg exchange name
+    :param exchange_b: Second leg exchange name
+    :param start_ts: Optional start (ms timestamp)
+    :param end_ts: Optional end (ms timestamp)
+    :param use_funding_panel: Read funding from `funding_panel` when available
+    :return: Dict with 'timestamps' (T,), 'assets' (N,) and (T, N) arrays:
+             paid_a/paid_b (funding settled in that hour, 0 otherwise),
+             rate_a/rate_b (latest settled rate expressed per hour),
+             close_a/close_b (forward-filled close prices)
+    """
+    params = [start_ts if start_ts is not None else 0, end_ts if end_ts is not None else 2 ** 62]
+    from_panel = (use_funding_panel and (exchange_a, exchange_b) == (PANEL_EXCHANGE_A, PANEL_EXCHANGE_B)
+                  and _table_exists(con, 'funding_panel'))
+
+    if from_panel:
+        mapping = con.execute("SELECT exchange, ticker, asset FROM funding_asset_map").fetchdf()
+        funding = con.execute("""
+            SELECT asset, ? AS exchange, timestamp AS ts, paid_a AS paid, rate_a AS rate
+            FROM funding_panel WHERE timestamp >= ? AND timestamp <= ?
+            UNION ALL
+            SELECT asset, ? AS exchange, timestamp AS ts, paid_b AS paid, rate_b AS rate
+            FROM funding_panel WHERE timestamp >= ? AND timestamp <= ?
+        """, [exchange_a] + params + [exchange_b] + params).fetchdf()
+    else:
+        mapping = _map_assets(con, exchange_a, exchange_b)
+    assets = sorted(mapping['asset'].unique())
+
+    # Read prices from the hourly rollup when candles are collected finer than 1h
+    price_table = candle_table(con, '1h')
+
+    con.register('_asset_map', mapping)
+    bounds = "AND t.timestamp >= ? AND t.timestamp <= ?"
+    try:
+        if not from_panel:
+            funding = con.execute(f"""
+                WITH f AS (
+                    SELECT m.asset, t.exchange, t.timestamp, t.funding_rate,
+                           t.timestamp - lag(t.timestamp) OVER (PARTITION BY t.exchange, t.ticker ORDER BY t.timestamp) AS gap
+                    FROM fundings t JOIN _asset_map m USING (exchange, ticker)
+                    WHERE true {bounds}
+                ),
+                interval_h AS (
+                    SELECT asset, exchange, greatest(round(median(gap) / {HOUR_MS}), 1) AS hours
+                    FROM f GROUP BY asset, exchange
+                )
+                SELECT f.asset, f.exchange, f.timestamp // {HOUR_MS} * {HOUR_MS} AS ts,
+                       sum(f.funding_rate) AS paid,
+                       last(f.funding_rate ORDER BY f.timestamp) / coalesce(any_value(i.hours), 1) AS rate
+                FROM f JOIN interval_h i USING (asset, exchange)
+                GROUP BY ALL
+            """, params).fetchdf()
+        prices = con.execute(f"""
+            SELECT m.asset, t.exchange, t.timestamp // {HOUR_MS} * {HOUR_MS} AS ts,
+                   arg_max(t.close, t.timestamp) AS close
+            FROM {price_table} t JOIN _asset_map m USING (exchange, ticker)
+            WHERE true {bounds}
+            GROUP BY ALL
+        """, params).fetchdf()
+    finally:
+        con.unregister('_asset_map')
+
+    stamps = np.concatenate([funding['ts'].to_numpy(), prices['ts'].to_numpy()]).astype(np.int64)
+    grid = np.arange(stamps.min(), stamps.max() + 1, HOUR_MS, dtype=np.int64) if len(stamps) else np.empty(0, np.int64)
+
+    panel = {'timestamps': grid, 'assets': assets}
+    for leg, exchange in (('a', exchange_a), ('b', exchange_b)):
+        f = funding[funding['exchange'] == exchange]
+        p = prices[prices['exchange'] == exchange]
+        panel[f'paid_{leg}'] = _pivot(f, 'paid', grid, assets, fill=0.0)
+        panel[f'rate_{leg}'] = ffill(_pivot(f, 'rate', grid, assets))
+        panel[f'close_{leg}'] = ffill(_pivot(p, 'close', grid, assets))
+    return panel
+
+def positions_from_signal(spread, entry_threshold, exit_threshold):
+    """
+    Hysteresis positions for every asset at once: +1 (long leg a / short leg b)
+    when spread > entry, -1 when spread < -entry, flat once |spread| < exit,
+    otherwise hold the previous position.
+    """
+    state = np.full(spread.shape, np.nan)
+    state[np.abs(spread) < exit_threshold] = 0.0
+    state[spread > entry_threshold] = 1.0
+    state[spread < -entry_threshold] = -1.0
+    state[np.isnan(spread)] = 0.0
+    state[0] = np.nan_to_num(state[0])
+    return ffill(state)
+
+def simulate(panel, entry_threshold, exit_threshold, fee_rate=0.0005, positions=None):
+    """
+    Vectorized long-one/short-other funding capture across all assets.
+
+    The position decided at hour t is held over (t, t+1], so funding settled
+    and price moves in hour t+1 accrue to it. Fees are charged per leg on
+    every change in position, in units of notional.
+
+    :param panel: Output of load_panels
+    :param entry_threshold: Minimum |rate_b - rate_a| (per hour) to open a position
+    :param exit_threshold: |spread| below which an open position is closed
+    :param fee_rate: Taker fee per leg, as a fraction of notional
+    :param positions: Optional precomputed (T, N) positions; overrides the thresholds
+    :return: Dict of (T, N) arrays: positions, funding_pnl, price_pnl, fees, pnl
+    """
+    if positions is None:
+        spread = panel['rate_b'] - panel['rate_a']
+        positions = positions_from_signal(spread, entry_threshold, exit_threshold)
+    held = np.vstack([np.zeros((1, positions.shape[1])), positions[:-1]])
+
+    funding_pnl = held * (panel['paid_b'] - panel['paid_a'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret_a = np.nan_to_num(panel['close_a'][1:] / panel['close_a'][:-1] - 1.0)
+        ret_b = np.nan_to_num(panel['close_b'][1:] / panel['close_b'][:-1] - 1.0)
+    price_pnl = np.zeros_like(held)
+    price_pnl[1:] = held[1:] * (ret_a - ret_b)
+
+    trades = np.abs(np.diff(positions, axis=0, prepend=0.0))
+    fees = trades * fee_rate * 2
+
+    return {
+        'positions': positions,
+        'funding_pnl': funding_pnl,
+        'price_pnl': price_pnl,
+        'fees': fees,
+        'pnl': funding_pnl + price_pnl - fees,
+    }
+
+def run_backtest(panel, entry_threshold=0.00002, exit_threshold=0.000005, fee_rate=0.0005):
+    """
+    Run simulate() and label the results.
+
+    :return: Dict with 'pnl' and 'positions' DataFrames (time x asset),
+             'equity' (cumulative PnL summed over assets) and a per-asset 'summary'
+    """
+    result = simulate(panel, entry_threshold, exit_threshold, fee_rate)
+    index = pd.to_datetime(panel['timestamps'], unit='ms')
+    assets = panel['assets']
+
+    pnl = pd.DataFrame(result['pnl'], index=index, columns=assets)
+    positions = pd.DataFrame(result['positions'], index=index, columns=assets)
+    summary = pd.DataFrame({
+        'total_pnl': result['pnl'].sum(axis=0),
+        'funding_pnl': result['funding_pnl'].sum(axis=0),
+        'price_pnl': result['price_pnl'].sum(axis=0),
+        'fees': result['fees'].sum(axis=0),
+        'trades': (np.abs(np.diff(result['positions'], axis=0, prepend=0.0)) > 0).sum(axis=0),
+        'hours_in_position': (result['positions'] != 0).sum(axis=0),
+    }, index=assets).sort_values('total_pnl', ascending=False)
+
+    return {
+        'pnl': pnl,
+        'positions': positions,
+        'equity': pnl.sum(axis=1).cumsum(),
+        'summary': summary,
+    }
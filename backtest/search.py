@@ -0,0 +1,231 @@
+import os
+import json
+import shutil
+import hashlib
+import itertools
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from .engine import load_panels, simulate, positions_from_signal
+
+HOURS_PER_YEAR = 24 * 365
+PANEL_ARRAYS = ('timestamps', 'paid_a', 'paid_b', 'rate_a', 'rate_b', 'close_a', 'close_b')
+# Objectives a search can rank configurations by (all maximized)
+OBJECTIVES = ('total_pnl', 'sharpe', 'calmar')
+
+# Features already opened by this process, keyed by directory; pool workers
+# are reused across batches, so each worker maps the arrays only once
+_OPENED = {}
+
+class FeatureStore:
+    """
+    Memoized, memory-mapped feature arrays for parameter searches.
+
+    materialize() runs load_panels once and writes every (T, N) array, plus
+    the spread smoothed over each requested rolling window, as `.npy` files
+    under `root/<fingerprint>`. The fingerprint covers the row counts and
+    latest timestamps of `fundings` and `ohlcv`, so new data gets a new
+    directory and an unchanged database reuses the existing one.
+
+    Workers open the files with mmap_mode='r': the OS page cache is shared by
+    every process, nothing is pickled per task and no worker touches DuckDB.
+    """
+    def __init__(self, root='data/features'):
+        self.root = root
+
+    def fingerprint(self, con, **load_kwargs):
+        """
+        Key identifying the stored data and the load_panels arguments.
+        """
+        tables = [con.execute(f"""
+            SELECT exchange, count(*), max(timestamp) FROM {table} GROUP BY exchange ORDER BY exchange
+        """).fetchall() for table in ('fundings', 'ohlcv')]
+        payload = json.dumps([tables, sorted(load_kwargs.items())], default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def materialize(self, con, windows=(1,), **load_kwargs):
+        """
+        Build (or reuse) the feature directory for the current data.
+
+        :param con: duckdb connection holding `fundings` and `ohlcv`
+        :param windows: Rolling windows (hours) whose smoothed spread is precomputed
+        :param load_kwargs: Passed to load_panels (exchange_a, exchange_b, start_ts, end_ts)
+        :return: Path of the feature directory (pass to load_features)
+        """
+        path = os.path.join(self.root, self.fingerprint(con, **load_kwargs))
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            panel = load_panels(con, **load_kwargs)
+            tmp = f"{path}.tmp.{os.getpid()}"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for name in PANEL_ARRAYS:
+                np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(panel[name]))
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump({'assets': panel['assets']}, f)
+            try:
+                os.replace(tmp, path)
+            except OSError:
+                # Another process materialized the same data first
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        spread = None
+        for window in sorted(set(windows)):
+            target = os.path.join(path, f"spread_{window}.npy")
+            if os.path.exists(target):
+                continue
+            if spread is None:
+                spread = np.load(os.path.join(path, 'rate_b.npy')) - np.load(os.path.join(path, 'rate_a.npy'))
+            tmp = f"{target}.tmp.{os.getpid()}.npy"
+            np.save(tmp, rolling_mean(spread, window))
+            os.replace(tmp, target)
+        return path
+
+def rolling_mean(arr, window):
+    """
+    Trailing mean over `window` rows of a (T, N) array; NaN until the window is full.
+    """
+    if window <= 1:
+        return arr
+    return pd.DataFrame(arr).rolling(window, min_periods=window).mean().to_numpy()
+
+def load_features(path, mmap_mode='r'):
+    """
+    Open a feature directory written by FeatureStore.materialize.
+
+    :return: Panel dict (as load_panels) whose arrays are memory-mapped, plus
+             'spread' (window -> smoothed spread array)
+    """
+    if path in _OPENED:
+        return _OPENED[path]
+    with open(os.path.join(path, 'meta.json')) as f:
+        features = json.load(f)
+    for name in PANEL_ARRAYS:
+        features[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+    features['spread'] = {}
+    for filename in os.listdir(path):
+        if filename.startswith('spread_') and filename.endswith('.npy') and '.tmp.' not in filename:
+            window = int(filename[len('spread_'):-len('.npy')])
+            features['spread'][window] = np.load(os.path.join(path, filename), mmap_mode=mmap_mode)
+    _OPENED[path] = features
+    return features
+
+def hold_positions(positions, min_hold):
+    """
+    Keep every opened position for at least `min_hold` hours before it can be
+    closed or flipped.
+
+    :param positions: (T, N) target positions (-1, 0, +1)
+    :param min_hold: Minimum holding period in hours (<= 1 leaves positions unchanged)
+    :return: (T, N) positions actually held
+    """
+    if min_hold <= 1:
+        return positions
+    out = np.empty_like(positions)
+    held = np.zeros(positions.shape[1])
+    age = np.zeros(positions.shape[1])
+    for t in range(positions.shape[0]):
+        locked = (held != 0) & (age < min_hold)
+        current = np.where(locked, held, positions[t])
+        age = np.where(current == held, age + 1, 1)
+        held = current
+        out[t] = current
+    return out
+
+def evaluate(features, entry, exit, window=1, min_hold=1, fee_rate=0.0005):
+    """
+    Score one configuration with backtest.simulate.
+
+    :param features: Output of load_features or load_panels
+    :param entry: Entry threshold on the smoothed spread (per hour)
+    :param exit: Exit threshold on the smoothed spread (per hour)
+    :param window: Rolling window (hours) the spread is averaged over
+    :param min_hold: Minimum holding period in hours
+    :return: Dict with total_pnl, sharpe (annualized, hourly PnL), max_drawdown, calmar and trades
+    """
+    spread = features.get('spread', {}).get(window)
+    if spread is None:
+        spread = rolling_mean(np.asarray(features['rate_b']) - np.asarray(features['rate_a']), window)
+    positions = hold_positions(positions_from_signal(spread, entry, exit), min_hold)
+    pnl = simulate(features, entry, exit, fee_rate, positions=positions)['pnl'].sum(axis=1)
+
+    equity = np.cumsum(pnl)
+    max_drawdown = float(np.max(np.maximum.accumulate(equity) - equity, initial=0.0))
+    std = pnl.std()
+    total = float(equity[-1]) if len(equity) else 0.0
+    years = len(pnl) / HOURS_PER_YEAR
+    return {
+        'total_pnl': total,
+        'sharpe': float(pnl.mean() / std * np.sqrt(HOURS_PER_YEAR)) if std > 0 else 0.0,
+        'max_drawdown': max_drawdown,
+        'calmar': total / years / max_drawdown if max_drawdown > 0 and years > 0 else 0.0,
+        'trades': int((np.abs(np.diff(positions, axis=0, prepend=0.0)) > 0).sum()),
+    }
+
+def _evaluate_batch(path, configs, fee_rate):
+    features = load_features(path)
+    return [dict(config, **evaluate(features, fee_rate=fee_rate, **config)) for config in configs]
+
+def _run_batches(path, configs, fee_rate, n_jobs, batch_size, parallel=None):
+    batches = [configs[i:i + batch_size] for i in range(0, len(configs), batch_size)]
+    parallel = parallel or Parallel(n_jobs=n_jobs)
+    results = parallel(delayed(_evaluate_batch)(path, batch, fee_rate) for batch in batches)
+    return [row for batch in results for row in batch]
+
+def _ranked(rows, objective):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    return pd.DataFrame(rows).sort_values(objective, ascending=False, kind='stable').reset_index(drop=True)
+
+def grid_search(path, space, fee_rate=0.0005, objective='sharpe', n_jobs=-1, batch_size=64):
+    """
+    Evaluate every combination of `space` across a process pool.
+
+    :param path: Feature directory from FeatureStore.materialize (covering every window in the space)
+    :param space: Dict with lists for 'entry', 'exit' and optionally 'window' and 'min_hold'
+    :param objective: Column to rank by (see OBJECTIVES)
+    :param n_jobs: Worker processes (-1 for all cores)
+    :param batch_size: Configurations evaluated per task
+    :return: DataFrame of parameters and metrics, best first
+    """
+    names = list(space)
+    configs = [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+    # A position has to be closable: exit must sit below entry
+    configs = [c for c in configs if c['exit'] < c['entry']]
+    return _ranked(_run_batches(path, configs, fee_rate, n_jobs, batch_size), objective)
+
+def bayes_search(path, space, n_calls=100, fee_rate=0.0005, objective='sharpe', n_jobs=-1,
+                 n_initial_points=10, random_state=None):
+    """
+    Gaussian-process search (scikit-optimize) proposing `n_jobs` configurations
+    per round, evaluated in parallel on a process pool.
+
+    :param path: Feature directory from FeatureStore.materialize (covering every window in the space)
+    :param space: Dict name -> (low, high); int bounds give integer dimensions
+                  ('window', 'min_hold'), float bounds real ones ('entry', 'exit')
+    :param n_calls: Total configurations evaluated
+    :return: DataFrame of parameters and metrics, best first
+    """
+    from skopt import Optimizer
+    from skopt.space import Integer, Real
+
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {OBJECTIVES}")
+    # Dimensions with equal bounds are held fixed rather than searched
+    fixed = {name: low for name, (low, high) in space.items() if low == high}
+    names = [name for name in space if name not in fixed]
+    dimensions = [Integer(*space[name], name=name)
+                  if all(isinstance(bound, (int, np.integer)) for bound in space[name])
+                  else Real(*space[name], name=name) for name in names]
+    optimizer = Optimizer(dimensions, n_initial_points=min(n_initial_points, n_calls), random_state=random_state)
+    n_points = os.cpu_count() if n_jobs == -1 else max(n_jobs, 1)
+
+    rows = []
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while len(rows) < n_calls:
+            points = optimizer.ask(n_points=min(n_points, n_calls - len(rows)))
+            configs = [dict(fixed, **{name: value.item() if hasattr(value, 'item') else value
+                                      for name, value in zip(names, point)}) for point in points]
+            results = _run_batches(path, configs, fee_rate, n_jobs, 1, parallel)
+            optimizer.tell(points, [-row[objective] for row in results])
+            rows.extend(results)
+    return _ranked(rows, objective)
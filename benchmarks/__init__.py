@@ -0,0 +1 @@
+from .sim_exchange import SimulatedExchange, AsyncSimulatedExchange
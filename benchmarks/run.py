@@ -0,0 +1,209 @@
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sim_exchange import SimulatedExchange, AsyncSimulatedExchange, HOUR_MS
+from collector.binance_futures import BinanceFuturesCollector
+from collector.async_binance_futures import AsyncBinanceFuturesCollector
+from collector.market_cache import MarketCache
+from database.database_manager import DatabaseManager
+
+DAY_MS = 24 * HOUR_MS
+NOW_MS = 1_700_000_000_000 - 1_700_000_000_000 % (8 * HOUR_MS)
+
+def measure(name, run, exchange=None, quiet=True):
+    """
+    Run one benchmark under tracemalloc.
+
+    :param run: Zero-argument callable returning the number of rows produced
+    :param exchange: SimulatedExchange whose request counters are reported
+    :return: Result dict (seconds, requests, rows, requests_per_sec, rows_per_sec, peak_mb)
+    """
+    before = dict(exchange.stats) if exchange is not None else {}
+    sink = io.StringIO() if quiet else None
+    tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+        rows = run()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {'seconds': round(seconds, 6), 'rows': int(rows), 'peak_mb': round(peak / 1024 ** 2, 3),
+              'rows_per_sec': round(rows / seconds, 1) if seconds else None}
+    if exchange is not None:
+        delta = {k: exchange.stats[k] - before.get(k, 0) for k in exchange.stats}
+        result.update(requests=delta['requests'], errors=delta['errors'], rate_limited=delta['rate_limited'],
+                      requests_per_sec=round(delta['requests'] / seconds, 1) if seconds else None)
+    print(f"{name:<28} {seconds:8.3f}s {result['rows_per_sec'] or 0:>12,.0f} rows/s "
+          f"{result.get('requests_per_sec') or 0:>9,.1f} req/s {result['peak_mb']:>9.2f} MB peak")
+    return result
+
+def make_exchange(args, cls=SimulatedExchange):
+    return cls(NOW_MS, n_symbols=args.symbols, latency=args.latency, jitter=args.jitter,
+               page_size=args.page_size, rate_limit=args.rate_limit, error_rate=args.error_rate, seed=args.seed)
+
+def make_collector(cls, exchange, market_dir):
+    collector = cls(market_cache=MarketCache(market_dir))
+    collector.exchange = exchange
+    return collector
+
+def bench_fetch(args, market_dir):
+    results = {}
+    start = NOW_MS - args.days * DAY_MS
+    exchange = make_exchange(args)
+    bf = make_collector(BinanceFuturesCollector, exchange, market_dir)
+
+    results['fetch_prices'] = measure('fetch_prices', lambda: len(
+        bf.fetch_prices('S000/USDT:USDT', start, NOW_MS, args.timeframe)), exchange)
+    results['fetch_prices_compact'] = measure('fetch_prices_compact', lambda: len(
+        bf.fetch_prices('S000/USDT:USDT', start, NOW_MS, args.timeframe, compact=True)), exchange)
+    results['iter_prices'] = measure('iter_prices', lambda: sum(
+        len(c) for c in bf.iter_prices('S000/USDT:USDT', start, NOW_MS, args.timeframe)), exchange)
+    results['fetch_funding_rates'] = measure('fetch_funding_rates', lambda: len(
+        bf.fetch_funding_rates('S000/USDT:USDT', start, NOW_MS, compact=True)), exchange)
+    return results
+
+def bench_collect(args, market_dir):
+    from scripts.collect_full_data import collect_exchange_data, collect_exchange_data_async
+
+    results = {}
+    start = NOW_MS - args.days * DAY_MS
+    table_rows = "SELECT (SELECT count(*) FROM fundings) + (SELECT count(*) FROM ohlcv)"
+
+    exchange = make_exchange(args)
+    bf = make_collector(BinanceFuturesCollector, exchange, os.path.join(market_dir, 'sync'))
+    db = DatabaseManager(':memory:')
+
+    def run_sync():
+        collect_exchange_data('binance_futures', bf, db, start, NOW_MS)
+        db.flush()
+        return db.con.execute(table_rows).fetchone()[0]
+
+    results['collect_exchange_data'] = measure('collect_exchange_data', run_sync, exchange)
+    db.close()
+
+    exchange = make_exchange(args, AsyncSimulatedExchange)
+    abf = make_collector(AsyncBinanceFuturesCollector, exchange, os.path.join(market_dir, 'async'))
+    asyncio.run(abf.exchange.close())
+    db = DatabaseManager(':memory:')
+
+    def run_async():
+        asyncio.run(collect_exchange_data_async('binance_futures', abf, db, start, NOW_MS, args.concurrency))
+        db.flush()
+        return db.con.execute(table_rows).fetchone()[0]
+
+    results['collect_exchange_data_async'] = measure('collect_exchange_data_async', run_async, exchange)
+    db.close()
+    return results
+
+def bench_insert(args):
+    rows_per_symbol = args.insert_rows // args.symbols
+    stamps = NOW_MS - np.arange(rows_per_symbol, dtype=np.int64)[::-1] * HOUR_MS
+    frames = [pd.DataFrame({'ticker': f"S{i:03d}/USDT:USDT", 'timestamp': stamps, 'open': 1.0, 'high': 2.0,
+                            'low': 0.5, 'close': 1.5, 'volume': 10.0}) for i in range(args.symbols)]
+    db = DatabaseManager(':memory:')
+
+    def run():
+        for frame in frames:
+            db.insert_ohlcv(frame, 'binance_futures')
+        db.flush()
+        return db.ingest_stats['rows']
+
+    result = measure('db_insert_ohlcv', run)
+    db.close()
+    return {'db_insert_ohlcv': result}
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(report, baseline_path):
+    """
+    Print throughput and peak-memory changes against a previous results file.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('git_revision')}):")
+    changed = {k for k in report['config'] if baseline['config'].get(k) != report['config'][k]}
+    if changed:
+        print(f"  note: configuration differs ({', '.join(sorted(changed))})")
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if not old or not old.get('rows_per_sec') or not result['rows_per_sec']:
+            continue
+        print(f"{name:<28} {result['rows_per_sec'] / old['rows_per_sec']:6.2f}x rows/s "
+              f"{result['peak_mb'] - old['peak_mb']:+9.2f} MB peak")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline collector and ingestion benchmarks against a simulated exchange.")
+    parser.add_argument('--symbols', type=int, default=10, help="Synthetic markets (default 10)")
+    parser.add_argument('--days', type=int, default=120, help="History length per symbol (default 120)")
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds per simulated request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra uniform latency, in seconds")
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--rate-limit', type=float, default=None, help="Simulated requests per second")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probability of a network error per request")
+    parser.add_argument('--concurrency', type=int, default=8, help="Symbols in flight for the async loop")
+    parser.add_argument('--insert-rows', type=int, default=1_000_000, help="Rows for the insert benchmark")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', choices=['fetch', 'collect', 'insert'], action='append',
+                        help="Run only these groups (repeatable)")
+    parser.add_argument('--out', default=None, help="Results JSON (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="Previous results JSON to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Show collector output")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    groups = args.only or ['fetch', 'collect', 'insert']
+
+    results = {}
+    with tempfile.TemporaryDirectory() as market_dir:
+        if 'fetch' in groups:
+            results.update(bench_fetch(args, market_dir))
+        if 'collect' in groups:
+            results.update(bench_collect(args, market_dir))
+    if 'insert' in groups:
+        results.update(bench_insert(args))
+
+    now = datetime.now(timezone.utc)
+    report = {
+        'meta': {'timestamp': now.isoformat(), 'git_revision': git_revision(),
+                 'python': platform.python_version(), 'platform': platform.platform()},
+        'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare', 'verbose')},
+        'results': results,
+    }
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                   f"{now.strftime('%Y%m%dT%H%M%S')}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+if __name__ == "__main__":
+    main()
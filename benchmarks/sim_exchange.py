@@ -0,0 +1,144 @@
+import time
+import random
+import asyncio
+import threading
+import ccxt
+
+HOUR_MS = 60 * 60 * 1000
+
+def default_markets(n_symbols, quote='USDT'):
+    """
+    Synthetic linear perps 'S000/USDT:USDT', 'S001/USDT:USDT', ...
+    """
+    markets = {}
+    for i in range(n_symbols):
+        base = f"S{i:03d}"
+        symbol = f"{base}/{quote}:{quote}"
+        markets[symbol] = {'symbol': symbol, 'id': f"{base}{quote}", 'base': base, 'quote': quote,
+                           'settle': quote, 'swap': True, 'active': True}
+    return markets
+
+class SimulatedExchange:
+    """
+    Local stand-in for a ccxt exchange serving deterministic synthetic OHLCV
+    and funding pages, with knobs for the conditions a live API imposes:
+
+    - latency: seconds slept per request (plus optional uniform jitter)
+    - page_size: maximum rows per page, like Hyperliquid's 500-row funding pages
+    - rate_limit: requests per second; exceeding it raises ccxt.RateLimitExceeded
+    - error_rate: probability that a request raises ccxt.NetworkError
+
+    `stats` counts requests, rows served and injected errors.
+    """
+    id = 'simulated'
+    has = {'fetchFundingRateHistory': True, 'fetchOHLCV': True}
+
+    def __init__(self, now_ms, n_symbols=10, latency=0.0, jitter=0.0, page_size=1000, rate_limit=None,
+                 error_rate=0.0, funding_interval_ms=8 * HOUR_MS, seed=0):
+        """
+        :param now_ms: Latest timestamp the exchange has data for
+        :param n_symbols: Number of synthetic markets
+        :param latency: Seconds per request
+        :param jitter: Extra uniform random latency, in seconds
+        :param page_size: Maximum rows per page
+        :param rate_limit: Allowed requests per second (None: unlimited)
+        :param error_rate: Probability of a transient network error per request
+        :param funding_interval_ms: Funding settlement interval
+        :param seed: Seed for latency jitter and error injection
+        """
+        self.now_ms = now_ms
+        self.markets = default_markets(n_symbols)
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.funding_interval_ms = funding_interval_ms
+        self.options = {'defaultType': 'future'}
+        self.stats = {'requests': 0, 'rows': 0, 'errors': 0, 'rate_limited': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def _admit(self):
+        """
+        Account for one request and return the latency to apply, or raise
+        the injected error.
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start, self._window_requests = now, 0
+                self._window_requests += 1
+                if self._window_requests > self.rate_limit:
+                    self.stats['rate_limited'] += 1
+                    raise ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests")
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                raise ccxt.NetworkError(f"{self.id} injected network error")
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _ohlcv_page(self, timeframe, since, limit):
+        step = self.parse_timeframe(timeframe) * 1000
+        ts = -(-since // step) * step
+        count = max(0, min(limit or self.page_size, self.page_size, (self.now_ms - ts) // step + 1))
+        rows = []
+        for i in range(count):
+            t = ts + i * step
+            price = 100.0 + (t // step) % 50
+            rows.append([t, price, price + 1, price - 1, price + 0.5, 10.0])
+        self.stats['rows'] += count
+        return rows
+
+    def _funding_page(self, symbol, since, limit):
+        step = self.funding_interval_ms
+        ts = -(-since // step) * step
+        count = max(0, min(limit or self.page_size, self.page_size, (self.now_ms - ts) // step + 1))
+        rows = []
+        for i in range(count):
+            t = ts + i * step
+            rows.append({'info': {}, 'symbol': symbol, 'fundingRate': 0.0001 * (1 + (t // step) % 3),
+                         'timestamp': t, 'datetime': None})
+        self.stats['rows'] += count
+        return rows
+
+    def load_markets(self, reload=False):
+        time.sleep(self._admit())
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        time.sleep(self._admit())
+        return self._ohlcv_page(timeframe, since, limit)
+
+    def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        time.sleep(self._admit())
+        return self._funding_page(symbol, since, limit)
+
+class AsyncSimulatedExchange(SimulatedExchange):
+    """
+    Awaitable SimulatedExchange for the async collectors; latency is an
+    asyncio.sleep, so concurrent requests overlap like real network I/O.
+    """
+    async def load_markets(self, reload=False):
+        await asyncio.sleep(self._admit())
+        return self.markets
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        await asyncio.sleep(self._admit())
+        return self._ohlcv_page(timeframe, since, limit)
+
+    async def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        await asyncio.sleep(self._admit())
+        return self._funding_page(symbol, since, limit)
+
+    async def close(self):
+        pass
@@ -0,0 +1,34 @@
+import sys
+import argparse
+import importlib
+
+# Subcommand -> (script module, help). A module is imported only when its
+# subcommand runs, so e.g. `scan` never loads the DuckDB or backtest code.
+COMMANDS = {
+    'collect': ('scripts.collect_full_data', "Collect funding and OHLCV history into DuckDB"),
+    'backfill': ('scripts.backfill_gaps', "Find and refetch gaps in stored series"),
+    'scan': ('scripts.scan_funding', "Rank the live cross-exchange funding spread"),
+    'export': ('scripts.export_parquet', "Export DuckDB tables to the Parquet lake"),
+    'quality': ('scripts.check_quality', "Report data-quality flags and cross-venue divergence"),
+    'stream': ('scripts.stream_funding', "Stream live funding over websockets"),
+    'basis': ('scripts.collect_basis', "Collect spot prices and refresh the basis table"),
+    'backtest': ('scripts.run_backtest', "Backtest the funding spread strategy"),
+    'search': ('scripts.search_params', "Search strategy parameters"),
+}
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='cli.py', description="funding_arb command line. Options after the command go to that command "
+                                   "(e.g. `cli.py scan --help`).")
+    subparsers = parser.add_subparsers(dest='command', metavar='command', required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+    return parser.parse_known_args(argv)
+
+def main(argv=None):
+    args, rest = parse_args(argv)
+    module = importlib.import_module(COMMANDS[args.command][0])
+    return module.main(rest)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,15 @@
-from .binance_futures import BinanceFuturesCollector
-from .binance_spot import BinanceSpotCollector
-from .hyperliquid import HyperliquidCollector
+from .lazy import lazy_exports
+
+# Collectors are imported on first use, so importing one (or a helper module
+# such as collector.symbols) does not pay for ccxt.async_support or the others.
+_EXPORTS = {
+    'BinanceFuturesCollector': '.binance_futures',
+    'BinanceSpotCollector': '.binance_spot',
+    'HyperliquidCollector': '.hyperliquid',
+    'AsyncBinanceFuturesCollector': '.async_binance_futures',
+    'AsyncHyperliquidCollector': '.async_hyperliquid',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,29 @@
+import ccxt.async_support as ccxt_async
+from .base import AsyncPerpCollector
+from .schema import parse_funding_intervals
+
+class AsyncBinanceFuturesCollector(AsyncPerpCollector):
+    """
+    asyncio counterpart of BinanceFuturesCollector built on ccxt.async_support.
+    """
+    exchange_name = 'binance_futures'
+    # Binance settles every 8h (some symbols 4h)
+    funding_interval_ms = 8 * 60 * 60 * 1000
+
+    def __init__(self, cache=None, market_cache=None):
+        """
+        :param cache: Optional ResponseCache; defaults to ResponseCache.from_env()
+        :param market_cache: Optional MarketCache; defaults to MarketCache.from_env()
+        """
+        super().__init__(ccxt_async.binance({
+            'options': {'defaultType': 'future'},
+            'enableRateLimit': True
+        }), cache, market_cache)
+
+    async def funding_intervals(self, reload=False):
+        """
+        See BinanceFuturesCollector.funding_intervals.
+        """
+        async def load():
+            return parse_funding_intervals(await self.exchange.fetch_funding_intervals())
+        return await self.market_cache.get_extra_async(self.exchange_name, 'funding_intervals', load, reload)
@@ -0,0 +1,25 @@
+import ccxt.async_support as ccxt_async
+from .base import AsyncPerpCollector
+
+class AsyncHyperliquidCollector(AsyncPerpCollector):
+    """
+    asyncio counterpart of HyperliquidCollector built on ccxt.async_support.
+    """
+    exchange_name = 'hyperliquid'
+    # Hyperliquid settles funding hourly
+    funding_interval_ms = 60 * 60 * 1000
+
+    def __init__(self, cache=None, market_cache=None):
+        """
+        :param cache: Optional ResponseCache; defaults to ResponseCache.from_env()
+        :param market_cache: Optional MarketCache; defaults to MarketCache.from_env()
+        """
+        super().__init__(ccxt_async.hyperliquid({
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': 'future',
+                'fetchMarkets': {
+                    'types': ['swap'] # Only fetch perps to avoid "Too many DEXes" error from HIP-3
+                }
+            },
+        }), cache, market_cache)
@@ -0,0 +1,480 @@
+import time
+import pandas as pd
+from datetime import datetime, timezone
+from .rate_limiter import attach_rate_limiter
+from .metrics import METRICS, attach_metrics
+from .response_cache import ResponseCache
+from .market_cache import MarketCache
+from .schema import FundingBuffer, OHLCVBuffer, funding_chunk, ohlcv_chunk, funding_snapshot_frame
+from .windows import PAGE_LIMIT, split_windows, page_window_ms, fetch_windows, fetch_windows_async
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def to_timestamp(value):
+    """
+    :param value: ISO string, naive/UTC datetime, or ms timestamp
+    :return: ms timestamp
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    dt = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
+
+class FundingPager:
+    """
+    Pagination state for funding history over [start_ts, end_ts]. The sync
+    and async collectors drive the same pager and only differ in how they
+    request a page.
+    """
+    def __init__(self, start_ts, end_ts, limit=PAGE_LIMIT):
+        self.since = start_ts
+        self.end_ts = end_ts
+        self.limit = limit
+        self.done = start_ts >= end_ts
+
+    def feed(self, rates):
+        """
+        :param rates: ccxt funding page requested from `since`
+        :return: Rows of the page at or after `since` (empty once the range is exhausted)
+        """
+        new_rates = [r for r in rates or [] if r['timestamp'] >= self.since]
+        if not new_rates:
+            self.done = True
+            return []
+        last_ts = rates[-1]['timestamp']
+        if last_ts == self.since:
+            # Avoid infinite loop if no progress
+            self.done = True
+        self.since = last_ts + 1
+        self.done = self.done or self.since >= self.end_ts
+        return new_rates
+
+class PricePager:
+    """
+    Pagination state for OHLCV candles over [start_ts, end_ts] (see FundingPager).
+    """
+    def __init__(self, start_ts, end_ts, duration_ms, limit=PAGE_LIMIT):
+        self.since = start_ts
+        self.end_ts = end_ts
+        self.duration_ms = duration_ms
+        self.limit = limit
+        self.done = start_ts >= end_ts
+
+    def feed(self, ohlcv):
+        """
+        :param ohlcv: ccxt OHLCV page requested from `since`
+        :return: The page (empty once the range is exhausted)
+        """
+        if not ohlcv:
+            self.done = True
+            return []
+        last_ts = ohlcv[-1][0]
+        # Exchanges may cap pages below the requested limit (and the cap varies
+        # by endpoint), so a short page is not the end: only an empty page or
+        # reaching end_ts is
+        if last_ts + self.duration_ms > self.end_ts:
+            self.done = True
+        # Next batch starts after the last candle; force progress if stuck
+        self.since = self.since + self.duration_ms if last_ts == self.since else last_ts + 1
+        self.done = self.done or self.since >= self.end_ts
+        return ohlcv
+
+def funding_result(rows, symbol, exchange_name, end_ts, compact):
+    """
+    Assemble fetch_funding_rates() output from the collected rows.
+    """
+    if compact:
+        return rows.to_frame(symbol, exchange_name, end_ts)
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df = df[df['timestamp'] <= end_ts]
+        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+def prices_result(rows, symbol, exchange_name, end_ts, compact):
+    """
+    Assemble fetch_prices() output from the collected rows.
+    """
+    if compact:
+        return rows.to_frame(symbol, exchange_name, end_ts)
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    if not df.empty:
+        df = df[df['timestamp'] <= end_ts]
+        df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+class Collector:
+    """
+    Paginated OHLCV collection over one ccxt exchange. Subclasses only build
+    the exchange instance; PerpCollector adds funding.
+
+    The exchange gets the shared, weight-aware rate limiter and request
+    metrics, and is wrapped by the response cache when one is configured.
+    """
+    exchange_name = None
+
+    def __init__(self, exchange, cache=None, market_cache=None):
+        """
+        :param exchange: ccxt exchange instance
+        :param cache: Optional ResponseCache; defaults to ResponseCache.from_env()
+        :param market_cache: Optional MarketCache; defaults to MarketCache.from_env()
+        """
+        self.exchange = exchange
+        # Shared, weight-aware limiter for every collector of this exchange
+        attach_rate_limiter(self.exchange)
+        attach_metrics(self.exchange, self.exchange_name)
+
+        cache = cache or ResponseCache.from_env()
+        if cache is not None:
+            self.exchange = cache.wrap(self.exchange)
+        self.market_cache = market_cache or MarketCache.from_env()
+
+    def fetch_markets(self, reload=False):
+        """
+        Fetch all available markets, served from the shared market cache while fresh.
+        :return: List of market objects
+        """
+        return self.market_index(reload)['markets']
+
+    def market_index(self, reload=False):
+        """
+        Markets plus precomputed 'active', 'perps', 'spot' and 'assets' lookups (see MarketCache.get).
+        """
+        return self.market_cache.get(self.exchange, self.exchange_name, reload)
+
+    def _to_timestamp(self, date_str):
+        return to_timestamp(date_str)
+
+    def _price_pages(self, symbol, start_ts, end_ts, timeframe):
+        """
+        Yield raw ccxt OHLCV pages covering [start_ts, end_ts], one request per page.
+        Exchange errors propagate, so callers retry (stream_with_retry) or fail
+        the window instead of treating a truncated range as complete.
+        """
+        pager = PricePager(start_ts, end_ts, self.exchange.parse_timeframe(timeframe) * 1000)
+        while not pager.done:
+            started = time.perf_counter()
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=pager.since, limit=pager.limit)
+            page = pager.feed(ohlcv)
+            if page:
+                METRICS.record_page(self.exchange_name, 'ohlcv', symbol, len(page), time.perf_counter() - started)
+                yield page
+
+    def iter_prices(self, symbol, start_date, end_date, timeframe='1h'):
+        """
+        Generator variant of fetch_prices: yields one compact-schema DataFrame
+        per page of candles as soon as it arrives.
+
+        :param symbol: Trading symbol
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :param timeframe: Timeframe string (default '1h')
+        :return: Iterator of DataFrames (see collector.schema.ohlcv_chunk)
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        for page in self._price_pages(symbol, start_ts, end_ts, timeframe):
+            chunk = ohlcv_chunk(page, symbol, self.exchange_name, end_ts)
+            if len(chunk):
+                yield chunk
+
+    def fetch_prices(self, symbol, start_date, end_date, timeframe='1h', compact=False):
+        """
+        Fetch OHLCV prices for a specific symbol within a date range.
+
+        :param symbol: Trading symbol (e.g., 'BTC/USDT')
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :param timeframe: Timeframe string (default '1h')
+        :param compact: Return the compact typed schema (see collector.schema)
+        :return: DataFrame containing OHLCV data
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        rows = OHLCVBuffer() if compact else []
+        for page in self._price_pages(symbol, start_ts, end_ts, timeframe):
+            rows.extend(page)
+        return prices_result(rows, symbol, self.exchange_name, end_ts, compact)
+
+    def fetch_prices_windowed(self, symbol, start_date, end_date, timeframe='1h', max_workers=4, window_pages=1, compact=False):
+        """
+        Fetch OHLCV prices by cutting the range into fixed windows up front and
+        requesting the windows concurrently instead of paging sequentially.
+
+        :param symbol: Trading symbol
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :param timeframe: Timeframe string (default '1h')
+        :param max_workers: Number of windows in flight at once
+        :param window_pages: Full pages of candles per window
+        :param compact: Return the compact typed schema
+        :return: DataFrame containing OHLCV data, de-duplicated by timestamp
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        duration_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        windows = split_windows(start_ts, end_ts, page_window_ms(duration_ms, window_pages))
+        return fetch_windows(
+            lambda ws, we: self.fetch_prices(symbol, ws, we, timeframe, compact), windows, max_workers)
+
+class PerpCollector(Collector):
+    """
+    Collector for a perpetual futures exchange: candles plus funding history
+    and current funding.
+    """
+    # Funding cadence used to size windows and as the snapshot default
+    funding_interval_ms = None
+
+    def fetch_current_funding(self):
+        """
+        Current (predicted) funding for every perpetual in a single bulk
+        request instead of one paginated history call per symbol.
+
+        :return: DataFrame with ticker, funding_rate, interval_hours, mark_price, index_price, next_funding_ts
+        """
+        rates = self.exchange.fetch_funding_rates()
+        return funding_snapshot_frame(rates, self.funding_interval_ms, self.funding_intervals())
+
+    def funding_intervals(self, reload=False):
+        """
+        Per-symbol funding intervals for venues whose bulk funding endpoint does
+        not report them.
+
+        :return: Dict symbol -> interval string ('4h'), or None when the snapshot carries them
+        """
+        return None
+
+    def _funding_pages(self, symbol, start_ts, end_ts):
+        """
+        Yield raw ccxt funding pages covering [start_ts, end_ts], one request per
+        page. Exchange errors propagate (see _price_pages).
+        """
+        pager = FundingPager(start_ts, end_ts)
+        while not pager.done:
+            started = time.perf_counter()
+            if not self.exchange.has['fetchFundingRateHistory']:
+                print(f"Warning: fetchFundingRateHistory not supported by this ccxt version for {self.exchange_name}.")
+                break
+            rates = self.exchange.fetch_funding_rate_history(symbol, since=pager.since, limit=pager.limit)
+            page = pager.feed(rates)
+            if page:
+                METRICS.record_page(self.exchange_name, 'funding', symbol, len(page), time.perf_counter() - started)
+                yield page
+
+    def iter_funding_rates(self, symbol, start_date, end_date):
+        """
+        Generator variant of fetch_funding_rates: yields one compact-schema
+        DataFrame per page as soon as it arrives, so memory is bounded by the
+        page size rather than the length of the history.
+
+        :param symbol: Trading symbol
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :return: Iterator of DataFrames (see collector.schema.funding_chunk)
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        for page in self._funding_pages(symbol, start_ts, end_ts):
+            chunk = funding_chunk(page, symbol, self.exchange_name, end_ts)
+            if len(chunk):
+                yield chunk
+
+    def fetch_funding_rates(self, symbol, start_date, end_date, compact=False):
+        """
+        Fetch funding rates for a specific symbol within a date range.
+
+        :param symbol: Trading symbol (e.g., 'BTC/USDT:USDT')
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :param compact: Return the compact typed schema (see collector.schema)
+        :return: DataFrame containing funding rates
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        rows = FundingBuffer() if compact else []
+        for page in self._funding_pages(symbol, start_ts, end_ts):
+            rows.extend(page)
+        return funding_result(rows, symbol, self.exchange_name, end_ts, compact)
+
+    def fetch_funding_rates_windowed(self, symbol, start_date, end_date, max_workers=4, window_pages=1, compact=False):
+        """
+        Fetch funding rates over concurrently requested windows sized from the
+        exchange funding interval. Each window still pages internally, so
+        symbols settling more often than `funding_interval_ms` stay complete.
+
+        :param symbol: Trading symbol
+        :param start_date: Start date (ISO string, datetime, or ms timestamp)
+        :param end_date: End date (ISO string, datetime, or ms timestamp)
+        :param max_workers: Number of windows in flight at once
+        :param window_pages: Full pages of funding records per window
+        :param compact: Return the compact typed schema
+        :return: DataFrame containing funding rates, de-duplicated by timestamp
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        windows = split_windows(start_ts, end_ts, page_window_ms(self.funding_interval_ms, window_pages))
+        return fetch_windows(
+            lambda ws, we: self.fetch_funding_rates(symbol, ws, we, compact), windows, max_workers)
+
+class AsyncPerpCollector:
+    """
+    asyncio counterpart of PerpCollector for ccxt.async_support exchanges.
+    Pagination and parsing are the shared pagers and result builders; only
+    the exchange calls are awaited, so many symbols can be in flight at once
+    on a single event loop.
+    """
+    exchange_name = None
+    funding_interval_ms = None
+
+    def __init__(self, exchange, cache=None, market_cache=None):
+        """
+        :param exchange: ccxt.async_support exchange instance
+        :param cache: Optional ResponseCache; defaults to ResponseCache.from_env()
+        :param market_cache: Optional MarketCache; defaults to MarketCache.from_env()
+        """
+        self.exchange = exchange
+        attach_rate_limiter(self.exchange)
+        attach_metrics(self.exchange, self.exchange_name)
+
+        cache = cache or ResponseCache.from_env()
+        if cache is not None:
+            self.exchange = cache.wrap(self.exchange)
+        self.market_cache = market_cache or MarketCache.from_env()
+
+    async def fetch_markets(self, reload=False):
+        """
+        Fetch all available markets, served from the shared market cache while fresh.
+        :return: List of market objects
+        """
+        return (await self.market_index(reload))['markets']
+
+    async def market_index(self, reload=False):
+        """
+        Markets plus precomputed 'active', 'perps', 'spot' and 'assets' lookups (see MarketCache.get).
+        """
+        return await self.market_cache.get_async(self.exchange, self.exchange_name, reload)
+
+    async def fetch_current_funding(self):
+        """
+        Current (predicted) funding for every perpetual in a single bulk request.
+
+        :return: DataFrame with ticker, funding_rate, interval_hours, mark_price, index_price, next_funding_ts
+        """
+        rates = await self.exchange.fetch_funding_rates()
+        return funding_snapshot_frame(rates, self.funding_interval_ms, await self.funding_intervals())
+
+    async def funding_intervals(self, reload=False):
+        """
+        See PerpCollector.funding_intervals.
+        """
+        return None
+
+    async def close(self):
+        """
+        Close the underlying aiohttp session. Must be awaited once collection is done.
+        """
+        await self.exchange.close()
+
+    def _to_timestamp(self, date_str):
+        return to_timestamp(date_str)
+
+    async def _funding_pages(self, symbol, start_ts, end_ts):
+        pager = FundingPager(start_ts, end_ts)
+        while not pager.done:
+            started = time.perf_counter()
+            if not self.exchange.has['fetchFundingRateHistory']:
+                print(f"Warning: fetchFundingRateHistory not supported by this ccxt version for {self.exchange_name}.")
+                break
+            rates = await self.exchange.fetch_funding_rate_history(symbol, since=pager.since, limit=pager.limit)
+            page = pager.feed(rates)
+            if page:
+                METRICS.record_page(self.exchange_name, 'funding', symbol, len(page), time.perf_counter() - started)
+                yield page
+
+    async def _price_pages(self, symbol, start_ts, end_ts, timeframe):
+        pager = PricePager(start_ts, end_ts, self.exchange.parse_timeframe(timeframe) * 1000)
+        while not pager.done:
+            started = time.perf_counter()
+            ohlcv = await self.exchange.fetch_ohlcv(symbol, timeframe, since=pager.since, limit=pager.limit)
+            page = pager.feed(ohlcv)
+            if page:
+                METRICS.record_page(self.exchange_name, 'ohlcv', symbol, len(page), time.perf_counter() - started)
+                yield page
+
+    async def iter_funding_rates(self, symbol, start_date, end_date):
+        """
+        Async generator variant of fetch_funding_rates (see PerpCollector.iter_funding_rates).
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        async for page in self._funding_pages(symbol, start_ts, end_ts):
+            chunk = funding_chunk(page, symbol, self.exchange_name, end_ts)
+            if len(chunk):
+                yield chunk
+
+    async def iter_prices(self, symbol, start_date, end_date, timeframe='1h'):
+        """
+        Async generator variant of fetch_prices (see Collector.iter_prices).
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        async for page in self._price_pages(symbol, start_ts, end_ts, timeframe):
+            chunk = ohlcv_chunk(page, symbol, self.exchange_name, end_ts)
+            if len(chunk):
+                yield chunk
+
+    async def fetch_funding_rates(self, symbol, start_date, end_date, compact=False):
+        """
+        See PerpCollector.fetch_funding_rates.
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        rows = FundingBuffer() if compact else []
+        async for page in self._funding_pages(symbol, start_ts, end_ts):
+            rows.extend(page)
+        return funding_result(rows, symbol, self.exchange_name, end_ts, compact)
+
+    async def fetch_prices(self, symbol, start_date, end_date, timeframe='1h', compact=False):
+        """
+        See Collector.fetch_prices.
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        rows = OHLCVBuffer() if compact else []
+        async for page in self._price_pages(symbol, start_ts, end_ts, timeframe):
+            rows.extend(page)
+        return prices_result(rows, symbol, self.exchange_name, end_ts, compact)
+
+    async def fetch_funding_rates_windowed(self, symbol, start_date, end_date, max_workers=4, window_pages=1, compact=False):
+        """
+        Fetch funding rates over windows sized from `funding_interval_ms`,
+        requested concurrently on the event loop.
+
+        :param max_workers: Number of windows in flight at once
+        :param window_pages: Full pages of funding records per window
+        :param compact: Return the compact typed schema
+        :return: DataFrame containing funding rates, de-duplicated by timestamp
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        windows = split_windows(start_ts, end_ts, page_window_ms(self.funding_interval_ms, window_pages))
+        return await fetch_windows_async(
+            lambda ws, we: self.fetch_funding_rates(symbol, ws, we, compact), windows, max_workers)
+
+    async def fetch_prices_windowed(self, symbol, start_date, end_date, timeframe='1h', max_workers=4, window_pages=1, compact=False):
+        """
+        Fetch OHLCV prices over fixed windows requested concurrently on the event loop.
+
+        :param max_workers: Number of windows in flight at once
+        :param window_pages: Full pages of candles per window
+        :param compact: Return the compact typed schema
+        :return: DataFrame containing OHLCV data, de-duplicated by timestamp
+        """
+        start_ts = self._to_timestamp(start_date)
+        end_ts = self._to_timestamp(end_date)
+        duration_ms = self.exchange.parse_timeframe(timeframe) * 1000
+        windows = split_windows(start_ts, end_ts, page_window_ms(duration_ms, window_pages))
+        return await fetch_windows_async(
+            lambda ws, we: self.fetch_prices(symbol, ws, we, timeframe, compact), windows, max_workers)
@@ -0,0 +1,24 @@
+import sys
+import importlib
+
+def lazy_exports(package, exports):
+    """
+    Module-level __getattr__ / __dir__ for a package whose public names are
+    imported from their submodules on first access (PEP 562). A resolved name
+    is cached on the package, so later lookups skip __getattr__.
+
+    :param package: The package's __name__
+    :param exports: Dict public name -> relative submodule ('.engine')
+    :return: (__getattr__, __dir__)
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name], package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
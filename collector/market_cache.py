@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import threading
+from .symbols import QUOTE_PREFERENCE, is_linear_perp, map_by_asset, split_symbol
+
+DEFAULT_TTL = 60 * 60
+INDEX_KEYS = ('active', 'perps', 'spot', 'assets')
+
+def build_index(markets):
+    """
+    Precompute the symbol lists the scripts filter for on every run.
+
+    :param markets: ccxt markets dict (symbol -> market)
+    :return: Dict with 'active' (active USDT/USDC symbols), 'perps' (the
+             linear perpetuals among them), 'spot' (the spot pairs among them)
+             and 'assets' (asset -> [symbol, multiplier], one per base asset, preferring perps)
+    """
+    active = sorted(
+        symbol for symbol, market in markets.items()
+        if market.get('quote') in QUOTE_PREFERENCE and market.get('active', True) is not False
+    )
+    perps = [s for s in active if is_linear_perp(s)]
+    spot = [s for s in active if split_symbol(s)[2] is None]
+    assets = {asset: list(pair) for asset, pair in map_by_asset(perps or active).items()}
+    return {'active': active, 'perps': perps, 'spot': spot, 'assets': assets}
+
+class MarketCache:
+    """
+    TTL'd market metadata shared by every collector in the process and, through
+    one JSON file per exchange, by every process pointing at the same directory.
+
+    A fresh entry is installed on the ccxt instance with set_markets, so the
+    exchange never downloads its market list while the entry lives; once it
+    expires the next caller reloads and rewrites it (atomically, so readers in
+    other processes see either the old or the new file).
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        """
+        :param path: Cache directory
+        :param ttl: Seconds an entry stays fresh
+        """
+        self.path = path
+        self.ttl = ttl
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'loads': 0}
+        self._entries = {}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Process-wide cache in $FUNDING_ARB_MARKET_CACHE_DIR (default data/markets)
+        with a TTL of $FUNDING_ARB_MARKET_TTL seconds.
+        """
+        path = os.environ.get('FUNDING_ARB_MARKET_CACHE_DIR', os.path.join('data', 'markets'))
+        ttl = float(os.environ.get('FUNDING_ARB_MARKET_TTL', DEFAULT_TTL))
+        with _registry_lock:
+            if (path, ttl) not in _registry:
+                _registry[(path, ttl)] = cls(path, ttl)
+            return _registry[(path, ttl)]
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.json")
+
+    def _fresh(self, entry, keys=INDEX_KEYS):
+        # Entries written before an index key existed are treated as expired
+        return (entry is not None and entry['saved_at'] + self.ttl * 1000 > time.time() * 1000
+                and all(key in entry for key in keys))
+
+    def _read(self, name):
+        try:
+            with open(self._file(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name, entry):
+        tmp = f"{self._file(name)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(entry, f, default=str)
+        os.replace(tmp, self._file(name))
+        self._entries[name] = entry
+        self.stats['loads'] += 1
+        return entry
+
+    def _store(self, name, markets, currencies):
+        entry = {'saved_at': int(time.time() * 1000), 'markets': markets, 'currencies': currencies or {}}
+        entry.update(build_index(markets))
+        return self._write(name, entry)
+
+    def lookup(self, name, keys=INDEX_KEYS):
+        """
+        Fresh entry for an exchange from memory or disk, or None.
+        """
+        entry = self._entries.get(name)
+        if self._fresh(entry, keys):
+            self.stats['memory_hits'] += 1
+            return entry
+        entry = self._read(name)
+        if self._fresh(entry, keys):
+            self.stats['disk_hits'] += 1
+            self._entries[name] = entry
+            return entry
+        return None
+
+    @staticmethod
+    def _install(exchange, entry):
+        if not getattr(exchange, 'markets', None):
+            exchange.set_markets(entry['markets'], entry['currencies'] or None)
+
+    def get(self, exchange, name, reload=False):
+        """
+        Markets and their precomputed index for one exchange.
+
+        :param exchange: ccxt exchange instance (markets are installed on it)
+        :param name: Collector exchange name, e.g. 'binance_futures'
+        :param reload: Ignore the cached entry and download the market list
+        :return: Dict with 'markets', 'currencies', 'active', 'perps', 'spot', 'assets', 'saved_at'
+        """
+        with self._lock:
+            entry = None if reload else self.lookup(name)
+            if entry is None:
+                markets = exchange.load_markets(True)
+                entry = self._store(name, markets, getattr(exchange, 'currencies', None))
+            else:
+                self._install(exchange, entry)
+            return entry
+
+    async def get_async(self, exchange, name, reload=False):
+        """
+        get() for ccxt.async_support instances.
+        """
+        entry = None if reload else self.lookup(name)
+        if entry is None:
+            markets = await exchange.load_markets(True)
+            return self._store(name, markets, getattr(exchange, 'currencies', None))
+        self._install(exchange, entry)
+        return entry
+
+    def get_extra(self, name, key, load, reload=False):
+        """
+        Other per-exchange metadata (e.g. funding intervals) cached next to the
+        market entry, in its own file and with the same TTL.
+
+        :param name: Collector exchange name
+        :param key: Metadata name, used in the file name
+        :param load: Zero-argument callable returning a JSON-serialisable value
+        :param reload: Ignore the cached value
+        :return: The cached or freshly loaded value
+        """
+        file_name = f"{name}.{key}"
+        with self._lock:
+            entry = None if reload else self.lookup(file_name, keys=('value',))
+            if entry is None:
+                entry = self._write(file_name, {'saved_at': int(time.time() * 1000), 'value': load()})
+            return entry['value']
+
+    async def get_extra_async(self, name, key, load, reload=False):
+        """
+        get_extra() with an awaitable loader.
+        """
+        file_name = f"{name}.{key}"
+        entry = None if reload else self.lookup(file_name, keys=('value',))
+        if entry is None:
+            entry = self._write(file_name, {'saved_at': int(time.time() * 1000), 'value': await load()})
+        return entry['value']
+
+    def asset_map(self, names):
+        """
+        Cross-exchange base-asset symbol map from cached entries.
+
+        :param names: Exchange names whose entries are already cached
+        :return: Dict asset -> {exchange name: symbol} for assets listed on every exchange
+        """
+        maps = {}
+        for name in names:
+            entry = self.lookup(name)
+            if entry is None:
+                raise KeyError(f"No fresh market entry for {name}")
+            maps[name] = entry['assets']
+        shared = set.intersection(*(set(m) for m in maps.values())) if maps else set()
+        return {asset: {name: maps[name][asset][0] for name in names} for asset in sorted(shared)}
+
+_registry = {}
+_registry_lock = threading.Lock()
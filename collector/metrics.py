@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import bisect
+import asyncio
+import cProfile
+import threading
+import contextlib
+import collections
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ('network', 'sleep', 'frame', 'db_insert')
+PREFIX = 'funding_arb'
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram (Prometheus semantics).
+    """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        """
+        Add another histogram with the same buckets (e.g. from a worker process).
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile (the max for the +Inf bucket).
+        """
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+class Metrics:
+    """
+    Process-wide instrumentation for collection runs: request latency per
+    exchange endpoint, pages/rows/fetch time per symbol, retries, rate-limit
+    hits and time per phase (network, rate-limit sleep, DataFrame
+    construction, DB insert).
+
+    Phase times are summed over every request, thread and worker process, so
+    with concurrent requests they can exceed the run's wall time; they show
+    where request time goes, not elapsed time.
+
+    Exposed as Prometheus text (file or HTTP endpoint) and a JSON summary.
+    Worker processes hand their counts to the parent with drain() / merge().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _clear(self):
+        self.latency = collections.defaultdict(Histogram)
+        self.requests = collections.Counter()
+        self.symbols = collections.defaultdict(lambda: {'pages': 0, 'rows': 0, 'seconds': 0.0})
+        self.retries = collections.Counter()
+        self.rate_limited = collections.Counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._clear()
+
+    def drain(self):
+        """
+        Take everything recorded since the last drain (or reset) and start
+        counting from zero again; the run start time is kept.
+
+        :return: Picklable dict for merge() in another process
+        """
+        with self._lock:
+            drained = {
+                'latency': dict(self.latency),
+                'requests': dict(self.requests),
+                'symbols': {key: dict(entry) for key, entry in self.symbols.items()},
+                'retries': dict(self.retries),
+                'rate_limited': dict(self.rate_limited),
+                'phases': dict(self.phases),
+            }
+            self._clear()
+        return drained
+
+    def merge(self, drained):
+        """
+        Add counts drained from another Metrics (e.g. a worker process).
+        """
+        if not drained:
+            return
+        with self._lock:
+            for key, hist in drained['latency'].items():
+                self.latency[key].merge(hist)
+            self.requests.update(drained['requests'])
+            for key, entry in drained['symbols'].items():
+                for field, value in entry.items():
+                    self.symbols[key][field] += value
+            self.retries.update(drained['retries'])
+            self.rate_limited.update(drained['rate_limited'])
+            for phase, seconds in drained['phases'].items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def observe_request(self, exchange, endpoint, seconds, status='ok'):
+        with self._lock:
+            self.latency[(exchange, endpoint)].observe(seconds)
+            self.requests[(exchange, endpoint, status)] += 1
+            self.phases['network'] += seconds
+
+    def record_page(self, exchange, dataset, symbol, rows, seconds=0.0):
+        """
+        :param dataset: 'ohlcv' or 'funding'
+        :param seconds: Time spent fetching the page
+        """
+        with self._lock:
+            entry = self.symbols[(exchange, dataset, symbol)]
+            entry['pages'] += 1
+            entry['rows'] += rows
+            entry['seconds'] += seconds
+
+    def record_retry(self, dataset, error):
+        with self._lock:
+            self.retries[(dataset, type(error).__name__)] += 1
+
+    def record_rate_limited(self, exchange, status):
+        with self._lock:
+            self.rate_limited[(exchange, status)] += 1
+
+    def add_time(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timed(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - started)
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            name = f"{PREFIX}_request_seconds"
+            lines += [f"# HELP {name} REST request latency", f"# TYPE {name} histogram"]
+            for (exchange, endpoint), hist in sorted(self.latency.items()):
+                seen = 0
+                for bound, n in zip(hist.buckets + ('+Inf',), hist.counts):
+                    seen += n
+                    lines.append(f"{name}_bucket{_labels(exchange=exchange, endpoint=endpoint, le=bound)} {seen}")
+                lines.append(f"{name}_sum{_labels(exchange=exchange, endpoint=endpoint)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_labels(exchange=exchange, endpoint=endpoint)} {hist.count}")
+
+            def counter(metric, help_text, items, keys):
+                lines.extend([f"# HELP {PREFIX}_{metric} {help_text}", f"# TYPE {PREFIX}_{metric} counter"])
+                for key, value in sorted(items):
+                    lines.append(f"{PREFIX}_{metric}{_labels(**dict(zip(keys, key)))} {value}")
+
+            counter('requests_total', 'REST requests', self.requests.items(), ('exchange', 'endpoint', 'status'))
+            counter('pages_total', 'Pages fetched',
+                    ((k, v['pages']) for k, v in self.symbols.items()), ('exchange', 'dataset', 'symbol'))
+            counter('rows_total', 'Rows fetched',
+                    ((k, v['rows']) for k, v in self.symbols.items()), ('exchange', 'dataset', 'symbol'))
+            counter('retries_total', 'Fetch retries', self.retries.items(), ('dataset', 'error'))
+            counter('rate_limited_total', 'Rate-limit responses', self.rate_limited.items(), ('exchange', 'status'))
+            counter('phase_seconds_total', 'Seconds per phase summed over concurrent requests and workers',
+                    (((p,), f"{s:.6f}") for p, s in self.phases.items()), ('phase',))
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, top=10):
+        """
+        JSON-serializable run summary, including the `top` slowest symbols.
+        """
+        with self._lock:
+            requests = {}
+            for (exchange, endpoint), hist in sorted(self.latency.items()):
+                errors = sum(n for (e, ep, status), n in self.requests.items()
+                             if (e, ep) == (exchange, endpoint) and status != 'ok')
+                requests.setdefault(exchange, {})[endpoint] = {
+                    'count': hist.count, 'errors': errors,
+                    'mean_seconds': hist.sum / hist.count if hist.count else 0.0,
+                    'p50_seconds': hist.quantile(0.5), 'p90_seconds': hist.quantile(0.9),
+                    'p99_seconds': hist.quantile(0.99), 'max_seconds': hist.max,
+                }
+            symbols = {}
+            for (exchange, dataset, symbol), entry in self.symbols.items():
+                symbols.setdefault(exchange, {}).setdefault(symbol, {})[dataset] = dict(entry)
+            slowest = sorted(self.symbols.items(), key=lambda item: -item[1]['seconds'])[:top]
+            return {
+                'started': self.started,
+                'duration_seconds': time.time() - self.started,
+                # Summed over concurrent requests and workers: may exceed duration_seconds
+                'summed_phase_seconds': dict(self.phases),
+                'requests': requests,
+                'symbols': symbols,
+                'slowest_symbols': [{'exchange': e, 'dataset': d, 'symbol': s, **v} for (e, d, s), v in slowest],
+                'retries': {f"{d}:{err}": n for (d, err), n in self.retries.items()},
+                'rate_limited': {f"{e}:{status}": n for (e, status), n in self.rate_limited.items()},
+            }
+
+    def write(self, directory, run_name=None):
+        """
+        Write metrics.prom (for a node_exporter textfile collector) and a
+        per-run JSON summary into `directory`.
+
+        :return: Path of the JSON summary
+        """
+        os.makedirs(directory, exist_ok=True)
+        prom = os.path.join(directory, 'metrics.prom')
+        with open(prom + '.tmp', 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(prom + '.tmp', prom)
+
+        run_name = run_name or time.strftime('%Y%m%dT%H%M%S', time.gmtime(self.started))
+        path = os.path.join(directory, f"run-{run_name}.json")
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serve the Prometheus text on http://host:port/metrics from a daemon thread.
+
+        :return: The HTTP server (call shutdown() to stop it)
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+METRICS = Metrics()
+
+def _endpoint(url, body):
+    path = urlparse(url).path.rstrip('/').rsplit('/', 1)[-1] or '/'
+    # Hyperliquid multiplexes everything through POST /info on the body 'type'
+    if path == 'info' and body:
+        try:
+            return f"info:{json.loads(body).get('type')}"
+        except (ValueError, AttributeError):
+            pass
+    return path
+
+def attach_metrics(exchange, name, metrics=METRICS):
+    """
+    Time every HTTP request a ccxt exchange makes (sync or async_support)
+    and record it under `name` and the request endpoint.
+    """
+    original_fetch = exchange.fetch
+
+    if asyncio.iscoroutinefunction(original_fetch):
+        async def fetch(url, method='GET', headers=None, body=None):
+            started, status = time.perf_counter(), 'ok'
+            try:
+                return await original_fetch(url, method, headers, body)
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                metrics.observe_request(name, _endpoint(url, body), time.perf_counter() - started, status)
+    else:
+        def fetch(url, method='GET', headers=None, body=None):
+            started, status = time.perf_counter(), 'ok'
+            try:
+                return original_fetch(url, method, headers, body)
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                metrics.observe_request(name, _endpoint(url, body), time.perf_counter() - started, status)
+
+    exchange.fetch = fetch
+    return metrics
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler: a daemon thread records the innermost
+    frame of every other thread each `interval` seconds.
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        import sys
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    code = frame.f_code
+                    self.samples[f"{code.co_filename}:{frame.f_lineno} {code.co_name}"] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path, top=50):
+        total = sum(self.samples.values()) or 1
+        with open(path, 'w') as f:
+            for location, n in self.samples.most_common(top):
+                f.write(f"{100.0 * n / total:6.2f}% {n:8d}  {location}\n")
+
+@contextlib.contextmanager
+def profiled(path=None, mode='cprofile', interval=0.01):
+    """
+    Optionally profile a block. With mode='cprofile' the stats are dumped to
+    `path` (open with pstats / snakeviz); mode='sample' writes the hottest
+    sampled lines as text. A None path disables profiling.
+    """
+    if path is None:
+        yield
+        return
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if mode == 'sample':
+        sampler = StackSampler(interval)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            sampler.dump(path)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
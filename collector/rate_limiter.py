@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import fcntl
+import asyncio
+import threading
+from .metrics import METRICS
+
+# Request budget per minute and API family, in ccxt cost units (ccxt costs
+# mirror the exchange request weights, e.g. a 1000-candle Binance kline page
+# costs 5). Binance meters its spot and USD-M futures REST APIs separately.
+DEFAULT_BUDGETS = {
+    'binance_fapi': 2400, # fapi (USD-M futures): 2400 weight / minute / IP
+    'binance_api': 6000,  # api (spot): 6000 weight / minute / IP
+    'hyperliquid': 1200,  # 1200 weight / minute / IP
+}
+
+# Headers reporting weight already used in the current window of the API
+# family that answered
+USED_WEIGHT_HEADERS = ('x-mbx-used-weight-1m',)
+
+def api_family(exchange_id, url=None, default_type=None):
+    """
+    Rate-limit bucket key for a request.
+
+    :param exchange_id: ccxt exchange id
+    :param url: Request URL, when known (responses)
+    :param default_type: ccxt defaultType option of the instance, used without a URL
+    :return: 'binance_fapi' / 'binance_api' for Binance, else the exchange id
+    """
+    if exchange_id != 'binance':
+        return exchange_id
+    if url is not None:
+        return 'binance_fapi' if '/fapi/' in url else 'binance_api'
+    return 'binance_fapi' if default_type in ('future', 'swap') else 'binance_api'
+
+DEFAULT_PENALTY_SECONDS = {
+    429: 60,   # Too Many Requests: back off for the rest of the window
+    418: 300,  # Binance IP ban after ignoring 429s
+}
+
+class MemoryBackend:
+    """
+    Bucket state shared by every collector and thread of this process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = {}
+
+    def update(self, fn):
+        with self._lock:
+            return fn(self.state)
+
+class FileBackend:
+    """
+    Bucket state kept in a small JSON file guarded by an exclusive flock, so
+    several collection processes on one host draw from the same budget.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def update(self, fn):
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw else {}
+                result = fn(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+class TokenBucket:
+    """
+    Weight-aware token bucket. Callers reserve `weight` tokens and are told
+    how long to wait; the bucket may go into debt so concurrent callers are
+    queued fairly instead of spinning.
+    """
+    def __init__(self, budget_per_minute, burst_seconds=10, backend=None, name=None):
+        """
+        :param budget_per_minute: Sustained budget in ccxt cost units per minute
+        :param burst_seconds: Bucket capacity expressed in seconds of budget
+        :param backend: MemoryBackend (default) or FileBackend for cross-process sharing
+        :param name: API family (see api_family) used in metrics
+        """
+        self.name = name
+        self.budget_per_minute = budget_per_minute
+        self.rate = budget_per_minute / 60.0
+        self.capacity = self.rate * burst_seconds
+        self.backend = backend or MemoryBackend()
+        self.stats = {'requests': 0, 'weight': 0.0, 'waits': 0, 'wait_seconds': 0.0, 'penalties': 0}
+
+    def _refill(self, state, now):
+        if not state:
+            state.update(tokens=self.capacity, stamp=now, blocked_until=0.0)
+        elapsed = max(0.0, now - state['stamp'])
+        state['tokens'] = min(self.capacity, state['tokens'] + elapsed * self.rate)
+        state['stamp'] = now
+
+    def reserve(self, weight=1):
+        """
+        Take `weight` tokens.
+
+        :return: Seconds the caller must wait before sending the request
+        """
+        def take(state):
+            now = time.time()
+            self._refill(state, now)
+            state['tokens'] -= weight
+            wait = max(0.0, state['blocked_until'] - now)
+            if state['tokens'] < 0:
+                wait = max(wait, -state['tokens'] / self.rate)
+            return wait
+
+        wait = self.backend.update(take)
+        self.stats['requests'] += 1
+        self.stats['weight'] += weight
+        if wait > 0:
+            self.stats['waits'] += 1
+            self.stats['wait_seconds'] += wait
+        return wait
+
+    def acquire(self, weight=1):
+        wait = self.reserve(weight)
+        if wait > 0:
+            with METRICS.timed('sleep'):
+                time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, weight=1):
+        wait = self.reserve(weight)
+        if wait > 0:
+            with METRICS.timed('sleep'):
+                await asyncio.sleep(wait)
+        return wait
+
+    def observe_used_weight(self, used, limit):
+        """
+        Sync with the exchange's own accounting: never believe we have more
+        tokens than the fraction of the window budget the server says is left.
+        """
+        def clamp(state):
+            self._refill(state, time.time())
+            remaining = max(0.0, 1.0 - used / float(limit)) * self.capacity
+            state['tokens'] = min(state['tokens'], remaining)
+        self.backend.update(clamp)
+
+    def penalize(self, seconds):
+        """
+        Stop all callers for `seconds` (429 / 418 / Retry-After) and drain the bucket.
+        """
+        def block(state):
+            now = time.time()
+            self._refill(state, now)
+            state['tokens'] = min(state['tokens'], 0.0)
+            state['blocked_until'] = max(state['blocked_until'], now + seconds)
+        self.backend.update(block)
+        self.stats['penalties'] += 1
+
+    def handle_response(self, status, headers):
+        """
+        Adapt to a response: used-weight headers and 429/418 status codes.
+        """
+        if not headers:
+            headers = {}
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+        if status in DEFAULT_PENALTY_SECONDS:
+            METRICS.record_rate_limited(self.name, status)
+            retry_after = lowered.get('retry-after')
+            try:
+                seconds = float(retry_after)
+            except (TypeError, ValueError):
+                seconds = DEFAULT_PENALTY_SECONDS[status]
+            self.penalize(seconds)
+            return
+        for header in USED_WEIGHT_HEADERS:
+            if header in lowered:
+                try:
+                    used = float(lowered[header])
+                except (TypeError, ValueError):
+                    continue
+                self.observe_used_weight(used, self.budget_per_minute)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def get_limiter(family, budget_per_minute=None, state_path=None):
+    """
+    Process-wide limiter for one API family. Every collector using that API
+    (sync, async, windowed workers) shares the returned bucket.
+
+    :param family: Bucket key from api_family ('binance_fapi', 'binance_api', 'hyperliquid')
+    :param budget_per_minute: Override the default budget
+    :param state_path: Share the bucket across processes through this file.
+                       Defaults to $FUNDING_ARB_RATE_LIMIT_DIR/<family>.json when that is set.
+    """
+    with _registry_lock:
+        if family not in _registry:
+            budget = budget_per_minute or DEFAULT_BUDGETS.get(family, 1200)
+            if state_path is None and os.environ.get('FUNDING_ARB_RATE_LIMIT_DIR'):
+                state_path = os.path.join(os.environ['FUNDING_ARB_RATE_LIMIT_DIR'], f"{family}.json")
+            backend = FileBackend(state_path) if state_path else None
+            _registry[family] = TokenBucket(budget, backend=backend, name=family)
+        return _registry[family]
+
+def attach_rate_limiter(exchange, limiter=None):
+    """
+    Route a ccxt exchange's throttling through a shared TokenBucket and feed
+    every REST response back into it. Works for sync and async_support
+    instances: ccxt calls `throttle(cost)` before each request and
+    `on_rest_response(...)` after it.
+
+    Requests are paced by the bucket of the instance's API family. Responses
+    are fed to the bucket of the API that answered, so e.g. the spot
+    exchangeInfo a futures instance loads with its markets does not clamp
+    the futures budget.
+
+    :param limiter: Use this bucket for everything instead of the shared family buckets
+    :return: The limiter in use
+    """
+    options = getattr(exchange, 'options', None) or {}
+    family = api_family(exchange.id, default_type=options.get('defaultType'))
+    routed = limiter is None
+    limiter = limiter or get_limiter(family)
+    original_on_rest_response = exchange.on_rest_response
+
+    def on_rest_response(code, reason, url, method, response_headers, response_body, request_headers, request_body):
+        target = limiter
+        if routed and api_family(exchange.id, url) != family:
+            target = get_limiter(api_family(exchange.id, url))
+        target.handle_response(code, response_headers)
+        return original_on_rest_response(code, reason, url, method, response_headers, response_body,
+                                         request_headers, request_body)
+
+    if asyncio.iscoroutinefunction(exchange.throttle):
+        async def throttle(cost=None):
+            await limiter.acquire_async(1 if cost is None else cost)
+    else:
+        def throttle(cost=None):
+            limiter.acquire(1 if cost is None else cost)
+
+    exchange.throttle = throttle
+    exchange.on_rest_response = on_rest_response
+    exchange.rate_limiter = limiter
+    return limiter
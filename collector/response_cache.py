@@ -0,0 +1,212 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+import asyncio
+
+MODES = ('record', 'replay')
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+class ResponseCache:
+    """
+    Compressed on-disk store of exchange responses keyed on
+    (exchange, method, symbol, since, limit, timeframe).
+
+    In 'record' mode the cache is read-through: hits are served from disk,
+    misses go to the exchange and closed pages are stored. In 'replay' mode
+    the exchange is never contacted and a miss raises CacheMiss.
+
+    Only pages that can no longer change are stored: a page whose last row
+    is older than the settle horizon (one more candle, or a day of funding)
+    cannot grow, so re-requesting it would return the same rows. The open
+    head of a series is always re-requested.
+    """
+    def __init__(self, path, max_bytes=2 * 1024 ** 3, mode='record'):
+        """
+        :param path: Cache directory
+        :param max_bytes: Size budget; least recently used entries are evicted beyond it
+        :param mode: 'record' or 'replay'
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._size = sum(os.path.getsize(f) for f in self._files())
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a cache from FUNDING_ARB_CACHE_DIR / FUNDING_ARB_CACHE_MODE /
+        FUNDING_ARB_CACHE_MAX_MB, or return None when no directory is set.
+        """
+        path = os.environ.get('FUNDING_ARB_CACHE_DIR')
+        if not path:
+            return None
+        max_mb = float(os.environ.get('FUNDING_ARB_CACHE_MAX_MB', 2048))
+        return cls(path, max_bytes=int(max_mb * 1024 ** 2),
+                   mode=os.environ.get('FUNDING_ARB_CACHE_MODE', 'record'))
+
+    def _files(self):
+        for root, _, names in os.walk(self.path):
+            for name in names:
+                if name.endswith('.json.gz'):
+                    yield os.path.join(root, name)
+
+    @staticmethod
+    def make_key(exchange_id, method, symbol=None, since=None, limit=None, timeframe=None):
+        raw = json.dumps([exchange_id, method, symbol, since, limit, timeframe])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + '.json.gz')
+
+    def get(self, key):
+        """
+        :return: Stored response, or None on a miss
+        """
+        path = self._file(key)
+        try:
+            with gzip.open(path, 'rt') as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            self.stats['misses'] += 1
+            return None
+        os.utime(path)  # mtime doubles as the LRU clock
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, key, value):
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, 'wt') as f:
+            json.dump(value, f)
+        size = os.path.getsize(tmp)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += size - old
+            self.stats['stores'] += 1
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until we are 10% under budget
+        target = self.max_bytes * 0.9
+        entries = sorted((os.path.getmtime(f), os.path.getsize(f), f) for f in self._files())
+        for _, size, f in entries:
+            if self._size <= target:
+                break
+            os.remove(f)
+            self._size -= size
+            self.stats['evictions'] += 1
+
+    def size_bytes(self):
+        return self._size
+
+    def wrap(self, exchange):
+        """
+        Put this cache in front of a ccxt exchange (sync or async_support).
+        """
+        if asyncio.iscoroutinefunction(exchange.fetch_ohlcv):
+            return AsyncCachedExchange(exchange, self)
+        return CachedExchange(exchange, self)
+
+FUNDING_SETTLE_MS = 24 * 60 * 60 * 1000
+
+def _is_closed_page(rows, last_ts, horizon_ms):
+    if not rows:
+        return False
+    return last_ts + horizon_ms <= time.time() * 1000
+
+class CachedExchange:
+    """
+    Proxy over a ccxt exchange that serves fetch_ohlcv, fetch_funding_rate_history
+    and load_markets through a ResponseCache. Everything else is forwarded.
+    """
+    def __init__(self, exchange, cache):
+        self._exchange = exchange
+        self._cache = cache
+        # Spot and futures Binance instances share the 'binance' id but not their data
+        options = getattr(exchange, 'options', None) or {}
+        self._namespace = f"{exchange.id}:{options.get('defaultType', '')}"
+
+    def __getattr__(self, name):
+        return getattr(self._exchange, name)
+
+    def _lookup(self, key):
+        value = self._cache.get(key)
+        if value is None and self._cache.mode == 'replay':
+            raise CacheMiss(key)
+        return value
+
+    def load_markets(self, *args, **kwargs):
+        key = self._cache.make_key(self._namespace, 'load_markets')
+        if self._cache.mode == 'replay':
+            return self._lookup(key)
+        # Market metadata changes, so record mode always refreshes it
+        markets = self._exchange.load_markets(*args, **kwargs)
+        self._cache.put(key, markets)
+        return markets
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        key = self._cache.make_key(self._namespace, 'fetch_ohlcv', symbol, since, limit, timeframe)
+        rows = self._lookup(key)
+        if rows is None:
+            rows = self._exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params)
+            duration_ms = self._exchange.parse_timeframe(timeframe) * 1000
+            if _is_closed_page(rows, rows[-1][0] if rows else 0, 2 * duration_ms):
+                self._cache.put(key, rows)
+        return rows
+
+    def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        key = self._cache.make_key(self._namespace, 'fetch_funding_rate_history', symbol, since, limit)
+        rates = self._lookup(key)
+        if rates is None:
+            rates = self._exchange.fetch_funding_rate_history(symbol, since=since, limit=limit, params=params)
+            if _is_closed_page(rates, rates[-1]['timestamp'] if rates else 0, FUNDING_SETTLE_MS):
+                self._cache.put(key, rates)
+        return rates
+
+class AsyncCachedExchange(CachedExchange):
+    """
+    CachedExchange for ccxt.async_support instances. Disk access stays
+    synchronous: entries are small and reads are served from the page cache.
+    """
+    async def load_markets(self, *args, **kwargs):
+        key = self._cache.make_key(self._namespace, 'load_markets')
+        if self._cache.mode == 'replay':
+            return self._lookup(key)
+        markets = await self._exchange.load_markets(*args, **kwargs)
+        self._cache.put(key, markets)
+        return markets
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params={}):
+        key = self._cache.make_key(self._namespace, 'fetch_ohlcv', symbol, since, limit, timeframe)
+        rows = self._lookup(key)
+        if rows is None:
+            rows = await self._exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit, params=params)
+            duration_ms = self._exchange.parse_timeframe(timeframe) * 1000
+            if _is_closed_page(rows, rows[-1][0] if rows else 0, 2 * duration_ms):
+                self._cache.put(key, rows)
+        return rows
+
+    async def fetch_funding_rate_history(self, symbol=None, since=None, limit=None, params={}):
+        key = self._cache.make_key(self._namespace, 'fetch_funding_rate_history', symbol, since, limit)
+        rates = self._lookup(key)
+        if rates is None:
+            rates = await self._exchange.fetch_funding_rate_history(symbol, since=since, limit=limit, params=params)
+            if _is_closed_page(rates, rates[-1]['timestamp'] if rates else 0, FUNDING_SETTLE_MS):
+                self._cache.put(key, rates)
+        return rates
+
+    async def close(self):
+        await self._exchange.close()
@@ -0,0 +1,341 @@
+import time
+import numpy as np
+import pandas as pd
+
+CHECKPOINT_DDL = """
+    CREATE TABLE IF NOT EXISTS rolling_checkpoints (
+        name VARCHAR NOT NULL,
+        window_size INTEGER,
+        alpha DOUBLE,
+        saved_at BIGINT,
+        PRIMARY KEY (name)
+    )
+"""
+
+STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS rolling_state (
+        name VARCHAR NOT NULL,
+        key VARCHAR NOT NULL,
+        count BIGINT,
+        last_ts BIGINT,
+        last DOUBLE,
+        mean DOUBLE,
+        m2 DOUBLE,
+        ewma DOUBLE,
+        ewvar DOUBLE,
+        ring DOUBLE[],
+        min_values DOUBLE[],
+        min_seqs BIGINT[],
+        max_values DOUBLE[],
+        max_seqs BIGINT[],
+        PRIMARY KEY (name, key)
+    )
+"""
+
+def halflife_alpha(halflife):
+    """
+    EWMA smoothing factor whose weights halve every `halflife` observations.
+    """
+    return 1.0 - np.exp(np.log(0.5) / halflife)
+
+class _MonotonicDeques:
+    """
+    One monotonic (non-decreasing) deque per row, each stored as a ring of
+    `window` slots, so the front is the minimum of the last `window` pushes.
+    Pushing is amortized O(1) per row and vectorized across rows.
+    """
+    def __init__(self, capacity, window):
+        self.window = window
+        self.values = np.zeros((capacity, window))
+        self.seqs = np.zeros((capacity, window), dtype=np.int64)
+        self.head = np.zeros(capacity, dtype=np.int64)
+        self.size = np.zeros(capacity, dtype=np.int64)
+
+    def grow(self, capacity):
+        extra = capacity - len(self.head)
+        self.values = np.vstack([self.values, np.zeros((extra, self.window))])
+        self.seqs = np.vstack([self.seqs, np.zeros((extra, self.window), dtype=np.int64)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.int64)])
+        self.size = np.concatenate([self.size, np.zeros(extra, dtype=np.int64)])
+
+    def push(self, rows, values, seqs):
+        # At most one entry leaves the window per push
+        expired = (self.size[rows] > 0) & (self.seqs[rows, self.head[rows]] <= seqs - self.window)
+        self.head[rows[expired]] = (self.head[rows[expired]] + 1) % self.window
+        self.size[rows[expired]] -= 1
+
+        # Drop entries the new value dominates; each entry is popped at most once
+        active = np.ones(len(rows), dtype=bool)
+        while True:
+            back = (self.head[rows] + self.size[rows] - 1) % self.window
+            pop = active & (self.size[rows] > 0) & (self.values[rows, back] >= values)
+            if not pop.any():
+                break
+            self.size[rows[pop]] -= 1
+            active = pop
+
+        back = (self.head[rows] + self.size[rows]) % self.window
+        self.values[rows, back] = values
+        self.seqs[rows, back] = seqs
+        self.size[rows] += 1
+
+    def front(self, rows):
+        return np.where(self.size[rows] > 0, self.values[rows, self.head[rows]], np.nan)
+
+    def ordered(self, row):
+        slots = (self.head[row] + np.arange(self.size[row])) % self.window
+        return self.values[row, slots], self.seqs[row, slots]
+
+    def restore(self, row, values, seqs):
+        self.head[row] = 0
+        self.size[row] = len(values)
+        self.values[row, :len(values)] = values
+        self.seqs[row, :len(seqs)] = seqs
+
+class RollingStats:
+    """
+    Incremental rolling statistics for many series at once, with one row of
+    array-backed state per key (e.g. 'binance_futures:BTC/USDT:USDT' or an
+    asset of an exchange pair).
+
+    Every observation updates its key in O(1), independent of history length:
+      - rolling mean / variance over the last `window` observations, by a
+        windowed Welford update that adds the new value and evicts the one
+        leaving the ring buffer
+      - EWMA and exponentially weighted variance (`halflife` observations)
+      - rolling min / max via monotonic deques
+    Updates are vectorized across keys, so feeding one new row for every
+    ticker of the universe is a handful of numpy operations.
+
+    Observations at or before a key's last timestamp are ignored, so
+    re-delivered rows (overlapping pages, restarts) are not counted twice.
+    save() / load() checkpoint the state in DuckDB so restarts resume without
+    replaying history.
+    """
+    def __init__(self, window, halflife=None, capacity=64):
+        """
+        :param window: Observations in the rolling window
+        :param halflife: EWMA half-life in observations (default: window / 2)
+        :param capacity: Initial number of keys; grows by doubling
+        """
+        self.window = int(window)
+        self.alpha = halflife_alpha(halflife or max(self.window / 2, 1))
+        self.keys = []
+        self._index = {}
+        self._ring = np.full((capacity, self.window), np.nan)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._last_ts = np.full(capacity, np.iinfo(np.int64).min, dtype=np.int64)
+        self._last = np.full(capacity, np.nan)
+        self._mean = np.zeros(capacity)
+        self._m2 = np.zeros(capacity)
+        self._ewma = np.full(capacity, np.nan)
+        self._ewvar = np.zeros(capacity)
+        self._min = _MonotonicDeques(capacity, self.window)
+        self._max = _MonotonicDeques(capacity, self.window)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _grow(self, capacity):
+        extra = capacity - len(self._count)
+        self._ring = np.vstack([self._ring, np.full((extra, self.window), np.nan)])
+        self._count = np.concatenate([self._count, np.zeros(extra, dtype=np.int64)])
+        self._last_ts = np.concatenate([self._last_ts, np.full(extra, np.iinfo(np.int64).min, dtype=np.int64)])
+        self._last = np.concatenate([self._last, np.full(extra, np.nan)])
+        self._mean = np.concatenate([self._mean, np.zeros(extra)])
+        self._m2 = np.concatenate([self._m2, np.zeros(extra)])
+        self._ewma = np.concatenate([self._ewma, np.full(extra, np.nan)])
+        self._ewvar = np.concatenate([self._ewvar, np.zeros(extra)])
+        self._min.grow(capacity)
+        self._max.grow(capacity)
+
+    def _rows(self, keys):
+        rows = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            row = self._index.get(key)
+            if row is None:
+                row = self._index[key] = len(self.keys)
+                self.keys.append(key)
+                if row >= len(self._count):
+                    self._grow(max(2 * len(self._count), row + 1))
+            rows[i] = row
+        return rows
+
+    def update(self, keys, values, timestamps=None):
+        """
+        Add one observation per key.
+
+        :param keys: Sequence of keys; a key repeated in one call is applied in order
+        :param values: Observations (NaNs are skipped)
+        :param timestamps: Optional ms timestamps; observations not newer than
+                           the key's last one are skipped
+        :return: Number of observations applied
+        """
+        rows = self._rows(list(keys))
+        values = np.asarray(values, dtype=np.float64)
+        if timestamps is None:
+            timestamps = np.full(len(rows), np.iinfo(np.int64).min, dtype=np.int64)
+        else:
+            timestamps = np.asarray(timestamps, dtype=np.int64)
+        valid = ~np.isnan(values)
+        rows, values, timestamps = rows[valid], values[valid], timestamps[valid]
+        if len(rows) == 0:
+            return 0
+        # Occurrence number of each row, so every round updates distinct keys
+        rounds = pd.Series(rows).groupby(rows).cumcount().to_numpy()
+        # Group the batch by round once; each round is then a contiguous slice
+        order = np.argsort(rounds, kind='stable')
+        rows, values, timestamps = rows[order], values[order], timestamps[order]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(rounds))])
+        applied = 0
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            applied += self._apply(rows[lo:hi], values[lo:hi], timestamps[lo:hi])
+        return applied
+
+    def _apply(self, rows, x, ts):
+        fresh = (ts > self._last_ts[rows]) | (ts == np.iinfo(np.int64).min)
+        rows, x, ts = rows[fresh], x[fresh], ts[fresh]
+        if len(rows) == 0:
+            return 0
+
+        count = self._count[rows]
+        slot = count % self.window
+        full = count >= self.window
+        old = self._ring[rows, slot]
+        self._ring[rows, slot] = x
+
+        # Windowed Welford: grow while filling, then slide (add x, evict old)
+        mean = self._mean[rows]
+        n = np.minimum(count + 1, self.window)
+        new_mean = np.where(full, mean + (x - np.where(full, old, 0.0)) / self.window, mean + (x - mean) / n)
+        m2 = np.where(full,
+                      self._m2[rows] + (x - old) * (x - new_mean + old - mean),
+                      self._m2[rows] + (x - mean) * (x - new_mean))
+        self._mean[rows] = new_mean
+        self._m2[rows] = np.maximum(np.nan_to_num(m2), 0.0)
+
+        ewma = self._ewma[rows]
+        first = np.isnan(ewma)
+        diff = np.where(first, 0.0, x - ewma)
+        increment = self.alpha * diff
+        self._ewma[rows] = np.where(first, x, ewma + increment)
+        self._ewvar[rows] = np.where(first, 0.0, (1 - self.alpha) * (self._ewvar[rows] + diff * increment))
+
+        self._min.push(rows, x, count)
+        self._max.push(rows, -x, count)
+        self._count[rows] = count + 1
+        self._last[rows] = x
+        self._last_ts[rows] = ts
+        return len(rows)
+
+    def update_frame(self, df, key_columns, value_column, timestamp_column='timestamp'):
+        """
+        Feed a batch of rows (e.g. a collector funding chunk) in timestamp order.
+
+        :param df: DataFrame holding key, value and timestamp columns
+        :param key_columns: Column (or list of columns) forming the key, joined with ':'
+        :param value_column: Column holding the observation
+        :return: Number of observations applied
+        """
+        if df is None or df.empty:
+            return 0
+        df = df.sort_values(timestamp_column, kind='stable')
+        if isinstance(key_columns, str):
+            keys = df[key_columns].astype(str)
+        else:
+            keys = df[key_columns[0]].astype(str)
+            for column in key_columns[1:]:
+                keys = keys + ':' + df[column].astype(str)
+        return self.update(keys.tolist(), df[value_column].to_numpy(), df[timestamp_column].to_numpy())
+
+    def snapshot(self):
+        """
+        Current statistics of every key.
+
+        :return: DataFrame indexed by key with n, last, last_ts, mean, std,
+                 zscore, ewma, ew_std, min and max
+        """
+        k = len(self.keys)
+        n = np.minimum(self._count[:k], self.window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.where(n > 1, np.sqrt(self._m2[:k] / (n - 1)), np.nan)
+            zscore = np.where(std > 0, (self._last[:k] - self._mean[:k]) / std, np.nan)
+        rows = np.arange(k)
+        return pd.DataFrame({
+            'n': n,
+            'last': self._last[:k],
+            'last_ts': np.where(self._count[:k] > 0, self._last_ts[:k], -1),
+            'mean': np.where(n > 0, self._mean[:k], np.nan),
+            'std': std,
+            'zscore': zscore,
+            'ewma': self._ewma[:k],
+            'ew_std': np.sqrt(self._ewvar[:k]),
+            'min': self._min.front(rows),
+            'max': -self._max.front(rows),
+        }, index=pd.Index(self.keys, name='key'))
+
+    def save(self, con, name):
+        """
+        Checkpoint the full state in DuckDB (replacing the previous checkpoint of `name`).
+        """
+        k = len(self.keys)
+        records = []
+        for row in range(k):
+            min_values, min_seqs = self._min.ordered(row)
+            max_values, max_seqs = self._max.ordered(row)
+            records.append((name, self.keys[row], int(self._count[row]), int(self._last_ts[row]),
+                            self._last[row], self._mean[row], self._m2[row], self._ewma[row], self._ewvar[row],
+                            self._ring[row].tolist(), min_values.tolist(), min_seqs.tolist(),
+                            max_values.tolist(), max_seqs.tolist()))
+        state = pd.DataFrame(records, columns=['name', 'key', 'count', 'last_ts', 'last', 'mean', 'm2', 'ewma',
+                                               'ewvar', 'ring', 'min_values', 'min_seqs', 'max_values', 'max_seqs'])
+        con.execute(CHECKPOINT_DDL)
+        con.execute(STATE_DDL)
+        con.begin()
+        try:
+            con.execute("DELETE FROM rolling_state WHERE name = ?", [name])
+            if k:
+                con.register('_rolling_state', state)
+                con.execute("INSERT INTO rolling_state SELECT * FROM _rolling_state")
+                con.unregister('_rolling_state')
+            con.execute("INSERT OR REPLACE INTO rolling_checkpoints VALUES (?, ?, ?, ?)",
+                        [name, self.window, float(self.alpha), int(time.time() * 1000)])
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+    @classmethod
+    def load(cls, con, name):
+        """
+        Restore a checkpoint written by save().
+
+        :return: RollingStats, or None if `name` was never checkpointed
+        """
+        con.execute(CHECKPOINT_DDL)
+        con.execute(STATE_DDL)
+        meta = con.execute("SELECT window_size, alpha FROM rolling_checkpoints WHERE name = ?", [name]).fetchone()
+        if meta is None:
+            return None
+        stats = cls(meta[0])
+        stats.alpha = meta[1]
+        state = con.execute("""
+            SELECT key, count, last_ts, last, mean, m2, ewma, ewvar, ring, min_values, min_seqs, max_values, max_seqs
+            FROM rolling_state WHERE name = ? ORDER BY key
+        """, [name]).fetchall()
+        rows = stats._rows([record[0] for record in state])
+        as_array = lambda values: np.array(values, dtype=np.float64)
+        for row, record in zip(rows, state):
+            (_, count, last_ts, last, mean, m2, ewma, ewvar,
+             ring, min_values, min_seqs, max_values, max_seqs) = record
+            stats._count[row] = count
+            stats._last_ts[row] = last_ts
+            stats._last[row] = np.nan if last is None else last
+            stats._mean[row] = mean
+            stats._m2[row] = m2
+            stats._ewma[row] = np.nan if ewma is None else ewma
+            stats._ewvar[row] = ewvar
+            stats._ring[row] = as_array(ring)
+            stats._min.restore(row, as_array(min_values), np.array(min_seqs, dtype=np.int64))
+            stats._max.restore(row, as_array(max_values), np.array(max_seqs, dtype=np.int64))
+        return stats
@@ -0,0 +1,94 @@
+import time
+import numpy as np
+import pandas as pd
+from .symbols import base_asset, symbol_rank
+
+HOURS_PER_YEAR = 24 * 365
+
+class FundingScanner:
+    """
+    Ranks the cross-exchange funding spread of every asset listed on both
+    exchanges, from one bulk funding request per exchange.
+    """
+    def __init__(self, collector_a, collector_b):
+        """
+        :param collector_a: First leg collector (e.g. BinanceFuturesCollector)
+        :param collector_b: Second leg collector (e.g. HyperliquidCollector)
+        """
+        self.collector_a = collector_a
+        self.collector_b = collector_b
+
+    @staticmethod
+    def _by_asset(snapshot):
+        # One row per base asset: perps first, USDT before USDC
+        snapshot = snapshot.dropna(subset=['funding_rate'])
+        ranks = [symbol_rank(t) for t in snapshot['ticker']]
+        snapshot = snapshot.iloc[sorted(range(len(ranks)), key=ranks.__getitem__)]
+        assets = [base_asset(t)[0] for t in snapshot['ticker']]
+        return snapshot.assign(asset=assets).drop_duplicates('asset').set_index('asset')
+
+    @classmethod
+    def rank(cls, snapshot_a, snapshot_b, name_a='a', name_b='b'):
+        """
+        Match two funding snapshots on base asset and rank by annualized spread.
+
+        :param snapshot_a: Output of fetch_current_funding for leg a
+        :param snapshot_b: Output of fetch_current_funding for leg b
+        :return: DataFrame indexed by asset, sorted by abs_annualized_spread descending.
+                 spread is rate_b - rate_a per hour; positive means long a / short b earns it.
+        """
+        a = cls._by_asset(snapshot_a)
+        b = cls._by_asset(snapshot_b)
+        df = a.join(b, how='inner', lsuffix='_a', rsuffix='_b')
+
+        hourly_a = df['funding_rate_a'].to_numpy() / df['interval_hours_a'].to_numpy()
+        hourly_b = df['funding_rate_b'].to_numpy() / df['interval_hours_b'].to_numpy()
+        spread = hourly_b - hourly_a
+        # Per-unit prices, so 1000PEPE vs kPEPE style contracts compare directly
+        mark_a = df['mark_price_a'].to_numpy() / np.array([base_asset(t)[1] for t in df['ticker_a']])
+        mark_b = df['mark_price_b'].to_numpy() / np.array([base_asset(t)[1] for t in df['ticker_b']])
+
+        out = pd.DataFrame({
+            f'ticker_{name_a}': df['ticker_a'].to_numpy(),
+            f'ticker_{name_b}': df['ticker_b'].to_numpy(),
+            f'hourly_rate_{name_a}': hourly_a,
+            f'hourly_rate_{name_b}': hourly_b,
+            'spread': spread,
+            'annualized_spread': spread * HOURS_PER_YEAR,
+            'abs_annualized_spread': np.abs(spread) * HOURS_PER_YEAR,
+            'direction': np.where(spread >= 0, f'long {name_a} / short {name_b}', f'long {name_b} / short {name_a}'),
+            'mark_divergence': mark_b / mark_a - 1.0,
+            f'next_funding_{name_a}': df['next_funding_ts_a'].to_numpy(),
+            f'next_funding_{name_b}': df['next_funding_ts_b'].to_numpy(),
+        }, index=df.index)
+        return out.sort_values('abs_annualized_spread', ascending=False)
+
+    def scan(self):
+        """
+        Fetch both snapshots (one request each) and rank them.
+        """
+        return self.rank(self.collector_a.fetch_current_funding(), self.collector_b.fetch_current_funding(),
+                         self.collector_a.exchange_name, self.collector_b.exchange_name)
+
+    def run(self, every=60, iterations=None, on_result=None):
+        """
+        Scan on a fixed schedule. Ticks are anchored to the start time, so a
+        slow scan does not push later ones back.
+
+        :param every: Seconds between scans
+        :param iterations: Number of scans (default: forever)
+        :param on_result: Callable receiving each ranked DataFrame
+        """
+        started = time.monotonic()
+        n = 0
+        while iterations is None or n < iterations:
+            try:
+                ranked = self.scan()
+                if on_result is not None:
+                    on_result(ranked)
+            except Exception as e:
+                print(f"Scan failed: {e}")
+            n += 1
+            if iterations is not None and n >= iterations:
+                break
+            time.sleep(max(0.0, started + n * every - time.monotonic()))
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+from .metrics import METRICS
+
+OHLCV_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+def _categorical(value, n):
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[value])
+
+class FundingBuffer:
+    """
+    Growable column buffer for funding pages. Keeps only timestamp and rate
+    in preallocated NumPy arrays; the ccxt dicts are dropped as soon as the
+    page has been copied in.
+    """
+    def __init__(self, capacity=1000, rate_dtype=np.float64):
+        self.timestamp = np.empty(capacity, dtype=np.int64)
+        self.funding_rate = np.empty(capacity, dtype=rate_dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.timestamp):
+            return
+        capacity = max(needed, 2 * len(self.timestamp))
+        self.timestamp = np.resize(self.timestamp, capacity)
+        self.funding_rate = np.resize(self.funding_rate, capacity)
+
+    def extend(self, rates):
+        """
+        :param rates: List of ccxt funding rate dicts (one page)
+        """
+        with METRICS.timed('frame'):
+            n = len(rates)
+            self._reserve(n)
+            end = self.size + n
+            self.timestamp[self.size:end] = [r['timestamp'] for r in rates]
+            self.funding_rate[self.size:end] = [r['fundingRate'] for r in rates]
+            self.size = end
+
+    def to_frame(self, ticker, exchange, end_ts=None):
+        """
+        :return: DataFrame with int64 timestamp, float funding_rate and categorical ticker/exchange
+        """
+        ts = self.timestamp[:self.size]
+        rate = self.funding_rate[:self.size]
+        if end_ts is not None:
+            keep = ts <= end_ts
+            ts, rate = ts[keep], rate[keep]
+        n = len(ts)
+        return pd.DataFrame({
+            'timestamp': ts,
+            'funding_rate': rate,
+            'ticker': _categorical(ticker, n),
+            'exchange': _categorical(exchange, n),
+        })
+
+class OHLCVBuffer:
+    """
+    Growable column buffer for OHLCV pages: int64 timestamps plus one 2-D
+    float block for open/high/low/close/volume.
+    """
+    def __init__(self, capacity=1000, price_dtype=np.float64):
+        self.timestamp = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, len(OHLCV_FIELDS)), dtype=price_dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.timestamp):
+            return
+        capacity = max(needed, 2 * len(self.timestamp))
+        self.timestamp = np.resize(self.timestamp, capacity)
+        self.values = np.resize(self.values, (capacity, len(OHLCV_FIELDS)))
+
+    def extend(self, rows):
+        """
+        :param rows: List of ccxt [timestamp, open, high, low, close, volume] rows (one page)
+        """
+        if not rows:
+            return
+        with METRICS.timed('frame'):
+            block = np.asarray(rows, dtype=np.float64)
+            n = len(block)
+            self._reserve(n)
+            end = self.size + n
+            self.timestamp[self.size:end] = block[:, 0]
+            self.values[self.size:end] = block[:, 1:6]
+            self.size = end
+
+    def to_frame(self, ticker, exchange, end_ts=None):
+        """
+        :return: DataFrame with int64 timestamp, float OHLCV and categorical ticker/exchange
+        """
+        ts = self.timestamp[:self.size]
+        values = self.values[:self.size]
+        if end_ts is not None:
+            keep = ts <= end_ts
+            ts, values = ts[keep], values[keep]
+        n = len(ts)
+        df = pd.DataFrame(values, columns=OHLCV_FIELDS)
+        df.insert(0, 'timestamp', ts)
+        df['ticker'] = _categorical(ticker, n)
+        df['exchange'] = _categorical(exchange, n)
+        return df
+
+def funding_chunk(rates, ticker, exchange, end_ts=None):
+    """
+    Compact frame for a single page of funding rates (see FundingBuffer.to_frame).
+    """
+    buffer = FundingBuffer(capacity=max(len(rates), 1))
+    buffer.extend(rates)
+    return buffer.to_frame(ticker, exchange, end_ts)
+
+def ohlcv_chunk(rows, ticker, exchange, end_ts=None):
+    """
+    Compact frame for a single page of candles (see OHLCVBuffer.to_frame).
+    """
+    buffer = OHLCVBuffer(capacity=max(len(rows), 1))
+    buffer.extend(rows)
+    return buffer.to_frame(ticker, exchange, end_ts)
+
+SNAPSHOT_COLUMNS = ['ticker', 'funding_rate', 'interval_hours', 'mark_price', 'index_price', 'next_funding_ts']
+
+def _interval_hours(interval, default_hours):
+    if isinstance(interval, str) and interval.endswith('h'):
+        try:
+            return float(interval[:-1])
+        except ValueError:
+            pass
+    return default_hours
+
+def parse_funding_intervals(structures):
+    """
+    :param structures: ccxt fetch_funding_intervals() result (symbol -> structure)
+    :return: Dict symbol -> interval string for the symbols that report one
+    """
+    return {symbol: s['interval'] for symbol, s in structures.items() if s.get('interval')}
+
+def funding_snapshot_frame(rates, default_interval_ms, intervals=None):
+    """
+    Flatten a ccxt fetch_funding_rates() result (symbol -> funding rate structure)
+    into one typed row per symbol.
+
+    :param rates: Dict of ccxt funding rate structures
+    :param default_interval_ms: Funding interval to assume when the exchange does not report one
+    :param intervals: Optional dict symbol -> interval string ('4h') used when a
+                      rate structure carries no interval
+    """
+    default_hours = default_interval_ms / (60 * 60 * 1000)
+    intervals = intervals or {}
+    items = list(rates.values())
+    nan = float('nan')
+    df = pd.DataFrame({
+        'ticker': [r['symbol'] for r in items],
+        'funding_rate': np.array([r.get('fundingRate') if r.get('fundingRate') is not None else nan
+                                  for r in items], dtype=np.float64),
+        'interval_hours': np.array([_interval_hours(r.get('interval') or intervals.get(r['symbol']), default_hours)
+                                    for r in items],
+                                   dtype=np.float64),
+        'mark_price': np.array([r.get('markPrice') if r.get('markPrice') is not None else nan
+                                for r in items], dtype=np.float64),
+        'index_price': np.array([r.get('indexPrice') if r.get('indexPrice') is not None else nan
+                                 for r in items], dtype=np.float64),
+        'next_funding_ts': pd.array([r.get('fundingTimestamp') for r in items], dtype='Int64'),
+    }, columns=SNAPSHOT_COLUMNS)
+    return df
@@ -0,0 +1,54 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connections kept alive per host; covers the windowed thread-pool fetchers
+DEFAULT_POOL_SIZE = 32
+
+class SharedSession(requests.Session):
+    """
+    requests.Session lent to several ccxt exchange instances.
+
+    ccxt closes its session when an exchange is closed or garbage collected;
+    for a shared session that would drop every pooled connection under the
+    other collectors, so close() is a no-op and shutdown() really closes it.
+    """
+    def close(self):
+        pass
+
+    def shutdown(self):
+        requests.Session.close(self)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def shared_session(exchange_id, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Process-wide keep-alive HTTP session for one exchange. Every sync
+    collector of that exchange (e.g. Binance futures and spot) reuses its
+    connection pool, so TLS handshakes happen once per host rather than once
+    per collector.
+
+    The asyncio collectors keep ccxt's own aiohttp session, which is bound to
+    the event loop it was created on.
+
+    :param exchange_id: ccxt exchange id ('binance', 'hyperliquid')
+    :param pool_size: Pooled connections per host
+    """
+    with _sessions_lock:
+        session = _sessions.get(exchange_id)
+        if session is None:
+            session = _sessions[exchange_id] = SharedSession()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        return session
+
+def close_sessions():
+    """
+    Close every shared session (their connections are reopened on next use).
+    """
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.shutdown()
+        _sessions.clear()
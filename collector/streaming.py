@@ -0,0 +1,267 @@
+import time
+import json
+import asyncio
+import aiohttp
+import numpy as np
+import pandas as pd
+
+HOUR_MS = 60 * 60 * 1000
+
+TICK_FIELDS = ['timestamp', 'funding_rate', 'mark_price', 'index_price', 'next_funding_ts']
+
+TICKS_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_ticks (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        funding_rate DOUBLE,
+        mark_price DOUBLE,
+        index_price DOUBLE,
+        next_funding_ts BIGINT
+    )
+"""
+
+class TickRingBuffer:
+    """
+    Fixed-size ring of the most recent ticks for every (exchange, ticker),
+    stored in one preallocated (symbols x capacity x fields) float64 array so
+    a whole websocket message is written with a single scatter.
+    """
+    def __init__(self, capacity=1024, max_symbols=2048):
+        self.capacity = capacity
+        self.data = np.full((max_symbols, capacity, len(TICK_FIELDS)), np.nan)
+        self.count = np.zeros(max_symbols, dtype=np.int64)
+        self.keys = []
+        self._index = {}
+
+    def index_of(self, key):
+        idx = self._index.get(key)
+        if idx is None:
+            idx = len(self.keys)
+            if idx >= len(self.count):
+                grow = len(self.count)
+                self.data = np.concatenate([self.data, np.full_like(self.data[:grow], np.nan)])
+                self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+            self._index[key] = idx
+            self.keys.append(key)
+        return idx
+
+    def push_many(self, rows, values):
+        """
+        :param rows: Symbol indices (from index_of), unique within one call
+        :param values: (len(rows), len(TICK_FIELDS)) array
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        slots = self.count[rows] % self.capacity
+        self.data[rows, slots] = values
+        self.count[rows] += 1
+
+    def latest(self):
+        """
+        :return: DataFrame with the newest tick of every symbol
+        """
+        n = len(self.keys)
+        if n == 0:
+            return pd.DataFrame(columns=['exchange', 'ticker'] + TICK_FIELDS)
+        rows = np.arange(n)
+        last = self.data[rows, (self.count[:n] - 1) % self.capacity]
+        df = pd.DataFrame(last, columns=TICK_FIELDS)
+        df.insert(0, 'ticker', [k[1] for k in self.keys])
+        df.insert(0, 'exchange', [k[0] for k in self.keys])
+        return df
+
+    def history(self, key):
+        """
+        :return: DataFrame of the buffered ticks for one symbol, oldest first
+        """
+        idx = self._index[key]
+        n = min(self.count[idx], self.capacity)
+        start = self.count[idx] - n
+        order = (np.arange(start, start + n)) % self.capacity
+        return pd.DataFrame(self.data[idx, order], columns=TICK_FIELDS)
+
+class BinanceMarkPriceFeed:
+    """
+    Binance USD-M `!markPrice@arr@1s`: mark, index, predicted funding rate and
+    next funding time for every perpetual in one message per second.
+    """
+    exchange_name = 'binance_futures'
+    url = 'wss://fstream.binance.com/ws/!markPrice@arr@1s'
+
+    def __init__(self, url=None, symbol_map=None):
+        """
+        :param symbol_map: Optional exchange id -> ccxt symbol map (from load_markets);
+                           ids not in it are mapped as BTCUSDT -> BTC/USDT:USDT
+        """
+        self.url = url or self.url
+        self.symbol_map = symbol_map or {}
+
+    def subscriptions(self):
+        return []
+
+    def to_symbol(self, market_id):
+        symbol = self.symbol_map.get(market_id)
+        if symbol is None:
+            for quote in ('USDT', 'USDC'):
+                if market_id.endswith(quote):
+                    symbol = f"{market_id[:-len(quote)]}/{quote}:{quote}"
+                    break
+            else:
+                symbol = market_id
+            self.symbol_map[market_id] = symbol
+        return symbol
+
+    def parse(self, message):
+        """
+        :return: List of (ticker, [timestamp, funding_rate, mark_price, index_price, next_funding_ts])
+        """
+        events = message if isinstance(message, list) else [message]
+        return [
+            (self.to_symbol(e['s']),
+             [e['E'], float(e.get('r') or 'nan'), float(e['p']), float(e.get('i') or 'nan'), e.get('T') or np.nan])
+            for e in events if e.get('e') == 'markPriceUpdate'
+        ]
+
+class HyperliquidAssetCtxFeed:
+    """
+    Hyperliquid `activeAssetCtx` subscriptions: current funding, mark and
+    oracle price per coin. Funding settles hourly, so the next funding time
+    is the top of the next hour.
+    """
+    exchange_name = 'hyperliquid'
+    url = 'wss://api.hyperliquid.xyz/ws'
+
+    def __init__(self, coins, url=None):
+        """
+        :param coins: Hyperliquid coin names ('BTC', 'ETH', ...)
+        """
+        self.coins = list(coins)
+        self.url = url or self.url
+
+    def subscriptions(self):
+        return [{'method': 'subscribe', 'subscription': {'type': 'activeAssetCtx', 'coin': coin}}
+                for coin in self.coins]
+
+    def parse(self, message):
+        if not isinstance(message, dict) or message.get('channel') != 'activeAssetCtx':
+            return []
+        data = message['data']
+        ctx = data['ctx']
+        now = int(time.time() * 1000)
+        return [(f"{data['coin']}/USDC:USDC",
+                 [now, float(ctx['funding']), float(ctx['markPx']), float(ctx.get('oraclePx') or 'nan'),
+                  (now // HOUR_MS + 1) * HOUR_MS])]
+
+class StreamingCollector:
+    """
+    Keeps live funding / mark / index state for many symbols across feeds.
+
+    Each feed runs on its own websocket connection (reconnecting with
+    backoff); a message that fails to parse is logged, counted in
+    stats['parse_errors'] and skipped without dropping the connection. Parsed
+    ticks go into a shared TickRingBuffer and are appended to DuckDB in
+    micro-batches every `flush_interval` seconds.
+    """
+    def __init__(self, feeds, con=None, capacity=1024, flush_interval=1.0):
+        """
+        :param feeds: Feed adapters (BinanceMarkPriceFeed, HyperliquidAssetCtxFeed)
+        :param con: Optional duckdb connection; ticks are appended to `funding_ticks`
+        :param capacity: Ticks kept in memory per symbol
+        :param flush_interval: Seconds between DuckDB micro-batch flushes
+        """
+        self.feeds = feeds
+        self.con = con
+        self.flush_interval = flush_interval
+        self.buffer = TickRingBuffer(capacity)
+        self.stats = {'messages': 0, 'ticks': 0, 'reconnects': 0, 'flushed': 0, 'parse_errors': 0}
+        self._pending = []
+        if self.con is not None:
+            self.con.execute(TICKS_DDL)
+
+    def handle(self, feed, message):
+        ticks = feed.parse(message)
+        self.stats['messages'] += 1
+        if not ticks:
+            return
+        rows = [self.buffer.index_of((feed.exchange_name, ticker)) for ticker, _ in ticks]
+        values = np.array([v for _, v in ticks], dtype=np.float64)
+        self.buffer.push_many(rows, values)
+        self.stats['ticks'] += len(ticks)
+        if self.con is not None:
+            self._pending.append((feed.exchange_name, [t for t, _ in ticks], values))
+
+    def snapshot(self):
+        """
+        Latest funding, mark and index price for every symbol seen so far.
+        """
+        return self.buffer.latest()
+
+    def flush(self):
+        """
+        Append buffered ticks to `funding_ticks` through DuckDB's appender.
+
+        :return: Number of ticks written
+        """
+        if not self._pending or self.con is None:
+            return 0
+        pending, self._pending = self._pending, []
+        values = np.concatenate([v for _, _, v in pending])
+        df = pd.DataFrame({
+            'exchange': np.concatenate([[e] * len(t) for e, t, _ in pending]),
+            'ticker': np.concatenate([t for _, t, _ in pending]),
+            'timestamp': values[:, 0].astype(np.int64),
+            'funding_rate': values[:, 1],
+            'mark_price': values[:, 2],
+            'index_price': values[:, 3],
+            'next_funding_ts': pd.array(np.where(np.isnan(values[:, 4]), None, values[:, 4]), dtype='Int64'),
+        })
+        self.con.append('funding_ticks', df)
+        self.stats['flushed'] += len(df)
+        return len(df)
+
+    async def _run_feed(self, session, feed):
+        backoff = 1
+        while True:
+            try:
+                async with session.ws_connect(feed.url, heartbeat=30) as ws:
+                    for sub in feed.subscriptions():
+                        await ws.send_str(json.dumps(sub))
+                    backoff = 1
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            try:
+                                self.handle(feed, json.loads(msg.data))
+                            except (KeyError, ValueError, TypeError) as e:
+                                # One malformed or schema-changed message; keep the stream
+                                self.stats['parse_errors'] += 1
+                                print(f"Unparseable message on {feed.exchange_name}: {e!r} {msg.data[:200]}")
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Stream error on {feed.exchange_name}: {e}")
+            self.stats['reconnects'] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    async def run(self, duration=None):
+        """
+        Stream until cancelled, or for `duration` seconds.
+        """
+        async with aiohttp.ClientSession() as session:
+            tasks = [asyncio.create_task(self._run_feed(session, feed)) for feed in self.feeds]
+            tasks.append(asyncio.create_task(self._flush_loop()))
+            try:
+                if duration is None:
+                    await asyncio.gather(*tasks)
+                else:
+                    await asyncio.sleep(duration)
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self.flush()
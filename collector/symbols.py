@@ -0,0 +1,84 @@
+# Scaled contract prefixes, e.g. Binance '1000PEPE' and Hyperliquid 'kPEPE'
+# both quote 1000 PEPE per contract.
+SCALED_PREFIXES = [('1000000', 1_000_000), ('1000', 1000), ('1M', 1_000_000), ('k', 1000)]
+
+QUOTE_PREFERENCE = ['USDT', 'USDC']
+
+def split_symbol(symbol):
+    """
+    Split a ccxt unified symbol into (base, quote, settle).
+    'BTC/USDT:USDT' -> ('BTC', 'USDT', 'USDT'), 'BTC/USDT' -> ('BTC', 'USDT', None)
+    """
+    pair, _, settle = symbol.partition(':')
+    base, _, quote = pair.partition('/')
+    # Dated futures carry an expiry suffix on the settle part ('USDT-250627')
+    settle = settle.split('-')[0] if settle else None
+    return base, quote, settle
+
+def base_asset(symbol):
+    """
+    Common base asset of a symbol across exchanges.
+
+    :param symbol: ccxt unified symbol
+    :return: (asset, multiplier) such that one contract quotes `multiplier` units of `asset`
+    """
+    base, _, _ = split_symbol(symbol)
+    for prefix, multiplier in SCALED_PREFIXES:
+        rest = base[len(prefix):]
+        if base.startswith(prefix) and rest.isalpha() and rest.isupper():
+            return rest, multiplier
+    return base, 1
+
+def symbol_rank(symbol):
+    """
+    Sort key preferring perpetual swaps over spot, then USDT over USDC.
+    """
+    _, quote, settle = split_symbol(symbol)
+    quote_rank = QUOTE_PREFERENCE.index(quote) if quote in QUOTE_PREFERENCE else len(QUOTE_PREFERENCE)
+    return (settle is None, '-' in symbol, quote_rank, symbol)
+
+def is_linear_perp(symbol):
+    """
+    True for USDT/USDC-settled perpetual swaps ('BTC/USDT:USDT'), False for
+    spot pairs and dated futures ('BTC/USDT:USDT-250627').
+    """
+    _, quote, settle = split_symbol(symbol)
+    return settle is not None and '-' not in symbol and quote in QUOTE_PREFERENCE
+
+def map_by_asset(symbols):
+    """
+    Pick one symbol per base asset.
+
+    :param symbols: Iterable of ccxt symbols from one exchange
+    :return: Dict asset -> (symbol, multiplier)
+    """
+    mapping = {}
+    for symbol in sorted(symbols, key=symbol_rank):
+        asset, multiplier = base_asset(symbol)
+        if asset not in mapping:
+            mapping[asset] = (symbol, multiplier)
+    return mapping
+
+def pair_spot_perp(spot_symbols, perp_symbols):
+    """
+    Match spot pairs to linear perps of the same base asset, preferring the
+    same quote currency (BTC/USDT with BTC/USDT:USDT).
+
+    :return: Dict asset -> (spot_symbol, spot_multiplier, perp_symbol, perp_multiplier)
+    """
+    spot = {}
+    for symbol in spot_symbols:
+        asset, multiplier = base_asset(symbol)
+        spot.setdefault(asset, {})[split_symbol(symbol)[1]] = (symbol, multiplier)
+    pairs = {}
+    for symbol in sorted(perp_symbols, key=symbol_rank):
+        asset, multiplier = base_asset(symbol)
+        if asset in pairs or asset not in spot:
+            continue
+        quote = split_symbol(symbol)[1]
+        by_quote = spot[asset]
+        spot_quote = quote if quote in by_quote else min(
+            by_quote, key=lambda q: QUOTE_PREFERENCE.index(q) if q in QUOTE_PREFERENCE else len(QUOTE_PREFERENCE))
+        spot_symbol, spot_multiplier = by_quote[spot_quote]
+        pairs[asset] = (spot_symbol, spot_multiplier, symbol, multiplier)
+    return pairs
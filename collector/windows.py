@@ -0,0 +1,74 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+PAGE_LIMIT = 1000
+
+def split_windows(start_ts, end_ts, window_ms):
+    """
+    Cut [start_ts, end_ts] into consecutive, non-overlapping windows.
+
+    :param start_ts: Range start (ms timestamp, inclusive)
+    :param end_ts: Range end (ms timestamp, inclusive)
+    :param window_ms: Window length in ms
+    :return: List of (window_start, window_end) tuples, both inclusive
+    """
+    windows = []
+    ws = start_ts
+    while ws <= end_ts:
+        we = min(ws + window_ms - 1, end_ts)
+        windows.append((ws, we))
+        ws = we + 1
+    # The collectors page while since < end, so a zero-length tail window would
+    # never be requested; fold it into the previous window instead.
+    if len(windows) > 1 and windows[-1][0] == windows[-1][1]:
+        tail = windows.pop()
+        windows[-1] = (windows[-1][0], tail[1])
+    return windows
+
+def page_window_ms(step_ms, pages=1, limit=PAGE_LIMIT):
+    """
+    Window length that one window covers with `pages` full pages of `limit` rows.
+    """
+    return int(step_ms * limit * pages)
+
+def merge_frames(frames):
+    """
+    Concatenate per-window DataFrames, de-duplicate on timestamp and sort.
+    """
+    non_empty = [f for f in frames if not f.empty]
+    if not non_empty:
+        return frames[0] if frames else pd.DataFrame()
+    df = pd.concat(non_empty, ignore_index=True)
+    df = df.drop_duplicates(subset='timestamp', keep='first')
+    return df.sort_values('timestamp').reset_index(drop=True)
+
+def fetch_windows(fetch, windows, max_workers=4):
+    """
+    Run a blocking per-window fetch for every window on a thread pool.
+
+    :param fetch: Callable (window_start, window_end) -> DataFrame
+    :param windows: Output of split_windows
+    :param max_workers: Number of windows requested concurrently
+    :return: Merged, de-duplicated DataFrame
+    """
+    if len(windows) <= 1 or max_workers <= 1:
+        return merge_frames([fetch(ws, we) for ws, we in windows])
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        frames = list(pool.map(lambda w: fetch(*w), windows))
+    return merge_frames(frames)
+
+async def fetch_windows_async(fetch, windows, max_workers=4):
+    """
+    Async variant of fetch_windows: keeps up to `max_workers` windows in flight.
+
+    :param fetch: Callable (window_start, window_end) -> awaitable DataFrame
+    """
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def run(ws, we):
+        async with semaphore:
+            return await fetch(ws, we)
+
+    frames = await asyncio.gather(*(run(ws, we) for ws, we in windows))
+    return merge_frames(list(frames))
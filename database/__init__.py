@@ -0,0 +1,22 @@
+from collector.lazy import lazy_exports
+
+# Resolved on first access: the orchestrator pulls in every collector, which
+# commands that only touch DuckDB should not pay for.
+_EXPORTS = {
+    'DatabaseManager': '.database_manager',
+    'CollectionState': '.collection_state',
+    'FundingAligner': '.funding_panel',
+    'ParquetStore': '.parquet_store',
+    'GapScanner': '.gaps',
+    'OHLCVRollups': '.rollups',
+    'BasisBuilder': '.basis',
+    'FundingSignals': '.signals',
+    'DataQuality': '.quality',
+    'JobQueue': '.job_queue',
+    'Orchestrator': '.orchestrator',
+    'plan_jobs': '.orchestrator',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
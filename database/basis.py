@@ -0,0 +1,228 @@
+import pandas as pd
+from collector.symbols import pair_spot_perp
+from .rollups import candle_table
+
+HOUR_MS = 60 * 60 * 1000
+HOURS_PER_YEAR = 24 * 365
+BASIS_SPOT_EXCHANGE = 'binance_spot'
+BASIS_PERP_EXCHANGE = 'binance_futures'
+# Funding rows before the recompute start that are re-read so lag() and the
+# as-of join see the previous settlement
+LOOKBACK_MS = 48 * HOUR_MS
+
+BASIS_DDL = """
+    CREATE TABLE IF NOT EXISTS basis (
+        asset VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        datetime TIMESTAMP,
+        spot_ticker VARCHAR,
+        perp_ticker VARCHAR,
+        spot_close DOUBLE,
+        perp_close DOUBLE,
+        basis DOUBLE,
+        funding_rate_hourly DOUBLE,
+        annualized_carry DOUBLE,
+        PRIMARY KEY (asset, timestamp)
+    )
+"""
+
+PAIRS_DDL = """
+    CREATE TABLE IF NOT EXISTS basis_pairs (
+        asset VARCHAR NOT NULL,
+        spot_ticker VARCHAR NOT NULL,
+        spot_multiplier DOUBLE,
+        perp_ticker VARCHAR NOT NULL,
+        perp_multiplier DOUBLE,
+        PRIMARY KEY (asset)
+    )
+"""
+
+STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS basis_state (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        source VARCHAR NOT NULL,
+        max_ts BIGINT,
+        PRIMARY KEY (exchange, ticker, source)
+    )
+"""
+
+class BasisBuilder:
+    """
+    Materializes the spot-perp basis per base asset in the `basis` table,
+    keyed (asset, timestamp) on the same hourly grid as `funding_panel` so
+    the two join directly.
+
+    For each hour where both legs have a candle:
+      spot_close / perp_close - hourly closes per unit of the asset (prices of
+                                scaled contracts such as 1000PEPE are divided
+                                by their multiplier)
+      basis                   - perp_close / spot_close - 1
+      funding_rate_hourly     - latest perp funding settled at or before the
+                                hour end, divided by the hours since the
+                                previous settlement
+      annualized_carry        - funding_rate_hourly * 24 * 365, what a long
+                                spot / short perp position collects per year
+
+    Hourly closes are read from the `ohlcv_1h` rollup when candles are
+    collected finer than 1h and aggregated from `ohlcv` otherwise. refresh() only recomputes hours touched
+    by candles or funding rows newer than the last refresh.
+    """
+    def __init__(self, con, spot_exchange=BASIS_SPOT_EXCHANGE, perp_exchange=BASIS_PERP_EXCHANGE):
+        self.con = con
+        self.spot_exchange = spot_exchange
+        self.perp_exchange = perp_exchange
+        for ddl in (BASIS_DDL, PAIRS_DDL, STATE_DDL):
+            self.con.execute(ddl)
+
+    def refresh_pairs(self):
+        """
+        Rebuild the asset -> (spot ticker, perp ticker) pairing from stored candles.
+
+        :return: Set of assets whose pairing changed
+        """
+        tickers = self.con.execute(
+            "SELECT DISTINCT exchange, ticker FROM ohlcv WHERE exchange IN (?, ?)",
+            [self.spot_exchange, self.perp_exchange]
+        ).fetchdf()
+        pairs = pair_spot_perp(tickers.loc[tickers['exchange'] == self.spot_exchange, 'ticker'],
+                               tickers.loc[tickers['exchange'] == self.perp_exchange, 'ticker'])
+        new_pairs = pd.DataFrame(
+            [(asset, spot, float(spot_mult), perp, float(perp_mult))
+             for asset, (spot, spot_mult, perp, perp_mult) in sorted(pairs.items())],
+            columns=['asset', 'spot_ticker', 'spot_multiplier', 'perp_ticker', 'perp_multiplier'])
+
+        old_pairs = self.con.execute("SELECT asset, spot_ticker, perp_ticker FROM basis_pairs").fetchdf()
+        changed = (set(zip(old_pairs['asset'], old_pairs['spot_ticker'], old_pairs['perp_ticker']))
+                   ^ set(zip(new_pairs['asset'], new_pairs['spot_ticker'], new_pairs['perp_ticker'])))
+
+        self.con.execute("DELETE FROM basis_pairs")
+        if not new_pairs.empty:
+            self.con.register('_new_basis_pairs', new_pairs)
+            self.con.execute("INSERT INTO basis_pairs SELECT * FROM _new_basis_pairs")
+            self.con.unregister('_new_basis_pairs')
+        return {asset for asset, _, _ in changed}
+
+    def _legs_query(self):
+        """
+        Latest stored timestamp of every series feeding a paired asset.
+        """
+        return f"""
+            WITH legs AS (
+                SELECT asset, '{self.spot_exchange}' AS exchange, spot_ticker AS ticker, 'ohlcv' AS source FROM basis_pairs
+                UNION ALL SELECT asset, '{self.perp_exchange}', perp_ticker, 'ohlcv' FROM basis_pairs
+                UNION ALL SELECT asset, '{self.perp_exchange}', perp_ticker, 'fundings' FROM basis_pairs
+            ),
+            latest AS (
+                SELECT exchange, ticker, 'ohlcv' AS source, max(timestamp) AS max_ts
+                FROM ohlcv WHERE exchange IN ('{self.spot_exchange}', '{self.perp_exchange}') GROUP BY ALL
+                UNION ALL
+                SELECT exchange, ticker, 'fundings', max(timestamp)
+                FROM fundings WHERE exchange = '{self.perp_exchange}' GROUP BY ALL
+            )
+            SELECT legs.asset, legs.exchange, legs.ticker, legs.source, latest.max_ts
+            FROM legs JOIN latest USING (exchange, ticker, source)
+        """
+
+    def _dirty_ranges(self, changed_assets, full):
+        """
+        Per asset, the first hour to recompute.
+        """
+        ranges = self.con.execute(f"""
+            SELECT l.asset,
+                   min(coalesce(s.max_ts, -1)) AS done_ts,
+                   bool_or(s.max_ts IS NULL OR l.max_ts > s.max_ts) AS dirty
+            FROM ({self._legs_query()}) l
+            LEFT JOIN basis_state s USING (exchange, ticker, source)
+            GROUP BY l.asset
+        """).fetchdf()
+        if ranges.empty:
+            return ranges
+        reset = ranges['asset'].isin(changed_assets) | full | (ranges['done_ts'] < 0)
+        ranges = ranges[ranges['dirty'] | reset].copy()
+        ranges['from_ts'] = (ranges['done_ts'] // HOUR_MS) * HOUR_MS
+        ranges.loc[reset[ranges.index], 'from_ts'] = 0
+        return ranges[['asset', 'from_ts']]
+
+    def _candle_source(self):
+        return candle_table(self.con, '1h')
+
+    def refresh(self, full=False):
+        """
+        Bring `basis` up to date with `ohlcv` and `fundings`.
+
+        :param full: Recompute every asset from its first candle (use after backfilling history)
+        :return: Number of basis rows written
+        """
+        self.con.begin()
+        try:
+            changed = self.refresh_pairs()
+            dirty = self._dirty_ranges(changed, full)
+            if dirty.empty:
+                self.con.commit()
+                return 0
+
+            self.con.register('_basis_dirty', dirty)
+            self.con.execute("""
+                DELETE FROM basis USING _basis_dirty d
+                WHERE basis.asset = d.asset AND basis.timestamp >= d.from_ts
+            """)
+            self.con.execute("DELETE FROM basis WHERE asset NOT IN (SELECT asset FROM basis_pairs)")
+            written = self.con.execute(f"""
+                INSERT INTO basis
+                WITH hourly AS (
+                    SELECT exchange, ticker, timestamp // {HOUR_MS} * {HOUR_MS} AS hour,
+                           arg_max(close, timestamp) AS close
+                    FROM {self._candle_source()}
+                    WHERE exchange IN ('{self.spot_exchange}', '{self.perp_exchange}')
+                      AND timestamp >= (SELECT min(from_ts) FROM _basis_dirty)
+                    GROUP BY ALL
+                ),
+                spot AS (
+                    SELECT p.asset, h.hour, h.close / p.spot_multiplier AS price
+                    FROM hourly h
+                    JOIN basis_pairs p ON h.exchange = '{self.spot_exchange}' AND h.ticker = p.spot_ticker
+                    JOIN _basis_dirty d ON d.asset = p.asset
+                    WHERE h.hour >= d.from_ts
+                ),
+                perp AS (
+                    SELECT p.asset, h.hour, h.close / p.perp_multiplier AS price
+                    FROM hourly h
+                    JOIN basis_pairs p ON h.exchange = '{self.perp_exchange}' AND h.ticker = p.perp_ticker
+                ),
+                rates AS (
+                    SELECT p.asset, f.timestamp,
+                           f.funding_rate / greatest(round(coalesce(
+                               f.timestamp - lag(f.timestamp) OVER w,
+                               lead(f.timestamp) OVER w - f.timestamp,
+                               {HOUR_MS}) / {HOUR_MS}), 1) AS rate_hourly
+                    FROM fundings f
+                    JOIN basis_pairs p ON f.exchange = '{self.perp_exchange}' AND f.ticker = p.perp_ticker
+                    JOIN _basis_dirty d ON d.asset = p.asset
+                    WHERE f.timestamp >= d.from_ts - {LOOKBACK_MS}
+                    WINDOW w AS (PARTITION BY f.ticker ORDER BY f.timestamp)
+                    ORDER BY p.asset, f.timestamp
+                ),
+                priced AS (
+                    SELECT s.asset, s.hour, s.price AS spot_close, q.price AS perp_close
+                    FROM spot s JOIN perp q ON q.asset = s.asset AND q.hour = s.hour
+                )
+                SELECT b.asset, b.hour, make_timestamp(b.hour * 1000), p.spot_ticker, p.perp_ticker,
+                       b.spot_close, b.perp_close, b.perp_close / b.spot_close - 1,
+                       r.rate_hourly, r.rate_hourly * {HOURS_PER_YEAR}
+                FROM priced b
+                JOIN basis_pairs p ON p.asset = b.asset
+                ASOF LEFT JOIN rates r ON b.asset = r.asset AND b.hour + {HOUR_MS} - 1 >= r.timestamp
+            """).fetchone()[0]
+            self.con.unregister('_basis_dirty')
+
+            self.con.execute("DELETE FROM basis_state")
+            self.con.execute(f"""
+                INSERT INTO basis_state
+                SELECT exchange, ticker, source, max(max_ts) FROM ({self._legs_query()}) GROUP BY ALL
+            """)
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        return written
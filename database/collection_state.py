@@ -0,0 +1,165 @@
+from datetime import datetime, timezone
+from collector.windows import split_windows
+
+class CollectionState:
+    """
+    Resume bookkeeping for incremental collection.
+
+    Combines two sources when deciding where a symbol should restart:
+    the high-water mark (latest stored `timestamp` per exchange/ticker in
+    `fundings` / `ohlcv`) and an explicit checkpoint cursor written after
+    every persisted page, which also covers ranges that legitimately had no
+    rows (e.g. before a symbol was listed).
+    """
+    DATA_TABLES = ('fundings', 'ohlcv')
+
+    def __init__(self, con, db=None):
+        """
+        :param con: Open duckdb connection to the collection database
+        :param db: Optional DatabaseManager; when given, checkpoints are held
+                   back and written in the same transaction as the buffered
+                   rows they cover, so a checkpoint never runs ahead of data
+        """
+        self.con = con
+        self._hwm_cache = {}
+        self._pending = {}
+        self._deferred = db is not None
+        if db is not None:
+            db.add_flush_hook(self._write_pending)
+        self.con.execute("""
+            CREATE TABLE IF NOT EXISTS collection_checkpoints (
+                exchange VARCHAR,
+                ticker VARCHAR,
+                table_name VARCHAR,
+                cursor_ts BIGINT,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (exchange, ticker, table_name)
+            )
+        """)
+
+    def _table_exists(self, table):
+        return self.con.execute(
+            "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [table]
+        ).fetchone()[0] > 0
+
+    def high_water_marks(self, exchange, table):
+        """
+        Latest stored timestamp per ticker, loaded in one grouped query and cached.
+
+        :param exchange: Exchange name as stored (e.g. 'binance_futures')
+        :param table: 'fundings' or 'ohlcv'
+        :return: Dict ticker -> max timestamp (ms)
+        """
+        if table not in self.DATA_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        key = (exchange, table)
+        if key not in self._hwm_cache:
+            marks = {}
+            if self._table_exists(table):
+                rows = self.con.execute(
+                    f"SELECT ticker, max(timestamp) FROM {table} WHERE exchange = ? GROUP BY ticker",
+                    [exchange]
+                ).fetchall()
+                marks = {ticker: int(ts) for ticker, ts in rows if ts is not None}
+            self._hwm_cache[key] = marks
+        return self._hwm_cache[key]
+
+    def get_checkpoint(self, exchange, ticker, table):
+        key = (exchange, ticker, table)
+        if key in self._pending:
+            return self._pending[key]
+        row = self.con.execute(
+            "SELECT cursor_ts FROM collection_checkpoints WHERE exchange = ? AND ticker = ? AND table_name = ?",
+            [exchange, ticker, table]
+        ).fetchone()
+        return row[0] if row else None
+
+    def save_checkpoint(self, exchange, ticker, table, cursor_ts):
+        """
+        Record that everything before `cursor_ts` has been persisted.
+        """
+        self._pending[(exchange, ticker, table)] = int(cursor_ts)
+        if not self._deferred:
+            self._write_pending(self.con)
+
+    def _write_pending(self, con):
+        if not self._pending:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        con.executemany(
+            "INSERT OR REPLACE INTO collection_checkpoints VALUES (?, ?, ?, ?, ?)",
+            [[exchange, ticker, table, cursor_ts, now]
+             for (exchange, ticker, table), cursor_ts in self._pending.items()]
+        )
+        self._pending = {}
+
+    def resume_from(self, exchange, ticker, table, start_ts):
+        """
+        Where collection for one (exchange, ticker, table) should start.
+
+        :param start_ts: Earliest timestamp wanted by the caller (ms)
+        :return: Start timestamp (ms), never earlier than start_ts
+        """
+        resume_ts = start_ts
+        hwm = self.high_water_marks(exchange, table).get(ticker)
+        if hwm is not None:
+            # Restart at (not after) the last stored row: the newest candle may
+            # have been stored while still open, so it is refetched and replaced
+            resume_ts = max(resume_ts, hwm)
+        cursor = self.get_checkpoint(exchange, ticker, table)
+        if cursor is not None:
+            resume_ts = max(resume_ts, cursor)
+        return resume_ts
+
+    @staticmethod
+    def _window_cursor(df, window_end):
+        # A window with rows resumes at its last row (see resume_from); an
+        # empty window was fully fetched and is skipped entirely
+        if len(df):
+            return int(df['timestamp'].max())
+        return window_end + 1
+
+    def run_incremental(self, exchange, ticker, table, fetch, store, start_ts, end_ts, window_ms):
+        """
+        Fetch [resume point, end_ts] one page-sized window at a time, storing
+        each window and checkpointing right after it is persisted, so a killed
+        run restarts at the first window that was not stored.
+
+        :param fetch: Callable (window_start, window_end) -> DataFrame holding the
+                      complete window, or None when the fetch failed. It must not
+                      return a partial window (exchange errors should make it
+                      return None or raise), since the window is checkpointed.
+        :param store: Callable (DataFrame) -> None, persists one window
+        :param window_ms: Window length, normally one page of rows
+        :return: Number of rows fetched
+        """
+        resume_ts = self.resume_from(exchange, ticker, table, start_ts)
+        if resume_ts > end_ts:
+            return 0
+        rows = 0
+        for ws, we in split_windows(resume_ts, end_ts, window_ms):
+            df = fetch(ws, we)
+            if df is None:
+                # Fetch failed: keep the checkpoint where it is so this window is retried next run
+                break
+            store(df)
+            rows += len(df)
+            self.save_checkpoint(exchange, ticker, table, self._window_cursor(df, we))
+        return rows
+
+    async def run_incremental_async(self, exchange, ticker, table, fetch, store, start_ts, end_ts, window_ms):
+        """
+        Async variant of run_incremental; `fetch` returns an awaitable DataFrame.
+        """
+        resume_ts = self.resume_from(exchange, ticker, table, start_ts)
+        if resume_ts > end_ts:
+            return 0
+        rows = 0
+        for ws, we in split_windows(resume_ts, end_ts, window_ms):
+            df = await fetch(ws, we)
+            if df is None:
+                break
+            store(df)
+            rows += len(df)
+            self.save_checkpoint(exchange, ticker, table, self._window_cursor(df, we))
+        return rows
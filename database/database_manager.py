@@ -0,0 +1,184 @@
+import os
+import time
+import duckdb
+import pandas as pd
+from collector.metrics import METRICS
+
+FUNDINGS_DDL = """
+    CREATE TABLE IF NOT EXISTS fundings (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        datetime TIMESTAMP,
+        funding_rate DOUBLE,
+        PRIMARY KEY (exchange, ticker, timestamp)
+    )
+"""
+
+OHLCV_DDL = """
+    CREATE TABLE IF NOT EXISTS ohlcv (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        datetime TIMESTAMP,
+        open DOUBLE,
+        high DOUBLE,
+        low DOUBLE,
+        close DOUBLE,
+        volume DOUBLE,
+        PRIMARY KEY (exchange, ticker, timestamp)
+    )
+"""
+
+KEY_COLUMNS = ['exchange', 'ticker', 'timestamp']
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+RANGE_COLUMNS = ['table_name', 'exchange', 'ticker', 'from_ts', 'to_ts']
+
+class DatabaseManager:
+    """
+    DuckDB storage for collected funding rates and candles.
+
+    Inserts are buffered in memory across symbols and flushed in one
+    transaction once `flush_rows` rows are pending (and on close). A flush
+    registers the buffered DataFrame with DuckDB and upserts it with a single
+    set-based INSERT OR REPLACE, so re-running a collection never creates
+    duplicate (exchange, ticker, timestamp) rows.
+    """
+    def __init__(self, db_path, flush_rows=250_000):
+        """
+        :param db_path: DuckDB file path (or ':memory:')
+        :param flush_rows: Pending row count that triggers an automatic flush
+        """
+        if db_path != ':memory:' and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.con = duckdb.connect(db_path)
+        self.con.execute(FUNDINGS_DDL)
+        self.con.execute(OHLCV_DDL)
+
+        self.flush_rows = flush_rows
+        self._buffers = {'fundings': [], 'ohlcv': []}
+        self._pending_rows = 0
+        self._flush_hooks = []
+        # Per series time range written by the flush in progress (for hooks)
+        self.flushed_ranges = pd.DataFrame(columns=RANGE_COLUMNS)
+        self.ingest_stats = {'rows': 0, 'seconds': 0.0, 'flushes': 0}
+
+    def insert_funding(self, df, exchange):
+        """
+        Buffer funding rates for upsert into `fundings`.
+
+        :param df: Collector output with 'ticker', 'timestamp' and 'fundingRate' (or 'funding_rate')
+        :param exchange: Exchange name (e.g. 'binance_futures')
+        """
+        if df is None or df.empty:
+            return
+        rate_col = 'funding_rate' if 'funding_rate' in df.columns else 'fundingRate'
+        batch = pd.DataFrame({
+            'exchange': exchange,
+            'ticker': df['ticker'].astype(str).values,
+            'timestamp': df['timestamp'].astype('int64').values,
+            'funding_rate': df[rate_col].astype('float64').values,
+        })
+        self._buffer('fundings', batch)
+
+    def insert_ohlcv(self, df, exchange):
+        """
+        Buffer OHLCV candles for upsert into `ohlcv`.
+
+        :param df: Collector output with 'ticker', 'timestamp', 'open', 'high', 'low', 'close', 'volume'
+        :param exchange: Exchange name (e.g. 'binance_futures')
+        """
+        if df is None or df.empty:
+            return
+        batch = pd.DataFrame({
+            'exchange': exchange,
+            'ticker': df['ticker'].astype(str).values,
+            'timestamp': df['timestamp'].astype('int64').values,
+        })
+        for col in OHLCV_COLUMNS:
+            batch[col] = df[col].astype('float64').values
+        self._buffer('ohlcv', batch)
+
+    def _buffer(self, table, batch):
+        self._buffers[table].append(batch)
+        self._pending_rows += len(batch)
+        if self._pending_rows >= self.flush_rows:
+            self.flush()
+
+    def add_flush_hook(self, hook):
+        """
+        Register a callable run as hook(con) inside every flush transaction,
+        after the buffered rows are written. Used to commit bookkeeping
+        (e.g. collection checkpoints) atomically with the data it describes.
+        While hooks run, `flushed_ranges` holds the (table_name, exchange,
+        ticker, from_ts, to_ts) extent of every series in the flush.
+        """
+        self._flush_hooks.append(hook)
+
+    def flush(self):
+        """
+        Upsert all buffered rows in a single transaction.
+
+        :return: Number of rows written
+        """
+        if self._pending_rows == 0 and not self._flush_hooks:
+            return 0
+        started = time.perf_counter()
+        written = 0
+        ranges = []
+        self.con.begin()
+        try:
+            for table, frames in self._buffers.items():
+                if not frames:
+                    continue
+                batch = pd.concat(frames, ignore_index=True)
+                # A single INSERT OR REPLACE may not touch the same key twice
+                batch = batch.drop_duplicates(subset=KEY_COLUMNS, keep='last')
+                value_cols = [c for c in batch.columns if c not in KEY_COLUMNS]
+                self.con.register('_ingest_batch', batch)
+                self.con.execute(f"""
+                    INSERT OR REPLACE INTO {table}
+                        (exchange, ticker, timestamp, datetime, {', '.join(value_cols)})
+                    SELECT exchange, ticker, timestamp, make_timestamp(timestamp * 1000), {', '.join(value_cols)}
+                    FROM _ingest_batch
+                """)
+                ranges.append(self.con.execute(f"""
+                    SELECT '{table}' AS table_name, exchange, ticker, min(timestamp) AS from_ts, max(timestamp) AS to_ts
+                    FROM _ingest_batch GROUP BY exchange, ticker
+                """).fetchdf())
+                self.con.unregister('_ingest_batch')
+                written += len(batch)
+            if ranges:
+                self.flushed_ranges = pd.concat(ranges, ignore_index=True)
+            for hook in self._flush_hooks:
+                hook(self.con)
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        finally:
+            self.flushed_ranges = pd.DataFrame(columns=RANGE_COLUMNS)
+        self._buffers = {table: [] for table in self._buffers}
+        self._pending_rows = 0
+
+        elapsed = time.perf_counter() - started
+        METRICS.add_time('db_insert', elapsed)
+        if written:
+            self.ingest_stats['rows'] += written
+            self.ingest_stats['seconds'] += elapsed
+            self.ingest_stats['flushes'] += 1
+        return written
+
+    def ingest_rate(self):
+        """
+        Average ingest throughput over all flushes so far, in rows/sec.
+        """
+        if self.ingest_stats['seconds'] == 0:
+            return 0.0
+        return self.ingest_stats['rows'] / self.ingest_stats['seconds']
+
+    def close(self):
+        self.flush()
+        print(f"Ingested {self.ingest_stats['rows']} rows in {self.ingest_stats['flushes']} flushes "
+              f"({self.ingest_rate():,.0f} rows/sec)")
+        self.con.close()
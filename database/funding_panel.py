@@ -0,0 +1,244 @@
+import pandas as pd
+from collector.symbols import map_by_asset
+
+HOUR_MS = 60 * 60 * 1000
+PANEL_EXCHANGE_A = 'binance_futures'
+PANEL_EXCHANGE_B = 'hyperliquid'
+# Rows before the recompute start that are re-read so lag() and the as-of
+# join see the previous settlement of each leg
+LOOKBACK_MS = 48 * HOUR_MS
+
+PANEL_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_panel (
+        asset VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        datetime TIMESTAMP,
+        paid_a DOUBLE,
+        rate_a DOUBLE,
+        paid_b DOUBLE,
+        rate_b DOUBLE,
+        spread DOUBLE,
+        PRIMARY KEY (asset, timestamp)
+    )
+"""
+
+ASSET_MAP_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_asset_map (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        asset VARCHAR NOT NULL,
+        leg VARCHAR NOT NULL,
+        multiplier DOUBLE,
+        PRIMARY KEY (exchange, ticker)
+    )
+"""
+
+STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_panel_state (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        max_ts BIGINT,
+        PRIMARY KEY (exchange, ticker)
+    )
+"""
+
+# Funding rows written by flushes since the last refresh, also behind the
+# high-water marks (backfills, restated settlements)
+DIRTY_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_panel_dirty (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        from_ts BIGINT,
+        to_ts BIGINT,
+        PRIMARY KEY (exchange, ticker)
+    )
+"""
+
+class FundingAligner:
+    """
+    Materializes Binance Futures (leg a) and Hyperliquid (leg b) funding on a
+    common hourly grid per base asset in the `funding_panel` table.
+
+    For each hour bucket [timestamp, timestamp + 1h) and leg:
+      paid_x  - funding settled inside the bucket (0 if none)
+      rate_x  - latest settled rate at or before the bucket end, divided by
+                the hours since that leg's previous settlement, i.e. the
+                per-hour rate regardless of 8h / 4h / 1h cadence
+    spread = rate_b - rate_a.
+
+    refresh() only recomputes hours touched by funding rows newer than the
+    last refresh, using one as-of join per leg over the sorted series. When
+    attached to the DatabaseManager, every flush also records the min / max
+    timestamp it wrote per series, so rows inserted behind the high-water
+    marks (backfills, restated rates) are recomputed from where they start.
+    """
+    def __init__(self, con, db=None, exchange_a=PANEL_EXCHANGE_A, exchange_b=PANEL_EXCHANGE_B):
+        """
+        :param con: duckdb connection holding `fundings`
+        :param db: Optional DatabaseManager on `con`; its flushes mark the written ranges dirty
+        """
+        self.con = con
+        self.exchange_a = exchange_a
+        self.exchange_b = exchange_b
+        for ddl in (PANEL_DDL, ASSET_MAP_DDL, STATE_DDL, DIRTY_DDL):
+            self.con.execute(ddl)
+        if db is not None:
+            db.add_flush_hook(lambda con: self._record_dirty(db.flushed_ranges))
+
+    def _record_dirty(self, ranges):
+        """
+        Widen the pending dirty range of every funding series in `ranges`
+        (DatabaseManager.flushed_ranges). Runs inside the flush transaction.
+        """
+        ranges = ranges[(ranges['table_name'] == 'fundings')
+                        & ranges['exchange'].isin([self.exchange_a, self.exchange_b])]
+        if ranges.empty:
+            return
+        ranges = ranges[['exchange', 'ticker', 'from_ts', 'to_ts']].astype(
+            {'exchange': str, 'ticker': str, 'from_ts': 'int64', 'to_ts': 'int64'})
+        self.con.register('_flushed_fundings', ranges)
+        try:
+            self.con.execute("""
+                INSERT OR REPLACE INTO funding_panel_dirty
+                SELECT r.exchange, r.ticker,
+                       least(r.from_ts, coalesce(d.from_ts, r.from_ts)),
+                       greatest(r.to_ts, coalesce(d.to_ts, r.to_ts))
+                FROM _flushed_fundings r
+                LEFT JOIN funding_panel_dirty d USING (exchange, ticker)
+            """)
+        finally:
+            self.con.unregister('_flushed_fundings')
+
+    def refresh_asset_map(self):
+        """
+        Rebuild the exchange/ticker -> asset map from stored funding tickers.
+
+        :return: Set of assets whose ticker mapping changed
+        """
+        tickers = self.con.execute(
+            "SELECT DISTINCT exchange, ticker FROM fundings WHERE exchange IN (?, ?)",
+            [self.exchange_a, self.exchange_b]
+        ).fetchdf()
+        map_a = map_by_asset(tickers.loc[tickers['exchange'] == self.exchange_a, 'ticker'])
+        map_b = map_by_asset(tickers.loc[tickers['exchange'] == self.exchange_b, 'ticker'])
+        rows = []
+        for asset in sorted(set(map_a) & set(map_b)):
+            rows.append((self.exchange_a, map_a[asset][0], asset, 'a', float(map_a[asset][1])))
+            rows.append((self.exchange_b, map_b[asset][0], asset, 'b', float(map_b[asset][1])))
+        new_map = pd.DataFrame(rows, columns=['exchange', 'ticker', 'asset', 'leg', 'multiplier'])
+
+        old_map = self.con.execute("SELECT exchange, ticker, asset FROM funding_asset_map").fetchdf()
+        old_pairs = set(zip(old_map['exchange'], old_map['ticker'], old_map['asset']))
+        new_pairs = set(zip(new_map['exchange'], new_map['ticker'], new_map['asset']))
+        changed = {asset for _, _, asset in old_pairs ^ new_pairs}
+
+        self.con.execute("DELETE FROM funding_asset_map")
+        if not new_map.empty:
+            self.con.register('_new_asset_map', new_map)
+            self.con.execute("INSERT INTO funding_asset_map SELECT * FROM _new_asset_map")
+            self.con.unregister('_new_asset_map')
+        return changed
+
+    def _dirty_ranges(self, changed_assets, full):
+        """
+        Per asset, the first hour to recompute and the last hour with data:
+        from the oldest leg high-water mark when a leg advanced, and from the
+        earliest flushed row when rows landed behind it.
+        """
+        ranges = self.con.execute(f"""
+            WITH latest AS (
+                SELECT f.exchange, f.ticker, max(f.timestamp) AS max_ts
+                FROM fundings f JOIN funding_asset_map m USING (exchange, ticker)
+                GROUP BY ALL
+            )
+            SELECT m.asset,
+                   least(min(coalesce(s.max_ts, -1)), min(d.from_ts)) AS done_ts,
+                   max(l.max_ts) AS new_ts,
+                   bool_or(s.max_ts IS NULL OR l.max_ts > s.max_ts OR d.from_ts IS NOT NULL) AS dirty
+            FROM funding_asset_map m
+            JOIN latest l USING (exchange, ticker)
+            LEFT JOIN funding_panel_state s USING (exchange, ticker)
+            LEFT JOIN funding_panel_dirty d USING (exchange, ticker)
+            GROUP BY m.asset
+        """).fetchdf()
+        if ranges.empty:
+            return ranges
+        reset = ranges['asset'].isin(changed_assets) | full | (ranges['done_ts'] < 0)
+        ranges = ranges[ranges['dirty'] | reset].copy()
+        ranges['from_ts'] = (ranges['done_ts'] // HOUR_MS) * HOUR_MS
+        ranges.loc[reset[ranges.index], 'from_ts'] = 0
+        ranges['to_ts'] = (ranges['new_ts'] // HOUR_MS) * HOUR_MS
+        return ranges[['asset', 'from_ts', 'to_ts']]
+
+    def refresh(self, full=False):
+        """
+        Bring `funding_panel` up to date with `fundings`.
+
+        :param full: Recompute every asset from its first settlement (use after backfilling history)
+        :return: Number of panel rows written
+        """
+        self.con.begin()
+        try:
+            changed = self.refresh_asset_map()
+            dirty = self._dirty_ranges(changed, full)
+            self.con.execute("DELETE FROM funding_panel_dirty")
+            if dirty.empty:
+                self.con.commit()
+                return 0
+
+            self.con.register('_dirty', dirty)
+            self.con.execute("""
+                DELETE FROM funding_panel USING _dirty d
+                WHERE funding_panel.asset = d.asset AND funding_panel.timestamp >= d.from_ts
+            """)
+            self.con.execute("DELETE FROM funding_panel WHERE asset NOT IN (SELECT DISTINCT asset FROM funding_asset_map)")
+            written = self.con.execute(f"""
+                INSERT INTO funding_panel
+                WITH legs AS (
+                    SELECT m.asset, m.leg, f.timestamp, f.funding_rate,
+                           f.funding_rate / greatest(round(coalesce(
+                               f.timestamp - lag(f.timestamp) OVER w,
+                               lead(f.timestamp) OVER w - f.timestamp,
+                               {HOUR_MS}) / {HOUR_MS}), 1) AS rate_hourly
+                    FROM fundings f
+                    JOIN funding_asset_map m USING (exchange, ticker)
+                    JOIN _dirty d ON d.asset = m.asset
+                    WHERE f.timestamp >= d.from_ts - {LOOKBACK_MS}
+                    WINDOW w AS (PARTITION BY f.exchange, f.ticker ORDER BY f.timestamp)
+                ),
+                leg_a AS (SELECT * FROM legs WHERE leg = 'a' ORDER BY asset, timestamp),
+                leg_b AS (SELECT * FROM legs WHERE leg = 'b' ORDER BY asset, timestamp),
+                paid AS (
+                    SELECT asset, leg, timestamp // {HOUR_MS} * {HOUR_MS} AS ts, sum(funding_rate) AS paid
+                    FROM legs GROUP BY ALL
+                ),
+                grid AS (
+                    SELECT asset, unnest(range(greatest(from_ts, first_ts), to_ts + 1, {HOUR_MS})) AS ts
+                    FROM _dirty JOIN (
+                        SELECT asset, min(timestamp) // {HOUR_MS} * {HOUR_MS} AS first_ts FROM legs GROUP BY asset
+                    ) USING (asset)
+                )
+                SELECT g.asset, g.ts, make_timestamp(g.ts * 1000),
+                       coalesce(pa.paid, 0), ra.rate_hourly,
+                       coalesce(pb.paid, 0), rb.rate_hourly,
+                       rb.rate_hourly - ra.rate_hourly
+                FROM grid g
+                ASOF LEFT JOIN leg_a ra ON g.asset = ra.asset AND g.ts + {HOUR_MS} - 1 >= ra.timestamp
+                ASOF LEFT JOIN leg_b rb ON g.asset = rb.asset AND g.ts + {HOUR_MS} - 1 >= rb.timestamp
+                LEFT JOIN paid pa ON pa.asset = g.asset AND pa.ts = g.ts AND pa.leg = 'a'
+                LEFT JOIN paid pb ON pb.asset = g.asset AND pb.ts = g.ts AND pb.leg = 'b'
+            """).fetchone()[0]
+            self.con.unregister('_dirty')
+
+            self.con.execute("DELETE FROM funding_panel_state")
+            self.con.execute("""
+                INSERT INTO funding_panel_state
+                SELECT f.exchange, f.ticker, max(f.timestamp)
+                FROM fundings f JOIN funding_asset_map m USING (exchange, ticker)
+                GROUP BY ALL
+            """)
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        return written
@@ -0,0 +1,216 @@
+import ccxt
+import pandas as pd
+
+GAP_CHECKS_DDL = """
+    CREATE TABLE IF NOT EXISTS gap_checks (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        table_name VARCHAR NOT NULL,
+        gap_start BIGINT NOT NULL,
+        gap_end BIGINT NOT NULL,
+        rows_found BIGINT,
+        checked_at TIMESTAMP,
+        PRIMARY KEY (exchange, ticker, table_name, gap_start, gap_end)
+    )
+"""
+
+GAP_COLUMNS = ['exchange', 'ticker', 'gap_start', 'gap_end', 'step_ms', 'missing']
+
+# Rows one request returns; gaps closer than this are fetched together
+PAGE_ROWS = 1000
+
+class GapScanner:
+    """
+    Finds holes in the stored `ohlcv` / `fundings` series and refetches only
+    those ranges.
+
+    A hole is a step between consecutive rows of one (exchange, ticker) that
+    is more than `tolerance` times the series cadence. The cadence is the
+    most common step of the series (its candle timeframe, or its funding
+    interval), optionally capped per exchange, so 4h and 8h Binance funding
+    symbols are each judged on their own schedule. A series that stops more
+    than `tolerance` steps before the end bound of the collection has a
+    truncated tail, which is a gap as well. All series are scanned in one
+    pass with window functions.
+
+    Gaps that were refetched and came back empty (exchange downtime, a
+    delisting pause) are remembered in `gap_checks` and skipped afterwards,
+    so repeated repairs do not keep paying for them. A refetch that failed
+    is not recorded, so its gap is tried again next time.
+    """
+    TABLES = ('fundings', 'ohlcv')
+
+    def __init__(self, con):
+        """
+        :param con: duckdb connection holding `fundings` / `ohlcv`
+        """
+        self.con = con
+        self.con.execute(GAP_CHECKS_DDL)
+
+    def find_gaps(self, table, exchange=None, cadence_ms=None, tolerance=1.5, recheck=False, end_ts=None):
+        """
+        :param table: 'fundings' or 'ohlcv'
+        :param exchange: Optional exchange filter
+        :param cadence_ms: Optional dict exchange -> maximum cadence (ms), e.g. the
+                           collectors' funding_interval_ms
+        :param tolerance: Multiple of the cadence a step may reach before it counts as a gap
+        :param recheck: Also return gaps already refetched without result
+        :param end_ts: End bound the collection ran to (ms). Series whose last row is
+                       further than `tolerance` steps before it get a tail gap up to it.
+                       Default: the latest row stored for the exchange.
+        :return: DataFrame with exchange, ticker, gap_start, gap_end (exclusive of the
+                 stored neighbours), step_ms and the estimated number of missing rows
+        """
+        if table not in self.TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        caps = pd.DataFrame(list((cadence_ms or {}).items()), columns=['exchange', 'cap_ms'], dtype=object)
+        caps['cap_ms'] = caps['cap_ms'].astype('int64')
+        where = "WHERE exchange = ?" if exchange is not None else ""
+        params = ([exchange] if exchange is not None else []) + [end_ts, tolerance, tolerance]
+        # A tail keeps growing with the end bound, so an empty tail check covers later, longer tails
+        skip_checked = "" if recheck else """
+            AND NOT EXISTS (
+                SELECT 1 FROM gap_checks g
+                WHERE g.exchange = f.exchange AND g.ticker = f.ticker AND g.table_name = '{table}'
+                  AND g.gap_start = f.gap_start AND (g.gap_end = f.gap_end OR f.tail) AND g.rows_found = 0
+            )""".format(table=table)
+
+        self.con.register('_cadence_caps', caps)
+        try:
+            return self.con.execute(f"""
+                WITH d AS (
+                    SELECT exchange, ticker, timestamp,
+                           lag(timestamp) OVER (PARTITION BY exchange, ticker ORDER BY timestamp) AS prev_ts
+                    FROM {table} {where}
+                ),
+                cadence AS (
+                    SELECT d.exchange, d.ticker,
+                           least(mode(d.timestamp - d.prev_ts), coalesce(any_value(c.cap_ms), 9223372036854775807)) AS step_ms
+                    FROM d LEFT JOIN _cadence_caps c USING (exchange)
+                    WHERE d.prev_ts IS NOT NULL
+                    GROUP BY d.exchange, d.ticker
+                ),
+                bounds AS (
+                    SELECT exchange, ticker, max(timestamp) AS last_ts,
+                           coalesce(CAST(? AS BIGINT), max(max(timestamp)) OVER (PARTITION BY exchange)) AS end_ts
+                    FROM d GROUP BY exchange, ticker
+                ),
+                f AS (
+                    SELECT d.exchange, d.ticker, d.prev_ts + 1 AS gap_start, d.timestamp - 1 AS gap_end, c.step_ms,
+                           CAST(round((d.timestamp - d.prev_ts) / c.step_ms) - 1 AS BIGINT) AS missing, false AS tail
+                    FROM d JOIN cadence c USING (exchange, ticker)
+                    WHERE d.timestamp - d.prev_ts > c.step_ms * ?
+                    UNION ALL
+                    -- Truncated tails: the series stops short of where collection ended
+                    SELECT b.exchange, b.ticker, b.last_ts + 1, b.end_ts, c.step_ms,
+                           CAST(floor((b.end_ts - b.last_ts) / c.step_ms) AS BIGINT), true
+                    FROM bounds b JOIN cadence c USING (exchange, ticker)
+                    WHERE b.end_ts - b.last_ts > c.step_ms * ?
+                )
+                SELECT exchange, ticker, gap_start, gap_end, step_ms, missing
+                FROM f
+                WHERE true {skip_checked}
+                ORDER BY exchange, ticker, gap_start
+            """, params).fetchdf()
+        finally:
+            self.con.unregister('_cadence_caps')
+
+    @staticmethod
+    def coalesce(gaps, page_rows=PAGE_ROWS):
+        """
+        Merge gaps of the same series that one page-sized request can cover together.
+
+        :return: DataFrame with the GAP_COLUMNS, one row per request range
+        """
+        ranges = []
+        for (exchange, ticker), series in gaps.groupby(['exchange', 'ticker'], sort=False):
+            current = None
+            for gap in series.itertuples(index=False):
+                span = page_rows * gap.step_ms
+                if current is not None and gap.gap_end - current[2] <= span:
+                    current[3] = gap.gap_end
+                    current[5] += gap.missing
+                    continue
+                if current is not None:
+                    ranges.append(current)
+                current = [exchange, ticker, gap.gap_start, gap.gap_end, gap.step_ms, gap.missing]
+            if current is not None:
+                ranges.append(current)
+        return pd.DataFrame(ranges, columns=GAP_COLUMNS)
+
+    def backfill(self, db, collectors, table, gaps=None, timeframe='1h', merge=True):
+        """
+        Refetch the missing ranges of `table` and store them through `db`.
+
+        :param db: DatabaseManager sharing this scanner's connection
+        :param collectors: Dict exchange name -> collector
+        :param table: 'fundings' or 'ohlcv'
+        :param gaps: Optional output of find_gaps (default: scan now)
+        :param timeframe: Candle timeframe for 'ohlcv'
+        :param merge: Coalesce nearby gaps into shared requests
+        :return: Dict with 'gaps', 'requests' (ranges fetched), 'failed' (requests that
+                 raised an exchange error) and 'rows' (rows stored)
+        """
+        if gaps is None:
+            cadence = {name: c.funding_interval_ms for name, c in collectors.items()
+                       if getattr(c, 'funding_interval_ms', None)}
+            gaps = self.find_gaps(table, cadence_ms=cadence if table == 'fundings' else None)
+        gaps = gaps[gaps['exchange'].isin(list(collectors))]
+        ranges = self.coalesce(gaps) if merge else gaps
+
+        stored, failed = 0, []
+        for gap in ranges.itertuples(index=False):
+            collector = collectors[gap.exchange]
+            try:
+                if table == 'fundings':
+                    df = collector.fetch_funding_rates(gap.ticker, int(gap.gap_start), int(gap.gap_end), compact=True)
+                    insert = db.insert_funding
+                else:
+                    df = collector.fetch_prices(gap.ticker, int(gap.gap_start), int(gap.gap_end), timeframe, compact=True)
+                    insert = db.insert_ohlcv
+            except ccxt.BaseError as e:
+                # Not recorded in gap_checks, so the next scan still finds the gap
+                print(f"  Failed to refetch {gap.exchange} {gap.ticker} [{gap.gap_start}, {gap.gap_end}]: {e}")
+                failed.append(gap)
+                continue
+            mask = (df['timestamp'] >= gap.gap_start) & (df['timestamp'] <= gap.gap_end)
+            df = df.loc[mask].assign(ticker=gap.ticker)
+            if not df.empty:
+                insert(df, gap.exchange)
+            stored += len(df)
+
+        db.flush()
+        self._record_checks(table, self._without(gaps, failed))
+        return {'gaps': len(gaps), 'requests': len(ranges), 'failed': len(failed), 'rows': stored}
+
+    @staticmethod
+    def _without(gaps, ranges):
+        """
+        Gaps not covered by any of the given request ranges.
+        """
+        keep = pd.Series(True, index=gaps.index)
+        for r in ranges:
+            keep &= ~((gaps['exchange'] == r.exchange) & (gaps['ticker'] == r.ticker)
+                      & (gaps['gap_start'] >= r.gap_start) & (gaps['gap_end'] <= r.gap_end))
+        return gaps[keep]
+
+    def _record_checks(self, table, gaps):
+        """
+        Store how many rows each refetched gap holds now; gaps that stayed
+        empty are skipped by later scans.
+        """
+        if gaps.empty:
+            return
+        self.con.register('_checked_gaps', gaps[['exchange', 'ticker', 'gap_start', 'gap_end']])
+        try:
+            self.con.execute(f"""
+                INSERT OR REPLACE INTO gap_checks
+                SELECT g.exchange, g.ticker, '{table}', g.gap_start, g.gap_end,
+                       count(t.timestamp), now()::TIMESTAMP
+                FROM _checked_gaps g
+                LEFT JOIN {table} t ON t.exchange = g.exchange AND t.ticker = g.ticker
+                     AND t.timestamp BETWEEN g.gap_start AND g.gap_end
+                GROUP BY ALL
+            """)
+        finally:
+            self.con.unregister('_checked_gaps')
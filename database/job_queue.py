@@ -0,0 +1,195 @@
+import time
+import pandas as pd
+
+JOBS_DDL = """
+    CREATE TABLE IF NOT EXISTS collection_jobs (
+        job_id VARCHAR NOT NULL,
+        seq BIGINT DEFAULT nextval('collection_job_seq'),
+        exchange VARCHAR NOT NULL,
+        symbol VARCHAR NOT NULL,
+        dataset VARCHAR NOT NULL,
+        timeframe VARCHAR,
+        start_ts BIGINT NOT NULL,
+        end_ts BIGINT NOT NULL,
+        status VARCHAR NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_owner VARCHAR,
+        lease_until BIGINT,
+        available_at BIGINT NOT NULL DEFAULT 0,
+        rows BIGINT,
+        error VARCHAR,
+        PRIMARY KEY (job_id)
+    )
+"""
+
+JOB_COLUMNS = ['job_id', 'exchange', 'symbol', 'dataset', 'timeframe', 'start_ts', 'end_ts']
+
+def job_id(exchange, symbol, dataset, timeframe, start_ts, end_ts):
+    return f"{exchange}|{symbol}|{dataset}|{timeframe or ''}|{start_ts}|{end_ts}"
+
+def now_ms():
+    return int(time.time() * 1000)
+
+class JobQueue:
+    """
+    Durable collection job queue in the `collection_jobs` table.
+
+    A job is one (exchange, symbol, dataset, time range). Its id is derived
+    from those fields, so enqueueing the same plan twice is a no-op and a
+    restarted run only picks up what is not done yet.
+
+    Lifecycle: pending -> leased (lease_owner, lease_until) -> done, or back
+    to pending with a backoff after a failure, until `max_attempts` leases
+    have failed (status 'failed'). A lease that is not renewed before
+    lease_until expires and the job can be leased again.
+    """
+    def __init__(self, con, max_attempts=3, retry_backoff_ms=10_000):
+        """
+        :param con: duckdb connection owned by the single writer process
+        :param max_attempts: Leases a job may fail before it is marked 'failed'
+        :param retry_backoff_ms: Delay before a failed job is retried, times its attempt count
+        """
+        self.con = con
+        self.max_attempts = max_attempts
+        self.retry_backoff_ms = retry_backoff_ms
+        self.con.execute("CREATE SEQUENCE IF NOT EXISTS collection_job_seq")
+        self.con.execute(JOBS_DDL)
+
+    def enqueue(self, jobs):
+        """
+        Add jobs that are not queued yet.
+
+        :param jobs: DataFrame with JOB_COLUMNS (see plan_jobs)
+        :return: Number of jobs added
+        """
+        if jobs is None or len(jobs) == 0:
+            return 0
+        before = self.con.execute("SELECT count(*) FROM collection_jobs").fetchone()[0]
+        self.con.register('_new_jobs', pd.DataFrame(jobs)[JOB_COLUMNS])
+        try:
+            self.con.execute(f"""
+                INSERT OR IGNORE INTO collection_jobs ({', '.join(JOB_COLUMNS)})
+                SELECT {', '.join(JOB_COLUMNS)} FROM _new_jobs ORDER BY start_ts, exchange, symbol, dataset
+            """)
+        finally:
+            self.con.unregister('_new_jobs')
+        return self.con.execute("SELECT count(*) FROM collection_jobs").fetchone()[0] - before
+
+    def lease(self, owner, limit, lease_ms=600_000, caps=None, in_flight=None):
+        """
+        Lease up to `limit` runnable jobs (pending and due, or with an expired lease), oldest first.
+
+        :param owner: Lease owner id
+        :param caps: Optional dict exchange -> maximum jobs in flight
+        :param in_flight: Dict exchange -> jobs this owner already has running
+        :return: DataFrame of leased jobs (JOB_COLUMNS plus attempts)
+        """
+        if limit <= 0:
+            return pd.DataFrame(columns=JOB_COLUMNS + ['attempts'])
+        now = now_ms()
+        caps = caps or {}
+        in_flight = in_flight or {}
+        allowed = pd.DataFrame(
+            [(exchange, max(cap - in_flight.get(exchange, 0), 0)) for exchange, cap in caps.items()],
+            columns=['exchange', 'allowed']).astype({'exchange': str, 'allowed': 'int64'})
+        self.con.register('_job_caps', allowed)
+        self.con.begin()
+        try:
+            leased = self.con.execute(f"""
+                UPDATE collection_jobs
+                SET status = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1
+                WHERE job_id IN (
+                    SELECT job_id FROM (
+                        SELECT j.job_id, j.seq, coalesce(c.allowed, ?) AS allowed,
+                               row_number() OVER (PARTITION BY j.exchange ORDER BY j.seq) AS pos
+                        FROM collection_jobs j LEFT JOIN _job_caps c USING (exchange)
+                        WHERE (j.status = 'pending' AND j.available_at <= ?)
+                           OR (j.status = 'leased' AND j.lease_until < ?)
+                    )
+                    WHERE pos <= allowed
+                    ORDER BY seq LIMIT ?
+                )
+                RETURNING {', '.join(JOB_COLUMNS)}, attempts, seq
+            """, [owner, now + lease_ms, limit, now, now, limit]).fetchdf()
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        finally:
+            self.con.unregister('_job_caps')
+        return leased.sort_values('seq').drop(columns='seq').reset_index(drop=True)
+
+    def renew(self, owner, job_ids, lease_ms=600_000):
+        """
+        Extend the leases of jobs still being worked on.
+        """
+        if not job_ids:
+            return
+        self.con.execute(
+            "UPDATE collection_jobs SET lease_until = ? WHERE lease_owner = ? AND status = 'leased' AND list_contains(?, job_id)",
+            [now_ms() + lease_ms, owner, list(job_ids)])
+
+    def complete(self, job_ids, rows=None):
+        """
+        Mark jobs done. Call inside the transaction that wrote their rows.
+
+        :param job_ids: Ids of finished jobs
+        :param rows: Optional list of row counts, one per job
+        """
+        rows = rows or [None] * len(job_ids)
+        for jid, count in zip(job_ids, rows):
+            self.con.execute(
+                "UPDATE collection_jobs SET status = 'done', lease_owner = NULL, lease_until = NULL, rows = ?, error = NULL WHERE job_id = ?",
+                [count, jid])
+
+    def fail(self, jid, error):
+        """
+        Return a failed job to the queue with a backoff, or mark it 'failed'
+        once it has used all its attempts.
+
+        :return: New status of the job
+        """
+        attempts = self.con.execute("SELECT attempts FROM collection_jobs WHERE job_id = ?", [jid]).fetchone()[0]
+        status = 'failed' if attempts >= self.max_attempts else 'pending'
+        self.con.execute("""
+            UPDATE collection_jobs SET status = ?, lease_owner = NULL, lease_until = NULL, available_at = ?, error = ?
+            WHERE job_id = ?
+        """, [status, now_ms() + attempts * self.retry_backoff_ms, str(error)[:500], jid])
+        return status
+
+    def recover(self, owner=None):
+        """
+        Return leased jobs to pending without charging an attempt, e.g. at
+        startup (DuckDB allows a single writer, so no other run can hold them).
+
+        :param owner: Only recover this owner's leases (default: all)
+        :return: Number of jobs recovered
+        """
+        where = "status = 'leased'" + (" AND lease_owner = ?" if owner else "")
+        return self.con.execute(f"""
+            UPDATE collection_jobs SET status = 'pending', lease_owner = NULL, lease_until = NULL,
+                   attempts = greatest(attempts - 1, 0)
+            WHERE {where}
+        """, [owner] if owner else []).fetchone()[0]
+
+    def retry_failed(self):
+        """
+        Give every 'failed' job a fresh set of attempts.
+
+        :return: Number of jobs reset
+        """
+        return self.con.execute("""
+            UPDATE collection_jobs SET status = 'pending', attempts = 0, available_at = 0 WHERE status = 'failed'
+        """).fetchone()[0]
+
+    def next_due(self):
+        """
+        :return: Earliest available_at (ms) among pending jobs, or None if none are pending
+        """
+        return self.con.execute("SELECT min(available_at) FROM collection_jobs WHERE status = 'pending'").fetchone()[0]
+
+    def counts(self):
+        """
+        :return: Dict status -> number of jobs
+        """
+        return dict(self.con.execute("SELECT status, count(*) FROM collection_jobs GROUP BY status").fetchall())
@@ -0,0 +1,211 @@
+import os
+import uuid
+import time
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import pandas as pd
+from collector.binance_futures import BinanceFuturesCollector
+from collector.binance_spot import BinanceSpotCollector
+from collector.hyperliquid import HyperliquidCollector
+from collector.metrics import METRICS
+from collector.windows import page_window_ms
+from .job_queue import JobQueue, JOB_COLUMNS, job_id
+from .rollups import timeframe_ms
+
+COLLECTORS = {
+    'binance_futures': BinanceFuturesCollector,
+    'binance_spot': BinanceSpotCollector,
+    'hyperliquid': HyperliquidCollector,
+}
+
+# Jobs in flight per exchange; each exchange's request budget is shared by
+# its workers through the file-backed rate limiter
+DEFAULT_CAPS = {'binance_futures': 4, 'binance_spot': 2, 'hyperliquid': 2}
+DEFAULT_RATE_LIMIT_DIR = 'data/rate_limits'
+
+def default_collector(exchange):
+    return COLLECTORS[exchange]()
+
+def plan_jobs(exchange, symbols, start_ts, end_ts, datasets=('fundings', 'ohlcv'), timeframe='1h',
+              window_pages=5, funding_interval_ms=None):
+    """
+    Cut (symbol, dataset, time range) into jobs of `window_pages` full pages each.
+
+    Windows are aligned to epoch multiples of their length, so planning the
+    same history again yields the same job ids (only the head window moves).
+
+    :param exchange: Collector exchange name
+    :param symbols: Symbols to collect
+    :param funding_interval_ms: Funding cadence (default: the collector class attribute)
+    :return: DataFrame with JOB_COLUMNS
+    """
+    collector_cls = COLLECTORS.get(exchange)
+    funding_interval_ms = funding_interval_ms or getattr(collector_cls, 'funding_interval_ms', None)
+    steps = {}
+    if 'fundings' in datasets and funding_interval_ms:
+        steps['fundings'] = (None, page_window_ms(funding_interval_ms, window_pages))
+    if 'ohlcv' in datasets:
+        steps['ohlcv'] = (timeframe, page_window_ms(timeframe_ms(timeframe), window_pages))
+
+    rows = []
+    for dataset, (tf, window_ms) in steps.items():
+        first = (start_ts // window_ms) * window_ms
+        for ws in range(first, end_ts + 1, window_ms):
+            we = min(ws + window_ms - 1, end_ts)
+            for symbol in symbols:
+                rows.append((job_id(exchange, symbol, dataset, tf, ws, we), exchange, symbol, dataset, tf, ws, we))
+    return pd.DataFrame(rows, columns=JOB_COLUMNS)
+
+# Collectors built by this worker process, one per exchange
+_worker_collectors = {}
+
+def _init_worker(env):
+    os.environ.update(env)
+
+def run_job(job, factory=default_collector):
+    """
+    Fetch one job in a worker process. No DuckDB access happens here; the
+    compact frame is sent back to the writer. Exchange errors are not caught:
+    they reach the writer through the future and the job goes to
+    JobQueue.fail, so a window that was only partly fetched is never marked done.
+
+    The worker's METRICS recorded since its previous job (including any
+    failed one) travel back with the frame so the writer's run summary
+    covers the requests made in every process.
+
+    :param job: Dict with JOB_COLUMNS
+    :param factory: Picklable callable exchange name -> collector
+    :return: (compact DataFrame (see collector.schema), drained worker metrics)
+    """
+    collector = _worker_collectors.get(job['exchange'])
+    if collector is None:
+        collector = _worker_collectors[job['exchange']] = factory(job['exchange'])
+    if job['dataset'] == 'fundings':
+        df = collector.fetch_funding_rates(job['symbol'], job['start_ts'], job['end_ts'], compact=True)
+    else:
+        df = collector.fetch_prices(job['symbol'], job['start_ts'], job['end_ts'], job['timeframe'], compact=True)
+    return df, METRICS.drain()
+
+class Orchestrator:
+    """
+    Runs queued collection jobs on a pool of worker processes.
+
+    Workers only fetch and parse; this process is the single writer. It
+    leases jobs from the JobQueue (respecting per-exchange caps), hands them
+    to the pool, buffers returned frames in the DatabaseManager and marks
+    jobs done inside the flush transaction that persists their rows. A
+    crash therefore never loses a job: it is either done with its data
+    committed, or it is leased or pending and runs again.
+    """
+    def __init__(self, db, queue=None, processes=None, caps=None, lease_ms=600_000,
+                 factory=default_collector, rate_limit_dir=DEFAULT_RATE_LIMIT_DIR):
+        """
+        :param db: DatabaseManager (owns the DuckDB connection)
+        :param queue: JobQueue on db.con (default: a new one)
+        :param processes: Worker processes (default: CPU count)
+        :param caps: Dict exchange -> maximum jobs in flight, each at least 1 (default DEFAULT_CAPS);
+                     exchanges not listed are only bounded by `processes`
+        :param lease_ms: Lease duration; running jobs are renewed while the pool waits
+        :param factory: Picklable callable exchange name -> collector, run in the workers
+        :param rate_limit_dir: File-backed limiter state shared by the workers, unless
+                               FUNDING_ARB_RATE_LIMIT_DIR is already set
+        """
+        self.db = db
+        self.queue = queue or JobQueue(db.con)
+        self.processes = processes or os.cpu_count()
+        self.caps = DEFAULT_CAPS if caps is None else caps
+        # A zero cap would leave that exchange's due jobs unleasable and run() spinning on them
+        blocked = sorted(exchange for exchange, cap in self.caps.items() if cap < 1)
+        if blocked:
+            raise ValueError(f"caps must be at least 1 job in flight: {', '.join(blocked)}")
+        self.lease_ms = lease_ms
+        self.factory = factory
+        self.rate_limit_dir = rate_limit_dir
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.stats = {'done': 0, 'retried': 0, 'failed': 0, 'rows': 0}
+        # Jobs whose rows are buffered in db but not flushed yet
+        self._stored = []
+        db.add_flush_hook(self._complete_stored)
+
+    def _complete_stored(self, con):
+        if self._stored:
+            ids, rows = zip(*self._stored)
+            self.queue.complete(list(ids), list(rows))
+            self._stored = []
+
+    def _new_pool(self):
+        env = {'FUNDING_ARB_RATE_LIMIT_DIR': os.environ.get('FUNDING_ARB_RATE_LIMIT_DIR') or self.rate_limit_dir}
+        return ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker, initargs=(env,))
+
+    def _store(self, job, df):
+        rows = 0 if df is None else len(df)
+        if rows:
+            if job['dataset'] == 'fundings':
+                self.db.insert_funding(df, job['exchange'])
+            else:
+                self.db.insert_ohlcv(df, job['exchange'])
+        self._stored.append((job['job_id'], rows))
+        self.stats['done'] += 1
+        self.stats['rows'] += rows
+        print(f"[{self.stats['done']}] {job['exchange']} {job['symbol']} {job['dataset']}: {rows} rows")
+
+    def _fail(self, job, error):
+        status = self.queue.fail(job['job_id'], error)
+        self.stats['failed' if status == 'failed' else 'retried'] += 1
+        print(f"  {job['exchange']} {job['symbol']} {job['dataset']} attempt {job['attempts']} failed "
+              f"({'giving up' if status == 'failed' else 'will retry'}): {error}")
+
+    def run(self):
+        """
+        Work through the queue until no job is runnable.
+
+        :return: Dict status -> number of jobs after the run
+        """
+        recovered = self.queue.recover()
+        if recovered:
+            print(f"Recovered {recovered} jobs leased by a previous run.")
+        pool = self._new_pool()
+        running = {}
+        try:
+            while True:
+                in_flight = Counter(job['exchange'] for job in running.values())
+                leased = self.queue.lease(self.owner, self.processes - len(running), self.lease_ms,
+                                          self.caps, in_flight)
+                for job in leased.to_dict('records'):
+                    running[pool.submit(run_job, job, self.factory)] = job
+
+                if not running:
+                    due = self.queue.next_due()
+                    if due is None:
+                        break
+                    # Only retries in backoff are left
+                    time.sleep(max(due - time.time() * 1000, 0) / 1000)
+                    continue
+
+                done, _ = wait(running, timeout=self.lease_ms / 3000, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        df, worker_metrics = future.result()
+                    except Exception as e:
+                        self._fail(job, e)
+                        continue
+                    METRICS.merge(worker_metrics)
+                    self._store(job, df)
+
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                    # A worker died; the remaining futures are lost with the pool
+                    for job in running.values():
+                        self._fail(job, 'worker process died')
+                    running = {}
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self._new_pool()
+                self.queue.renew(self.owner, [job['job_id'] for job in running.values()]
+                                 + [jid for jid, _ in self._stored], self.lease_ms)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            self.db.flush()
+        return self.queue.counts()
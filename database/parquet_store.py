@@ -0,0 +1,134 @@
+import os
+import glob
+import duckdb
+import pandas as pd
+from datetime import datetime, timezone
+
+TABLES = ('fundings', 'ohlcv')
+PARTITION_COLUMNS = ['exchange', 'ticker', 'month']
+HIVE_TYPES = "{'exchange': VARCHAR, 'ticker': VARCHAR, 'month': VARCHAR}"
+MONTH_EXPR = "strftime(make_timestamp(timestamp * 1000), '%Y-%m')"
+
+def month_of(ts):
+    """
+    'YYYY-MM' partition value of a ms timestamp.
+    """
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+class ParquetStore:
+    """
+    Hive-partitioned Parquet copy of the `fundings` and `ohlcv` tables:
+
+        <root>/<table>/exchange=<e>/ticker=<t>/month=<YYYY-MM>/data_<uuid>.parquet
+
+    Files are zstd-compressed and written sorted by timestamp, so each row
+    group covers a contiguous time range. load() turns exchange / ticker /
+    time filters into partition pruning (only matching directories are
+    opened) and row-group min/max pruning (only overlapping row groups are
+    read), and projects only the requested columns.
+    """
+    def __init__(self, root, row_group_size=100_000):
+        """
+        :param root: Lake directory
+        :param row_group_size: Rows per Parquet row group
+        """
+        self.root = root
+        self.row_group_size = row_group_size
+
+    def _glob(self, table):
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return os.path.join(self.root, table, '**', '*.parquet')
+
+    def _has_files(self, table):
+        return bool(glob.glob(self._glob(table), recursive=True))
+
+    def _scan(self, table, filename=False):
+        return (f"read_parquet('{self._glob(table)}', hive_partitioning = true, "
+                f"hive_types = {HIVE_TYPES}, union_by_name = true, filename = {str(filename).lower()})")
+
+    @staticmethod
+    def _filters(exchange=None, ticker=None, start_ts=None, end_ts=None):
+        clauses, params = [], []
+        if exchange is not None:
+            clauses.append('exchange = ?')
+            params.append(exchange)
+        if ticker is not None:
+            tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+            clauses.append(f"ticker IN ({', '.join('?' * len(tickers))})")
+            params.extend(tickers)
+        if start_ts is not None:
+            clauses += ['month >= ?', 'timestamp >= ?']
+            params += [month_of(start_ts), start_ts]
+        if end_ts is not None:
+            clauses += ['month <= ?', 'timestamp <= ?']
+            params += [month_of(end_ts), end_ts]
+        return ' AND '.join(clauses) or 'true', params
+
+    def export(self, con, table, exchange=None, start_ts=None):
+        """
+        Write (or rewrite) the partitions of `table` holding rows at or after
+        `start_ts`. Whole months are rewritten, so re-exporting is idempotent
+        and an incremental export only touches the months that changed.
+
+        :param con: duckdb connection holding `table`
+        :param table: 'fundings' or 'ohlcv'
+        :param exchange: Optional exchange filter
+        :param start_ts: Optional ms timestamp; earlier months are left as they are
+        :return: Number of rows written
+        """
+        where, params = self._filters(exchange)
+        if start_ts is not None:
+            where += f" AND {MONTH_EXPR} >= ?"
+            params.append(month_of(start_ts))
+        selected = f"SELECT *, {MONTH_EXPR} AS month FROM {table} WHERE {where}"
+
+        if self._has_files(table):
+            # Drop the files of every partition about to be rewritten
+            stale = con.execute(f"""
+                SELECT DISTINCT p.filename FROM {self._scan(table, filename=True)} p
+                SEMI JOIN (SELECT DISTINCT exchange, ticker, month FROM ({selected})) s
+                USING (exchange, ticker, month)
+            """, params).fetchall()
+            for (path,) in stale:
+                os.remove(path)
+
+        rows = con.execute(f"SELECT count(*) FROM ({selected})", params).fetchone()[0]
+        if rows:
+            con.execute(f"""
+                COPY ({selected} ORDER BY exchange, ticker, timestamp)
+                TO '{os.path.join(self.root, table)}'
+                (FORMAT parquet, PARTITION_BY ({', '.join(PARTITION_COLUMNS)}), COMPRESSION zstd,
+                 ROW_GROUP_SIZE {self.row_group_size}, APPEND, FILENAME_PATTERN 'data_{{uuid}}')
+            """, params)
+        return rows
+
+    def export_all(self, con, exchange=None, start_ts=None):
+        """
+        export() every table.
+
+        :return: Dict table -> rows written
+        """
+        return {table: self.export(con, table, exchange, start_ts) for table in TABLES}
+
+    def load(self, table, exchange=None, ticker=None, start_ts=None, end_ts=None, columns=None, con=None):
+        """
+        Read one slice of the lake into pandas.
+
+        :param table: 'fundings' or 'ohlcv'
+        :param exchange: Optional exchange name
+        :param ticker: Optional ticker or list of tickers
+        :param start_ts: Optional inclusive start (ms timestamp)
+        :param end_ts: Optional inclusive end (ms timestamp)
+        :param columns: Columns to read (default: all)
+        :param con: Optional duckdb connection (default: a private in-memory one)
+        :return: DataFrame sorted by exchange, ticker, timestamp
+        """
+        if not self._has_files(table):
+            return pd.DataFrame(columns=columns)
+        con = con or duckdb.connect()
+        where, params = self._filters(exchange, ticker, start_ts, end_ts)
+        select = ', '.join(columns) if columns else '* EXCLUDE (month)'
+        order = [c for c in ('exchange', 'ticker', 'timestamp') if not columns or c in columns]
+        order_by = f"ORDER BY {', '.join(order)}" if order else ''
+        return con.execute(f"SELECT {select} FROM {self._scan(table)} WHERE {where} {order_by}", params).fetchdf()
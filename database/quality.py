@@ -0,0 +1,381 @@
+import pandas as pd
+from collector.symbols import map_by_asset
+from .database_manager import RANGE_COLUMNS
+from .funding_panel import PANEL_EXCHANGE_A, PANEL_EXCHANGE_B
+
+HOUR_MS = 60 * 60 * 1000
+# Funding rows before the context start that are re-read so lag() sees the
+# previous settlement of each leg
+LOOKBACK_MS = 48 * HOUR_MS
+
+FLAGS_DDL = """
+    CREATE TABLE IF NOT EXISTS quality_flags (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        table_name VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        flag VARCHAR NOT NULL,
+        value DOUBLE,
+        PRIMARY KEY (exchange, ticker, table_name, timestamp, flag)
+    )
+"""
+
+DIVERGENCE_DDL = """
+    CREATE TABLE IF NOT EXISTS divergence (
+        asset VARCHAR NOT NULL,
+        timestamp BIGINT NOT NULL,
+        price_a DOUBLE,
+        price_b DOUBLE,
+        price_divergence DOUBLE,
+        rate_a DOUBLE,
+        rate_b DOUBLE,
+        funding_divergence DOUBLE,
+        price_z DOUBLE,
+        funding_z DOUBLE,
+        divergence_index DOUBLE,
+        PRIMARY KEY (asset, timestamp)
+    )
+"""
+
+ASSET_MAP_DDL = """
+    CREATE TABLE IF NOT EXISTS quality_asset_map (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        asset VARCHAR,
+        leg VARCHAR,
+        multiplier DOUBLE,
+        PRIMARY KEY (exchange, ticker)
+    )
+"""
+
+# Stored rows without any flag; an anti join on the quality_flags key
+CLEAN_VIEW = """
+    CREATE OR REPLACE VIEW {table}_clean AS
+    SELECT t.* FROM {table} t
+    ANTI JOIN quality_flags q
+        ON q.exchange = t.exchange AND q.ticker = t.ticker
+       AND q.table_name = '{table}' AND q.timestamp = t.timestamp
+"""
+
+class DataQuality:
+    """
+    Validates stored candles and funding rows in DuckDB and cross-checks the
+    two venues of the funding pair.
+
+    `quality_flags` holds one row per flagged (exchange, ticker, table_name,
+    timestamp, flag); clean rows take no space. Flags:
+      ohlcv     zero_volume   - volume is 0 or missing (value: volume)
+                bad_ohlc      - non-positive close, or open/close outside [low, high] (value: close)
+                stale_close   - close unchanged for `stale_bars` consecutive candles (value: close)
+                price_jump    - |log return| above `jump_sigma` standard deviations of the
+                                previous `window` returns (value: log return)
+      fundings  funding_spike - rate further than `spike_sigma` standard deviations (and at
+                                least `min_spike`) from the mean of the previous `window`
+                                settlements (value: funding rate)
+    The `ohlcv_clean` and `fundings_clean` views drop every flagged row.
+
+    `divergence` holds, per asset and hour where both venues have a candle,
+    the per-unit closes and their relative difference, the per-hour funding
+    of each leg and its difference, each difference's z-score against the
+    previous `divergence_window` hours, and divergence_index, the larger
+    absolute z-score. Hourly closes are aggregated from `ohlcv` directly, as
+    the `ohlcv_1h` rollup is only refreshed after collection.
+
+    Only the ingested batch is checked: given the time range written per
+    series, flags are recomputed over that range (reading `window` earlier
+    rows for context) and divergence from the first touched hour of each
+    affected asset. Passing a DatabaseManager runs the check inside every
+    flush, atomically with the rows it describes.
+    """
+    def __init__(self, con, db=None, exchange_a=PANEL_EXCHANGE_A, exchange_b=PANEL_EXCHANGE_B, window=48,
+                 stale_bars=3, jump_sigma=8.0, spike_sigma=6.0, min_spike=0.0005, min_periods=10,
+                 divergence_window=168):
+        """
+        :param con: duckdb connection holding `ohlcv` and `fundings`
+        :param db: Optional DatabaseManager on `con`; every flush is checked as it is written
+        :param exchange_a: First venue of the divergence index
+        :param exchange_b: Second venue of the divergence index
+        :param window: Previous observations used for the jump / spike statistics
+        :param stale_bars: Consecutive identical closes flagged as stale
+        :param jump_sigma: Return threshold in standard deviations
+        :param spike_sigma: Funding threshold in standard deviations
+        :param min_spike: Smallest funding deviation flagged as a spike
+        :param min_periods: Previous observations needed before jumps / spikes are flagged
+                            and divergence z-scores are computed
+        :param divergence_window: Hours of history the divergence z-scores are measured against
+        """
+        self.con = con
+        self.exchange_a = exchange_a
+        self.exchange_b = exchange_b
+        self.window = window
+        self.stale_bars = stale_bars
+        self.jump_sigma = jump_sigma
+        self.spike_sigma = spike_sigma
+        self.min_spike = min_spike
+        self.min_periods = min_periods
+        self.divergence_window = divergence_window
+        for ddl in (FLAGS_DDL, DIVERGENCE_DDL, ASSET_MAP_DDL):
+            self.con.execute(ddl)
+        for table in ('ohlcv', 'fundings'):
+            self.con.execute(CLEAN_VIEW.format(table=table))
+        if db is not None:
+            db.add_flush_hook(lambda con: self._check(db.flushed_ranges))
+
+    def check(self, ranges):
+        """
+        Flag the given rows and update the divergence of the assets they belong to.
+
+        :param ranges: DataFrame with table_name ('ohlcv' / 'fundings'), exchange, ticker,
+                       from_ts and to_ts, one row per series (e.g. DatabaseManager.flushed_ranges)
+        :return: Dict with the number of 'flags' and 'divergence' rows written
+        """
+        self.con.begin()
+        try:
+            result = self._check(ranges)
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        return result
+
+    def rebuild(self):
+        """
+        Check every stored series from its first row (e.g. after changing thresholds).
+
+        :return: Same as check()
+        """
+        ranges = self.con.execute("""
+            SELECT 'ohlcv' AS table_name, exchange, ticker, min(timestamp) AS from_ts, max(timestamp) AS to_ts
+            FROM ohlcv GROUP BY ALL
+            UNION ALL
+            SELECT 'fundings', exchange, ticker, min(timestamp), max(timestamp) FROM fundings GROUP BY ALL
+        """).fetchdf()
+        self.con.begin()
+        try:
+            for table in ('quality_flags', 'divergence', 'quality_asset_map'):
+                self.con.execute(f"DELETE FROM {table}")
+            result = self._check(ranges)
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        return result
+
+    def _check(self, ranges):
+        if ranges is None or len(ranges) == 0:
+            return {'flags': 0, 'divergence': 0}
+        ranges = pd.DataFrame(ranges)[RANGE_COLUMNS].astype(
+            {'table_name': str, 'exchange': str, 'ticker': str, 'from_ts': 'int64', 'to_ts': 'int64'})
+        self.con.register('_quality_ranges', ranges)
+        try:
+            self.con.execute("""
+                DELETE FROM quality_flags USING _quality_ranges r
+                WHERE quality_flags.exchange = r.exchange AND quality_flags.ticker = r.ticker
+                  AND quality_flags.table_name = r.table_name
+                  AND quality_flags.timestamp BETWEEN r.from_ts AND r.to_ts
+            """)
+            flags = self._flag_ohlcv() + self._flag_fundings()
+            divergence = self._update_divergence(ranges)
+        finally:
+            self.con.unregister('_quality_ranges')
+        return {'flags': flags, 'divergence': divergence}
+
+    def _context(self, table, columns):
+        """
+        Rows of `table` inside each range of _quality_ranges, plus the
+        `window` rows before it, tagged with the range start.
+        """
+        return f"""
+            SELECT t.exchange, t.ticker, t.timestamp, {', '.join('t.' + c for c in columns)}, r.from_ts
+            FROM {table} t
+            JOIN _quality_ranges r ON r.table_name = '{table}' AND r.exchange = t.exchange AND r.ticker = t.ticker
+            WHERE t.timestamp <= r.to_ts
+            QUALIFY t.timestamp >= r.from_ts
+                 OR row_number() OVER (PARTITION BY t.exchange, t.ticker, t.timestamp >= r.from_ts
+                                       ORDER BY t.timestamp DESC) <= {self.window + self.stale_bars}
+        """
+
+    def _flag_ohlcv(self):
+        return self.con.execute(f"""
+            INSERT OR REPLACE INTO quality_flags
+            WITH c AS ({self._context('ohlcv', ['open', 'high', 'low', 'close', 'volume'])}),
+            r AS (
+                SELECT *,
+                       CASE WHEN close > 0 AND lag(close) OVER w > 0 THEN ln(close / lag(close) OVER w) END AS ret,
+                       count(*) OVER s = {self.stale_bars} AND max(close) OVER s = min(close) OVER s AS stale
+                FROM c
+                WINDOW w AS (PARTITION BY exchange, ticker ORDER BY timestamp),
+                       s AS (PARTITION BY exchange, ticker ORDER BY timestamp
+                             ROWS BETWEEN {self.stale_bars - 1} PRECEDING AND CURRENT ROW)
+            ),
+            x AS MATERIALIZED (
+                SELECT *,
+                       stddev_samp(ret) OVER p AS ret_std,
+                       count(ret) OVER p AS ret_n
+                FROM r
+                WINDOW p AS (PARTITION BY exchange, ticker ORDER BY timestamp
+                             ROWS BETWEEN {self.window} PRECEDING AND 1 PRECEDING)
+                QUALIFY timestamp >= from_ts
+            )
+            SELECT exchange, ticker, 'ohlcv', timestamp, 'zero_volume', volume FROM x
+            WHERE coalesce(volume, 0) <= 0
+            UNION ALL
+            SELECT exchange, ticker, 'ohlcv', timestamp, 'bad_ohlc', close FROM x
+            WHERE close <= 0 OR high < low OR greatest(open, close) > high OR least(open, close) < low
+            UNION ALL
+            SELECT exchange, ticker, 'ohlcv', timestamp, 'stale_close', close FROM x WHERE stale
+            UNION ALL
+            SELECT exchange, ticker, 'ohlcv', timestamp, 'price_jump', ret FROM x
+            WHERE ret_n >= {self.min_periods} AND abs(ret) > {self.jump_sigma} * ret_std
+        """).fetchone()[0]
+
+    def _flag_fundings(self):
+        return self.con.execute(f"""
+            INSERT OR REPLACE INTO quality_flags
+            WITH c AS ({self._context('fundings', ['funding_rate'])}),
+            x AS (
+                SELECT *,
+                       avg(funding_rate) OVER p AS mean,
+                       coalesce(stddev_samp(funding_rate) OVER p, 0) AS std,
+                       count(funding_rate) OVER p AS n
+                FROM c
+                WINDOW p AS (PARTITION BY exchange, ticker ORDER BY timestamp
+                             ROWS BETWEEN {self.window} PRECEDING AND 1 PRECEDING)
+                QUALIFY timestamp >= from_ts
+            )
+            SELECT exchange, ticker, 'fundings', timestamp, 'funding_spike', funding_rate FROM x
+            WHERE n >= {self.min_periods}
+              AND abs(funding_rate - mean) > greatest({self.spike_sigma} * std, {self.min_spike})
+        """).fetchone()[0]
+
+    def refresh_asset_map(self, ranges):
+        """
+        Add tickers of both venues that the map has not seen yet, re-pairing
+        assets from every stored ticker when there are any.
+
+        :return: Set of assets whose ticker pairing changed
+        """
+        known = self.con.execute("SELECT exchange, ticker FROM quality_asset_map").fetchdf()
+        seen = set(zip(known['exchange'], known['ticker']))
+        venues = ranges[ranges['exchange'].isin([self.exchange_a, self.exchange_b])]
+        if all(key in seen for key in zip(venues['exchange'], venues['ticker'])):
+            return set()
+
+        tickers = self.con.execute("""
+            SELECT DISTINCT exchange, ticker FROM ohlcv WHERE exchange IN (?, ?)
+            UNION SELECT DISTINCT exchange, ticker FROM fundings WHERE exchange IN (?, ?)
+        """, [self.exchange_a, self.exchange_b] * 2).fetchdf()
+        legs = {'a': map_by_asset(tickers.loc[tickers['exchange'] == self.exchange_a, 'ticker']),
+                'b': map_by_asset(tickers.loc[tickers['exchange'] == self.exchange_b, 'ticker'])}
+        paired = set(legs['a']) & set(legs['b'])
+        chosen = {}
+        for leg, exchange in (('a', self.exchange_a), ('b', self.exchange_b)):
+            for asset in paired:
+                ticker, multiplier = legs[leg][asset]
+                chosen[(exchange, ticker)] = (asset, leg, float(multiplier))
+        new_map = pd.DataFrame(
+            [(exchange, ticker) + chosen.get((exchange, ticker), (None, None, None))
+             for exchange, ticker in zip(tickers['exchange'], tickers['ticker'])],
+            columns=['exchange', 'ticker', 'asset', 'leg', 'multiplier'])
+
+        old_map = self.con.execute(
+            "SELECT exchange, ticker, asset FROM quality_asset_map WHERE asset IS NOT NULL").fetchdf()
+        changed = (set(zip(old_map['exchange'], old_map['ticker'], old_map['asset']))
+                   ^ {(e, t, a) for e, t, a in zip(new_map['exchange'], new_map['ticker'], new_map['asset'])
+                      if a is not None})
+
+        self.con.execute("DELETE FROM quality_asset_map")
+        self.con.register('_new_quality_map', new_map)
+        self.con.execute("INSERT INTO quality_asset_map SELECT * FROM _new_quality_map")
+        self.con.unregister('_new_quality_map')
+        return {asset for _, _, asset in changed}
+
+    def _update_divergence(self, ranges):
+        changed = self.refresh_asset_map(ranges)
+        dirty = self.con.execute("""
+            SELECT m.asset, min(r.from_ts) // ? * ? AS from_ts
+            FROM _quality_ranges r JOIN quality_asset_map m USING (exchange, ticker)
+            WHERE m.asset IS NOT NULL GROUP BY m.asset
+        """, [HOUR_MS, HOUR_MS]).fetchdf()
+        dirty = pd.concat([dirty[~dirty['asset'].isin(changed)],
+                           pd.DataFrame({'asset': sorted(changed), 'from_ts': 0})], ignore_index=True)
+        self.con.execute("DELETE FROM divergence WHERE asset NOT IN "
+                         "(SELECT asset FROM quality_asset_map WHERE asset IS NOT NULL)")
+        if dirty.empty:
+            return 0
+
+        dirty = dirty.astype({'asset': str, 'from_ts': 'int64'})
+        context_ms = self.divergence_window * HOUR_MS
+        self.con.register('_divergence_dirty', dirty)
+        try:
+            self.con.execute("""
+                DELETE FROM divergence USING _divergence_dirty d
+                WHERE divergence.asset = d.asset AND divergence.timestamp >= d.from_ts
+            """)
+            return self.con.execute(f"""
+                INSERT INTO divergence
+                WITH prices AS (
+                    SELECT m.asset, m.leg, t.timestamp // {HOUR_MS} * {HOUR_MS} AS hour,
+                           arg_max(t.close / m.multiplier, t.timestamp) AS price
+                    FROM ohlcv t
+                    JOIN quality_asset_map m USING (exchange, ticker)
+                    JOIN _divergence_dirty d ON d.asset = m.asset
+                    WHERE t.timestamp >= d.from_ts - {context_ms}
+                    GROUP BY ALL
+                ),
+                rates AS (
+                    SELECT m.asset, m.leg, f.timestamp,
+                           f.funding_rate / greatest(round(coalesce(
+                               f.timestamp - lag(f.timestamp) OVER w,
+                               lead(f.timestamp) OVER w - f.timestamp,
+                               {HOUR_MS}) / {HOUR_MS}), 1) AS rate_hourly
+                    FROM fundings f
+                    JOIN quality_asset_map m USING (exchange, ticker)
+                    JOIN _divergence_dirty d ON d.asset = m.asset
+                    WHERE f.timestamp >= d.from_ts - {context_ms + LOOKBACK_MS}
+                    WINDOW w AS (PARTITION BY f.exchange, f.ticker ORDER BY f.timestamp)
+                ),
+                rate_a AS (SELECT * FROM rates WHERE leg = 'a' ORDER BY asset, timestamp),
+                rate_b AS (SELECT * FROM rates WHERE leg = 'b' ORDER BY asset, timestamp),
+                pairs AS (
+                    SELECT a.asset, a.hour, a.price AS price_a, b.price AS price_b,
+                           b.price / a.price - 1 AS price_divergence
+                    FROM prices a JOIN prices b ON b.asset = a.asset AND b.hour = a.hour AND b.leg = 'b'
+                    WHERE a.leg = 'a'
+                ),
+                spreads AS (
+                    SELECT p.*, ra.rate_hourly AS rate_a, rb.rate_hourly AS rate_b,
+                           rb.rate_hourly - ra.rate_hourly AS funding_divergence
+                    FROM pairs p
+                    ASOF LEFT JOIN rate_a ra ON p.asset = ra.asset AND p.hour + {HOUR_MS} - 1 >= ra.timestamp
+                    ASOF LEFT JOIN rate_b rb ON p.asset = rb.asset AND p.hour + {HOUR_MS} - 1 >= rb.timestamp
+                ),
+                scored AS (
+                    SELECT *,
+                           CASE WHEN count(price_divergence) OVER h >= {self.min_periods} THEN
+                               (price_divergence - avg(price_divergence) OVER h)
+                                   / nullif(stddev_samp(price_divergence) OVER h, 0) END AS price_z,
+                           CASE WHEN count(funding_divergence) OVER h >= {self.min_periods} THEN
+                               (funding_divergence - avg(funding_divergence) OVER h)
+                                   / nullif(stddev_samp(funding_divergence) OVER h, 0) END AS funding_z
+                    FROM spreads
+                    WINDOW h AS (PARTITION BY asset ORDER BY hour
+                                 RANGE BETWEEN {context_ms} PRECEDING AND {HOUR_MS} PRECEDING)
+                )
+                SELECT s.asset, s.hour, s.price_a, s.price_b, s.price_divergence,
+                       s.rate_a, s.rate_b, s.funding_divergence, s.price_z, s.funding_z,
+                       greatest(abs(s.price_z), abs(s.funding_z))
+                FROM scored s JOIN _divergence_dirty d ON d.asset = s.asset
+                WHERE s.hour >= d.from_ts
+            """).fetchone()[0]
+        finally:
+            self.con.unregister('_divergence_dirty')
+
+    def summary(self):
+        """
+        :return: DataFrame of flagged rows per exchange, table and flag
+        """
+        return self.con.execute("""
+            SELECT exchange, table_name, flag, count(*) AS rows, count(DISTINCT ticker) AS tickers
+            FROM quality_flags GROUP BY ALL ORDER BY exchange, table_name, flag
+        """).fetchdf()
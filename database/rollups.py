@@ -0,0 +1,202 @@
+import ccxt
+
+# Coarser views kept materialized on top of the collected timeframe
+DEFAULT_TIMEFRAMES = ('5m', '15m', '1h', '4h', '1d')
+
+ROLLUP_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS ohlcv_rollup_state (
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        timeframe VARCHAR NOT NULL,
+        max_ts BIGINT,
+        base_timeframe VARCHAR,
+        PRIMARY KEY (exchange, ticker, timeframe)
+    )
+"""
+
+def timeframe_ms(timeframe):
+    return ccxt.Exchange.parse_timeframe(timeframe) * 1000
+
+def rollup_table(timeframe):
+    return f"ohlcv_{timeframe}"
+
+def _rollup_bases(con):
+    return [row[0] for row in con.execute(
+        "SELECT DISTINCT base_timeframe FROM ohlcv_rollup_state WHERE base_timeframe IS NOT NULL").fetchall()]
+
+def candle_table(con, timeframe='1h'):
+    """
+    Table to read `timeframe` candles from: its materialized rollup when the
+    rollups record a finer base timeframe, else `ohlcv` itself. A rollup left
+    over from a different base is never used.
+    """
+    tables = set(con.execute("SELECT table_name FROM duckdb_tables()").fetchdf()['table_name'])
+    if 'ohlcv_rollup_state' not in tables or rollup_table(timeframe) not in tables:
+        return 'ohlcv'
+    bases = _rollup_bases(con)
+    if len(bases) == 1 and timeframe_ms(bases[0]) < timeframe_ms(timeframe):
+        return rollup_table(timeframe)
+    return 'ohlcv'
+
+class OHLCVRollups:
+    """
+    Materialized coarser candles built from the `ohlcv` table, which holds the
+    finest timeframe collected (`base_timeframe`).
+
+    Each rollup `ohlcv_<tf>` has the same schema as `ohlcv`, with buckets
+    aligned to UTC epoch multiples of the timeframe (open = first,
+    high = max, low = min, close = last, volume = sum).
+
+    refresh() is incremental: per series and timeframe it recomputes only
+    from the bucket holding the last row already rolled up, so the partial
+    bucket at the head is completed and older buckets are left alone.
+
+    The base timeframe is recorded with the rollup state; opening the rollups
+    with a different base raises instead of mixing candle sizes.
+    """
+    def __init__(self, con, base_timeframe='1h', timeframes=DEFAULT_TIMEFRAMES):
+        """
+        :param con: duckdb connection holding `ohlcv`
+        :param base_timeframe: Timeframe of the rows stored in `ohlcv`
+        :param timeframes: Candidate rollups; those not coarser than, or not a
+                           multiple of, the base timeframe are skipped
+        """
+        self.con = con
+        self.base_timeframe = base_timeframe
+        base_ms = timeframe_ms(base_timeframe)
+        self.timeframes = [tf for tf in timeframes
+                           if timeframe_ms(tf) > base_ms and timeframe_ms(tf) % base_ms == 0]
+        self.con.execute(ROLLUP_STATE_DDL)
+        # State tables created before the base was recorded
+        self.con.execute("ALTER TABLE ohlcv_rollup_state ADD COLUMN IF NOT EXISTS base_timeframe VARCHAR")
+        other = [tf for tf in _rollup_bases(self.con) if tf != base_timeframe]
+        if other:
+            raise ValueError(f"ohlcv rollups were built from {other[0]} candles, not {base_timeframe}; "
+                             f"collect with --timeframe {other[0]} or drop the rollup tables")
+        for tf in self.timeframes:
+            self.con.execute(f"""
+                CREATE TABLE IF NOT EXISTS {rollup_table(tf)} (
+                    exchange VARCHAR NOT NULL,
+                    ticker VARCHAR NOT NULL,
+                    timestamp BIGINT NOT NULL,
+                    datetime TIMESTAMP,
+                    open DOUBLE,
+                    high DOUBLE,
+                    low DOUBLE,
+                    close DOUBLE,
+                    volume DOUBLE,
+                    PRIMARY KEY (exchange, ticker, timestamp)
+                )
+            """)
+
+    def _dirty(self, timeframe, step, full, since_ts):
+        dirty = self.con.execute("""
+            WITH latest AS (
+                SELECT exchange, ticker, max(timestamp) AS new_ts FROM ohlcv GROUP BY ALL
+            )
+            SELECT l.exchange, l.ticker, s.max_ts AS done_ts, l.new_ts
+            FROM latest l
+            LEFT JOIN ohlcv_rollup_state s
+                   ON s.exchange = l.exchange AND s.ticker = l.ticker AND s.timeframe = ?
+        """, [timeframe]).fetchdf()
+        reset = dirty['done_ts'].isna() | full
+        stale = dirty['done_ts'] < dirty['new_ts']
+        from_ts = (dirty['done_ts'].fillna(0).astype('int64') // step) * step
+        from_ts[reset] = 0
+        if isinstance(since_ts, dict):
+            # Only the repaired series go back, each to its own earliest change
+            for i, key in enumerate(zip(dirty['exchange'], dirty['ticker'])):
+                if key in since_ts:
+                    from_ts.iat[i] = min(from_ts.iat[i], (since_ts[key] // step) * step)
+                    stale.iat[i] = True
+        elif since_ts is not None:
+            from_ts = from_ts.clip(upper=(since_ts // step) * step)
+            stale[:] = True
+        dirty['from_ts'] = from_ts
+        return dirty.loc[reset | stale, ['exchange', 'ticker', 'from_ts']]
+
+    def refresh(self, full=False, since_ts=None):
+        """
+        Bring every rollup up to date with `ohlcv`.
+
+        :param full: Recompute every bucket
+        :param since_ts: Also recompute buckets from this ms timestamp on (e.g.
+                         after backfilling older candles), or a dict
+                         (exchange, ticker) -> ms timestamp to recompute only
+                         those series
+        :return: Dict timeframe -> buckets written
+        """
+        written = {}
+        self.con.begin()
+        try:
+            for tf in self.timeframes:
+                step = timeframe_ms(tf)
+                dirty = self._dirty(tf, step, full, since_ts)
+                if dirty.empty:
+                    written[tf] = 0
+                    continue
+                self.con.register('_rollup_dirty', dirty)
+                written[tf] = self.con.execute(f"""
+                    INSERT OR REPLACE INTO {rollup_table(tf)}
+                    SELECT o.exchange, o.ticker, o.timestamp // {step} * {step} AS bucket,
+                           make_timestamp(bucket * 1000),
+                           arg_min(o.open, o.timestamp), max(o.high), min(o.low),
+                           arg_max(o.close, o.timestamp), sum(o.volume)
+                    FROM ohlcv o JOIN _rollup_dirty d USING (exchange, ticker)
+                    WHERE o.timestamp >= d.from_ts
+                    GROUP BY o.exchange, o.ticker, bucket
+                """).fetchone()[0]
+                self.con.execute("""
+                    INSERT OR REPLACE INTO ohlcv_rollup_state (exchange, ticker, timeframe, max_ts, base_timeframe)
+                    SELECT o.exchange, o.ticker, ?, max(o.timestamp), ?
+                    FROM ohlcv o JOIN _rollup_dirty d USING (exchange, ticker)
+                    GROUP BY o.exchange, o.ticker
+                """, [tf, self.base_timeframe])
+                self.con.unregister('_rollup_dirty')
+            self.con.commit()
+        except Exception:
+            self.con.rollback()
+            raise
+        return written
+
+    def available(self):
+        """
+        Timeframes readable without touching the exchange, finest first.
+        """
+        return [self.base_timeframe] + self.timeframes
+
+    def load(self, timeframe, exchange=None, ticker=None, start_ts=None, end_ts=None):
+        """
+        Candles at any timeframe that is a multiple of the base timeframe.
+        Materialized rollups are read directly; other timeframes are
+        aggregated on the fly from the coarsest stored table that divides them.
+
+        :return: DataFrame with exchange, ticker, timestamp, datetime, open, high, low, close, volume
+        """
+        step = timeframe_ms(timeframe)
+        sources = [tf for tf in self.available() if step % timeframe_ms(tf) == 0]
+        if not sources:
+            raise ValueError(f"{timeframe} cannot be built from {self.base_timeframe} candles")
+        source = max(sources, key=timeframe_ms)
+        table = 'ohlcv' if source == self.base_timeframe else rollup_table(source)
+
+        clauses, params = [], []
+        for column, op, value in (('exchange', '=', exchange), ('ticker', '=', ticker),
+                                  ('timestamp', '>=', start_ts), ('timestamp', '<=', end_ts)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = ' AND '.join(clauses) or 'true'
+
+        if source == timeframe:
+            query = f"SELECT * FROM {table} WHERE {where}"
+        else:
+            query = f"""
+                SELECT exchange, ticker, timestamp // {step} * {step} AS bucket, make_timestamp(bucket * 1000) AS datetime,
+                       arg_min(open, timestamp) AS open, max(high) AS high, min(low) AS low,
+                       arg_max(close, timestamp) AS close, sum(volume) AS volume
+                FROM {table} WHERE {where}
+                GROUP BY exchange, ticker, bucket
+            """
+            query = f"SELECT * RENAME (bucket AS timestamp) FROM ({query})"
+        return self.con.execute(f"{query} ORDER BY exchange, ticker, timestamp", params).fetchdf()
@@ -0,0 +1,154 @@
+from collector.rolling import RollingStats
+
+# One week of hourly spreads / funding settlements
+DEFAULT_WINDOW = 168
+DEFAULT_HALFLIFE = 24
+
+# Funding series written by flushes since the last checkpoint
+DIRTY_DDL = """
+    CREATE TABLE IF NOT EXISTS funding_signals_dirty (
+        name VARCHAR NOT NULL,
+        exchange VARCHAR NOT NULL,
+        ticker VARCHAR NOT NULL,
+        from_ts BIGINT,
+        to_ts BIGINT,
+        PRIMARY KEY (name, exchange, ticker)
+    )
+"""
+
+class FundingSignals:
+    """
+    Rolling statistics of funding, kept current without rescanning history.
+
+      rates   - per 'exchange:ticker', fed with raw funding rows (collector
+                chunks via on_funding, or rows newer than the checkpoint in
+                `fundings` via catch_up)
+      spreads - per asset of the FundingAligner exchange pair, fed with the
+                hourly spread of new `funding_panel` rows
+
+    State is restored from the DuckDB checkpoint on construction and written
+    back by checkpoint(), so a restart only processes rows it has not seen.
+    When attached to the DatabaseManager, every flush records the funding
+    series it wrote (inside the flush transaction), and catch_up() reads only
+    those series instead of scanning all of `fundings`.
+    """
+    def __init__(self, con, db=None, window=DEFAULT_WINDOW, halflife=DEFAULT_HALFLIFE, name='funding'):
+        """
+        :param con: duckdb connection holding `fundings` (and `funding_panel`)
+        :param db: Optional DatabaseManager on `con`; its flushes mark the written series dirty
+        :param window: Observations in the rolling window (ignored when a checkpoint exists)
+        :param halflife: EWMA half-life in observations (ignored when a checkpoint exists)
+        :param name: Checkpoint name prefix
+        """
+        self.con = con
+        self.name = name
+        self.rates = RollingStats.load(con, f"{name}_rates") or RollingStats(window, halflife)
+        self.spreads = RollingStats.load(con, f"{name}_spreads") or RollingStats(window, halflife)
+        self.con.execute(DIRTY_DDL)
+        self.tracked = db is not None
+        # Dirty rows read by the last catch_up, cleared by checkpoint()
+        self._consumed = None
+        if db is not None:
+            db.add_flush_hook(lambda con: self._record_dirty(db.flushed_ranges))
+
+    def _record_dirty(self, ranges):
+        ranges = ranges[ranges['table_name'] == 'fundings']
+        if ranges.empty:
+            return
+        ranges = ranges[['exchange', 'ticker', 'from_ts', 'to_ts']].astype(
+            {'exchange': str, 'ticker': str, 'from_ts': 'int64', 'to_ts': 'int64'})
+        self.con.register('_signal_flushed', ranges)
+        try:
+            self.con.execute("""
+                INSERT OR REPLACE INTO funding_signals_dirty
+                SELECT ?, r.exchange, r.ticker,
+                       least(r.from_ts, coalesce(d.from_ts, r.from_ts)),
+                       greatest(r.to_ts, coalesce(d.to_ts, r.to_ts))
+                FROM _signal_flushed r
+                LEFT JOIN funding_signals_dirty d ON d.name = ? AND d.exchange = r.exchange AND d.ticker = r.ticker
+            """, [self.name, self.name])
+        finally:
+            self.con.unregister('_signal_flushed')
+
+    def on_funding(self, chunk, exchange=None):
+        """
+        Feed funding rows as they come out of a collector.
+
+        :param chunk: DataFrame with ticker, timestamp and funding_rate (or fundingRate)
+        :param exchange: Exchange name, when the chunk has no 'exchange' column
+        :return: Number of observations applied
+        """
+        if chunk is None or chunk.empty:
+            return 0
+        rate_col = 'funding_rate' if 'funding_rate' in chunk.columns else 'fundingRate'
+        if 'exchange' not in chunk.columns:
+            chunk = chunk.assign(exchange=exchange)
+        return self.rates.update_frame(chunk, ['exchange', 'ticker'], rate_col)
+
+    def _newer_rows(self, stats, query, params=None):
+        """
+        Rows of `query` (with a `key` column) newer than their key's last
+        observation; keys without state get their whole history.
+        """
+        marks = stats.snapshot()[['last_ts']].reset_index()
+        self.con.register('_signal_marks', marks)
+        try:
+            return self.con.execute(f"""
+                SELECT q.* FROM ({query}) q
+                LEFT JOIN _signal_marks m ON m.key = q.key
+                WHERE m.last_ts IS NULL OR q.timestamp > m.last_ts
+                ORDER BY q.timestamp
+            """, params or []).fetchdf()
+        finally:
+            self.con.unregister('_signal_marks')
+
+    def catch_up(self):
+        """
+        Feed every `fundings` and `funding_panel` row newer than the state.
+        When attached to the DatabaseManager (and past the first run), only
+        the funding series flushed since the last checkpoint are read.
+
+        :return: Dict with observations applied to 'rates' and 'spreads'
+        """
+        self._consumed = self.con.execute(
+            "SELECT * FROM funding_signals_dirty WHERE name = ?", [self.name]).fetchdf()
+        if self.tracked and len(self.rates):
+            fundings = self._newer_rows(self.rates, """
+                SELECT f.exchange || ':' || f.ticker AS key, f.timestamp, f.funding_rate
+                FROM fundings f JOIN funding_signals_dirty d USING (exchange, ticker)
+                WHERE d.name = ? AND f.timestamp BETWEEN d.from_ts AND d.to_ts
+            """, [self.name])
+        else:
+            fundings = self._newer_rows(self.rates, """
+                SELECT exchange || ':' || ticker AS key, timestamp, funding_rate FROM fundings
+            """)
+        applied = {'rates': self.rates.update_frame(fundings, 'key', 'funding_rate'), 'spreads': 0}
+
+        has_panel = self.con.execute(
+            "SELECT count(*) FROM duckdb_tables() WHERE table_name = 'funding_panel'").fetchone()[0]
+        if has_panel:
+            spreads = self._newer_rows(self.spreads, """
+                SELECT asset AS key, timestamp, spread FROM funding_panel WHERE spread IS NOT NULL
+            """)
+            applied['spreads'] = self.spreads.update_frame(spreads, 'key', 'spread')
+        return applied
+
+    def checkpoint(self):
+        """
+        Persist both state tables in DuckDB and clear the dirty series the
+        last catch_up() read (series flushed since then stay dirty).
+        """
+        self.rates.save(self.con, f"{self.name}_rates")
+        self.spreads.save(self.con, f"{self.name}_spreads")
+        if self._consumed is not None and not self._consumed.empty:
+            self.con.register('_signal_consumed', self._consumed)
+            try:
+                self.con.execute("""
+                    DELETE FROM funding_signals_dirty USING _signal_consumed c
+                    WHERE funding_signals_dirty.name = c.name AND funding_signals_dirty.exchange = c.exchange
+                      AND funding_signals_dirty.ticker = c.ticker AND funding_signals_dirty.from_ts = c.from_ts
+                      AND funding_signals_dirty.to_ts = c.to_ts
+                """)
+            finally:
+                self.con.unregister('_signal_consumed')
+        self._consumed = None
@@ -0,0 +1,64 @@
+import os
+import sys
+import argparse
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.binance_futures import BinanceFuturesCollector
+from collector.hyperliquid import HyperliquidCollector
+from collector.base import to_timestamp
+from database.database_manager import DatabaseManager
+from database.gaps import GapScanner
+from database.funding_panel import FundingAligner
+from database.rollups import OHLCVRollups
+from database.quality import DataQuality
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find holes in the stored series and refetch only those ranges.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--table', choices=GapScanner.TABLES, action='append',
+                        help="Table to repair (repeatable, default: both)")
+    parser.add_argument('--timeframe', default='1h', help="Candle timeframe stored in ohlcv")
+    parser.add_argument('--dry-run', action='store_true', help="Only report the gaps")
+    parser.add_argument('--recheck', action='store_true', help="Also retry gaps that came back empty before")
+    parser.add_argument('--until', help="End date collection ran to (ISO); series ending earlier have a "
+                                        "truncated tail (default: the latest stored row per exchange)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = DatabaseManager(args.db)
+    scanner = GapScanner(db.con)
+    # Backfilled ranges are validated as they are flushed
+    DataQuality(db.con, db)
+    # Backfilled funding rows mark their own ranges of the panel dirty
+    aligner = FundingAligner(db.con, db)
+    collectors = {'binance_futures': BinanceFuturesCollector(), 'hyperliquid': HyperliquidCollector()}
+    cadence = {name: c.funding_interval_ms for name, c in collectors.items()}
+
+    end_ts = to_timestamp(args.until) if args.until else None
+
+    ohlcv_since = {}
+    for table in args.table or GapScanner.TABLES:
+        gaps = scanner.find_gaps(table, cadence_ms=cadence if table == 'fundings' else None, recheck=args.recheck,
+                                 end_ts=end_ts)
+        print(f"{table}: {len(gaps)} gaps, ~{int(gaps['missing'].sum()) if len(gaps) else 0} missing rows "
+              f"in {gaps[['exchange', 'ticker']].drop_duplicates().shape[0]} series")
+        if args.dry_run or gaps.empty:
+            continue
+        result = scanner.backfill(db, collectors, table, gaps, timeframe=args.timeframe)
+        if table == 'ohlcv' and result['rows']:
+            # Earliest repaired candle per series; other series keep their rollups
+            ohlcv_since = {key: int(ts) for key, ts in gaps.groupby(['exchange', 'ticker'])['gap_start'].min().items()}
+        print(f"  {result['requests']} ranges refetched ({result['failed']} failed), {result['rows']} rows stored")
+
+    if not args.dry_run:
+        print(f"Funding panel: {aligner.refresh()} rows updated.")
+        if ohlcv_since:
+            rollups = OHLCVRollups(db.con, base_timeframe=args.timeframe)
+            print(f"OHLCV rollups: {rollups.refresh(since_ts=ohlcv_since)} buckets updated.")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import argparse
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database_manager import DatabaseManager
+from database.quality import DataQuality
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Report data-quality flags and the largest cross-venue divergences.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Recheck every stored row (e.g. for data collected before flags existed)")
+    parser.add_argument('--top', type=int, default=20, help="Divergence rows to print (default 20)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = DatabaseManager(args.db)
+    quality = DataQuality(db.con)
+    if args.rebuild:
+        print(f"Rebuilt: {quality.rebuild()}")
+    print(quality.summary().to_string(index=False))
+
+    top = db.con.execute("""
+        SELECT asset, make_timestamp(timestamp * 1000) AS hour, price_divergence, funding_divergence,
+               price_z, funding_z, divergence_index
+        FROM divergence WHERE divergence_index IS NOT NULL
+        ORDER BY divergence_index DESC LIMIT ?
+    """, [args.top]).fetchdf()
+    print(f"\nTop {args.top} cross-venue divergences:")
+    print(top.to_string(index=False))
+    db.close()
+
+if __name__ == "__main__":
+    main()
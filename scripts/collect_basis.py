@@ -0,0 +1,36 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.binance_futures import BinanceFuturesCollector
+from collector.binance_spot import BinanceSpotCollector
+from database.database_manager import DatabaseManager
+from database.basis import BasisBuilder
+from scripts.collect_full_data import collect_basis_data
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect Binance spot and perp candles for matched assets and build the basis table.")
+    parser.add_argument('--db', default='data/crypto.duckdb', help="DuckDB file (default data/crypto.duckdb)")
+    parser.add_argument('--days', type=int, default=365, help="History to collect in days (default 365)")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent requests (default 4)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    db = DatabaseManager(args.db)
+
+    end_date = datetime.now(timezone.utc)
+    start_date = end_date - timedelta(days=args.days)
+    print(f"Collection period: {start_date} to {end_date}")
+
+    collect_basis_data(BinanceSpotCollector(), BinanceFuturesCollector(), db, start_date, end_date, args.workers)
+    db.flush()
+    print(f"Basis: {BasisBuilder(db.con).refresh()} rows updated.")
+    db.close()
+
+if __name__ == "__main__":
+    main()
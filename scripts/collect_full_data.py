@@ -1,109 +1,484 @@
 import os
 import sys
 import time
+import queue
+import asyncio
+import argparse
 import ccxt
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from collector.binance_futures import BinanceFuturesCollector
+from collector.binance_spot import BinanceSpotCollector
 from collector.hyperliquid import HyperliquidCollector
+from collector.async_binance_futures import AsyncBinanceFuturesCollector
+from collector.async_hyperliquid import AsyncHyperliquidCollector
+from collector.windows import page_window_ms
+from collector.symbols import pair_spot_perp
+from collector.metrics import METRICS, profiled
+from collector.response_cache import CacheMiss
 from database.database_manager import DatabaseManager
+from database.collection_state import CollectionState
+from database.funding_panel import FundingAligner
+from database.rollups import OHLCVRollups
+from database.basis import BasisBuilder
+from database.signals import FundingSignals
+from database.quality import DataQuality
+from database.job_queue import JobQueue
+from database.orchestrator import Orchestrator, plan_jobs
 
-def get_all_markets(markets):
-    # Filter for USDT/USDC pairs which are active
-    valid_symbols = [
-        symbol for symbol, market in markets.items() 
-        if (market['quote'] in ['USDT', 'USDC']) and market.get('active', True)
-    ]
-    return valid_symbols
+MAX_ATTEMPTS = 3
 
-def collect_exchange_data(exchange_name, collector, db, start_date, end_date):
+def retry_wait(attempt, error):
+    # Rate-limit responses already penalize the shared limiter (Retry-After /
+    # 429 / 418), so the next request waits exactly as long as required.
+    if isinstance(error, ccxt.DDoSProtection):
+        return 0
+    return (attempt + 1) * 10
+
+def _handle_error(attempt, error, label, symbol):
+    """
+    Shared retry policy of the *_with_retry helpers: log the error and decide
+    whether to try again.
+
+    :param attempt: Zero-based attempt that failed
+    :return: Seconds to wait before the next attempt, or None to give up
+    """
+    if isinstance(error, CacheMiss):
+        # Replay must fail loudly instead of storing a silently truncated series
+        raise error
+    if not isinstance(error, (ccxt.RateLimitExceeded, ccxt.NetworkError)):
+        print(f"  Error fetching {label.lower()} for {symbol}: {error}")
+        return None # Non-retriable error
+    METRICS.record_retry(label.lower(), error)
+    if attempt < MAX_ATTEMPTS - 1:
+        wait_time = retry_wait(attempt, error)
+        print(f"  RateLimit/Network error ({label}) for {symbol}: {error}. Retrying in {wait_time}s...")
+        return wait_time
+    print(f"  Failed to fetch {label.lower()} for {symbol} after {MAX_ATTEMPTS} attempts due to: {error}")
+    return None
+
+def fetch_with_retry(fetch, label, symbol):
+    """
+    Run a blocking collector fetch with the rate-limit/network retry policy.
+
+    :param fetch: Zero-argument callable returning a DataFrame
+    :param label: Dataset label used in log lines ('Funding' or 'Prices')
+    :param symbol: Symbol being fetched, for log lines
+    :return: DataFrame, or None if the fetch failed
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return fetch()
+        except Exception as e:
+            wait_time = _handle_error(attempt, e, label, symbol)
+            if wait_time is None:
+                break
+            time.sleep(wait_time)
+    return None
+
+async def fetch_with_retry_async(fetch, label, symbol):
+    """
+    Async variant of fetch_with_retry. Backoff uses asyncio.sleep so other
+    symbols keep making progress while this one waits.
+
+    :param fetch: Zero-argument callable returning an awaitable DataFrame
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return await fetch()
+        except Exception as e:
+            wait_time = _handle_error(attempt, e, label, symbol)
+            if wait_time is None:
+                break
+            await asyncio.sleep(wait_time)
+    return None
+
+def stream_with_retry(iterate, store, label, symbol, start_ts):
+    """
+    Store every chunk of a collector iterator as soon as it arrives, so memory
+    stays bounded by one page and rows reach the database while the download
+    is still running. A retriable error restarts the iterator just after the
+    last stored row instead of from the beginning.
+
+    :param iterate: Callable(since_ts) returning an iterator of compact DataFrames
+    :param store: Callable(chunk) writing one chunk
+    :param label: Dataset label used in log lines ('Funding' or 'Prices')
+    :param symbol: Symbol being fetched, for log lines
+    :param start_ts: First timestamp to fetch (ms)
+    :return: Number of rows stored
+    """
+    since, rows = start_ts, 0
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            for chunk in iterate(since):
+                store(chunk)
+                rows += len(chunk)
+                since = int(chunk['timestamp'].iloc[-1]) + 1
+            break
+        except Exception as e:
+            wait_time = _handle_error(attempt, e, label, symbol)
+            if wait_time is None:
+                break
+            time.sleep(wait_time)
+    if rows == 0:
+        print(f"  Warning: No {label.lower()} data found for {symbol}")
+    return rows
+
+async def stream_with_retry_async(iterate, store, label, symbol, start_ts):
+    """
+    Async variant of stream_with_retry for the async collectors' iterators.
+    """
+    since, rows = start_ts, 0
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            async for chunk in iterate(since):
+                store(chunk)
+                rows += len(chunk)
+                since = int(chunk['timestamp'].iloc[-1]) + 1
+            break
+        except Exception as e:
+            wait_time = _handle_error(attempt, e, label, symbol)
+            if wait_time is None:
+                break
+            await asyncio.sleep(wait_time)
+    if rows == 0:
+        print(f"  Warning: No {label.lower()} data found for {symbol}")
+    return rows
+
+def store_funding(db, df_fund, exchange_name, symbol, warn_empty=True):
+    if df_fund is None:
+        return
+    if not df_fund.empty:
+        df_fund['ticker'] = symbol
+        db.insert_funding(df_fund, exchange_name)
+    elif warn_empty:
+        print(f"  Warning: No funding data found for {symbol}")
+
+def store_prices(db, df_price, exchange_name, symbol, warn_empty=True):
+    if df_price is None:
+        return
+    if not df_price.empty:
+        df_price['ticker'] = symbol
+        db.insert_ohlcv(df_price, exchange_name)
+    elif warn_empty:
+        print(f"  Warning: No price data found for {symbol}")
+
+def collect_symbol_incremental(exchange_name, collector, db, state, symbol, start_date, end_date, timeframe='1h'):
+    """
+    Fetch only what is missing for one symbol, one page-sized window at a time,
+    checkpointing after every stored window.
+    """
+    start_ts = collector._to_timestamp(start_date)
+    end_ts = collector._to_timestamp(end_date)
+
+    funding_rows = state.run_incremental(
+        exchange_name, symbol, 'fundings',
+        lambda ws, we: fetch_with_retry(lambda: collector.fetch_funding_rates(symbol, ws, we, compact=True), 'Funding', symbol),
+        lambda df: store_funding(db, df, exchange_name, symbol, warn_empty=False),
+        start_ts, end_ts, page_window_ms(collector.funding_interval_ms))
+
+    price_rows = state.run_incremental(
+        exchange_name, symbol, 'ohlcv',
+        lambda ws, we: fetch_with_retry(lambda: collector.fetch_prices(symbol, ws, we, timeframe, compact=True), 'Prices', symbol),
+        lambda df: store_prices(db, df, exchange_name, symbol, warn_empty=False),
+        start_ts, end_ts, page_window_ms(collector.exchange.parse_timeframe(timeframe) * 1000))
+
+    print(f"  {symbol}: {funding_rows} new funding rows, {price_rows} new candles")
+
+async def collect_symbol_incremental_async(exchange_name, collector, db, state, symbol, start_date, end_date, timeframe='1h'):
+    start_ts = collector._to_timestamp(start_date)
+    end_ts = collector._to_timestamp(end_date)
+
+    funding_rows = await state.run_incremental_async(
+        exchange_name, symbol, 'fundings',
+        lambda ws, we: fetch_with_retry_async(lambda: collector.fetch_funding_rates(symbol, ws, we, compact=True), 'Funding', symbol),
+        lambda df: store_funding(db, df, exchange_name, symbol, warn_empty=False),
+        start_ts, end_ts, page_window_ms(collector.funding_interval_ms))
+
+    price_rows = await state.run_incremental_async(
+        exchange_name, symbol, 'ohlcv',
+        lambda ws, we: fetch_with_retry_async(lambda: collector.fetch_prices(symbol, ws, we, timeframe, compact=True), 'Prices', symbol),
+        lambda df: store_prices(db, df, exchange_name, symbol, warn_empty=False),
+        start_ts, end_ts, page_window_ms(collector.exchange.parse_timeframe(timeframe) * 1000))
+
+    print(f"  {symbol}: {funding_rows} new funding rows, {price_rows} new candles")
+
+def collect_exchange_data(exchange_name, collector, db, start_date, end_date, state=None, timeframe='1h'):
+    """
+    :param state: Optional CollectionState; when given, only data newer than
+                  what is already stored (or checkpointed) is fetched
+    :param timeframe: Candle timeframe stored in `ohlcv`
+    """
     print(f"\n--- Starting Collection for {exchange_name} ---")
     try:
-        markets = collector.fetch_markets()
-        all_symbols = get_all_markets(markets)
+        # Active USDT/USDC perps, precomputed by the shared market cache
+        all_symbols = collector.market_index()['perps']
         total_symbols = len(all_symbols)
         print(f"Found {total_symbols} active markets.")
         
         for i, symbol in enumerate(all_symbols):
             print(f"[{i+1}/{total_symbols}] Processing {symbol}...")
-            
-            # --- Funding ---
-            try:
-                for attempt in range(3):
-                    try:
-                        df_fund = collector.fetch_funding_rates(symbol, start_date, end_date)
-                        if not df_fund.empty:
-                            df_fund['ticker'] = symbol
-                            db.insert_funding(df_fund, exchange_name)
-                        else:
-                            print(f"  Warning: No funding data found for {symbol}")
-                        break # Success, exit retry loop
-                    except (ccxt.RateLimitExceeded, ccxt.NetworkError) as e:
-                        if attempt < 2:
-                            wait_time = (attempt + 1) * 10
-                            print(f"  RateLimit/Network error (Funding) for {symbol}: {e}. Retrying in {wait_time}s...")
-                            time.sleep(wait_time)
-                        else:
-                            print(f"  Failed to fetch funding for {symbol} after 3 attempts due to: {e}")
-                            raise e # Re-raise to be caught by outer, or just log and skip
-                    except Exception as e:
-                        print(f"  Error fetching funding for {symbol}: {e}")
-                        break # Non-retriable error
-            except Exception as e:
-                # Outer catch to ensure we proceed to prices
-                pass
 
-            # --- Prices ---
+            if state is not None:
+                collect_symbol_incremental(exchange_name, collector, db, state, symbol, start_date, end_date,
+                                           timeframe)
+            else:
+                # Pages are written as they arrive instead of after the full history
+                start_ts = collector._to_timestamp(start_date)
+                # --- Funding ---
+                stream_with_retry(
+                    lambda since: collector.iter_funding_rates(symbol, since, end_date),
+                    lambda chunk: store_funding(db, chunk, exchange_name, symbol), 'Funding', symbol, start_ts)
+
+                # --- Prices ---
+                stream_with_retry(
+                    lambda since: collector.iter_prices(symbol, since, end_date, timeframe),
+                    lambda chunk: store_prices(db, chunk, exchange_name, symbol), 'Prices', symbol, start_ts)
+
+    except CacheMiss:
+        # A replay that misses must not go on to build tables from a truncated series
+        raise
+    except Exception as e:
+        print(f"Critical error initializing {exchange_name} collection: {e}")
+
+def collect_basis_data(spot, perp, db, start_date, end_date, max_workers=4, include_perp=True, timeframe='1h'):
+    """
+    Collect spot candles for every asset listed both as a spot pair and as a
+    linear perp, fetching the legs of each pair concurrently.
+
+    Both symbol lists come from the shared market cache, so pairing costs no
+    extra requests. Each leg is streamed page by page on a thread pool (paced
+    by the spot and futures API limiters); pages are handed back through a
+    queue and written on the calling thread as they arrive, so memory stays
+    bounded by the pages in flight. A leg that fails is logged and counted
+    without stopping the others.
+
+    :param spot: BinanceSpotCollector
+    :param perp: Perp collector the spot pairs are matched against
+    :param include_perp: Also fetch perp candles and funding (skip when the
+                         perps were already collected in this run)
+    :return: Dict asset -> (spot_symbol, spot_multiplier, perp_symbol, perp_multiplier)
+    """
+    print(f"\n--- Starting Basis Collection for {spot.exchange_name} / {perp.exchange_name} ---")
+    pairs = pair_spot_perp(spot.market_index()['spot'], perp.market_index()['perps'])
+    print(f"Found {len(pairs)} spot-perp pairs.")
+    start_ts = spot._to_timestamp(start_date)
+
+    legs = []
+    for asset, (spot_symbol, _, perp_symbol, _) in sorted(pairs.items()):
+        legs.append((spot, 'ohlcv', spot_symbol))
+        if include_perp:
+            legs.append((perp, 'ohlcv', perp_symbol))
+            legs.append((perp, 'fundings', perp_symbol))
+
+    # Worker threads only fetch; the DatabaseManager buffers are not thread-safe
+    pages = queue.Queue()
+
+    def stream_leg(leg):
+        collector, table, symbol = leg
+        try:
+            if table == 'ohlcv':
+                return stream_with_retry(
+                    lambda since: collector.iter_prices(symbol, since, end_date, timeframe),
+                    lambda chunk: pages.put((leg, chunk)), 'Prices', symbol, start_ts)
+            return stream_with_retry(
+                lambda since: collector.iter_funding_rates(symbol, since, end_date),
+                lambda chunk: pages.put((leg, chunk)), 'Funding', symbol, start_ts)
+        finally:
+            pages.put((leg, None))
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {leg: pool.submit(stream_leg, leg) for leg in legs}
+        remaining = len(jobs)
+        while remaining:
+            leg, chunk = pages.get()
+            collector, table, symbol = leg
+            if chunk is not None:
+                store = store_prices if table == 'ohlcv' else store_funding
+                store(db, chunk, collector.exchange_name, symbol, warn_empty=False)
+                continue
+            remaining -= 1
             try:
-                for attempt in range(3):
-                    try:
-                        df_price = collector.fetch_prices(symbol, start_date, end_date)
-                        if not df_price.empty:
-                            df_price['ticker'] = symbol
-                            db.insert_ohlcv(df_price, exchange_name)
-                        else:
-                            print(f"  Warning: No price data found for {symbol}")
-                        break
-                    except (ccxt.RateLimitExceeded, ccxt.NetworkError) as e:
-                        if attempt < 2:
-                            wait_time = (attempt + 1) * 10
-                            print(f"  RateLimit/Network error (Prices) for {symbol}: {e}. Retrying in {wait_time}s...")
-                            time.sleep(wait_time)
-                        else:
-                            print(f"  Failed to fetch prices for {symbol} after 3 attempts due to: {e}")
-                            raise e
-                    except Exception as e:
-                        print(f"  Error fetching prices for {symbol}: {e}")
-                        break
+                rows = jobs[leg].result()
+            except CacheMiss:
+                for job in jobs.values():
+                    job.cancel()
+                raise
             except Exception as e:
-                pass
-            
-            # Basic rate limit sleep if needed, though ccxt handles it generally.
-            # Adding a small manual pause just in case to be safe for long runs.
-            time.sleep(0.1)
+                failed += 1
+                print(f"[{len(jobs) - remaining}/{len(jobs)}] Failed {table} for {symbol}: {e}")
+                continue
+            print(f"[{len(jobs) - remaining}/{len(jobs)}] Stored {rows} {table} rows for {symbol}")
+    if failed:
+        print(f"Basis collection: {failed} of {len(jobs)} legs failed.")
+    return pairs
+
+async def collect_exchange_data_async(exchange_name, collector, db, start_date, end_date, concurrency=8, state=None,
+                                      timeframe='1h'):
+    """
+    Collect funding and prices for every active market of one exchange,
+    keeping up to `concurrency` symbols in flight at once.
+
+    Pacing is left to the shared per-exchange token bucket (collector.rate_limiter),
+    so throughput is bounded by the exchange budget rather than latency.
+    DB writes happen on the event loop thread, which keeps them serialized.
+
+    :param collector: Async collector (AsyncBinanceFuturesCollector, AsyncHyperliquidCollector)
+    :param concurrency: Maximum number of symbols processed concurrently
+    :param state: Optional CollectionState for incremental, resumable collection
+    :param timeframe: Candle timeframe stored in `ohlcv`
+    """
+    print(f"\n--- Starting Async Collection for {exchange_name} (concurrency={concurrency}) ---")
+    try:
+        all_symbols = (await collector.market_index())['perps']
+        total_symbols = len(all_symbols)
+        print(f"Found {total_symbols} active markets.")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def collect_symbol(i, symbol):
+            async with semaphore:
+                print(f"[{exchange_name} {i+1}/{total_symbols}] Processing {symbol}...")
+
+                if state is not None:
+                    await collect_symbol_incremental_async(
+                        exchange_name, collector, db, state, symbol, start_date, end_date, timeframe)
+                    return
 
+                start_ts = collector._to_timestamp(start_date)
+                await stream_with_retry_async(
+                    lambda since: collector.iter_funding_rates(symbol, since, end_date),
+                    lambda chunk: store_funding(db, chunk, exchange_name, symbol), 'Funding', symbol, start_ts)
+
+                await stream_with_retry_async(
+                    lambda since: collector.iter_prices(symbol, since, end_date, timeframe),
+                    lambda chunk: store_prices(db, chunk, exchange_name, symbol), 'Prices', symbol, start_ts)
+
+        await asyncio.gather(*(collect_symbol(i, s) for i, s in enumerate(all_symbols)))
+
+    except CacheMiss:
+        # A replay that misses must not go on to build tables from a truncated series
+        raise
     except Exception as e:
         print(f"Critical error initializing {exchange_name} collection: {e}")
+    finally:
+        await collector.close()
+
+async def run_async(db, start_date, end_date, concurrency, state=None, timeframe='1h'):
+    # Both exchanges run side by side; each has its own rate limiter.
+    await asyncio.gather(
+        collect_exchange_data_async('binance_futures', AsyncBinanceFuturesCollector(), db,
+                                    start_date, end_date, concurrency, state, timeframe),
+        collect_exchange_data_async('hyperliquid', AsyncHyperliquidCollector(), db,
+                                    start_date, end_date, concurrency, state, timeframe),
+    )
+
+def run_orchestrated(db, start_date, end_date, processes, timeframe='1h'):
+    """
+    Queue every (exchange, symbol, dataset, window) as a durable job and run
+    them on worker processes; this process is the only DuckDB writer.
+    Re-running resumes: finished windows are skipped, leased ones are recovered.
+    """
+    queue = JobQueue(db.con)
+    start_ts = int(start_date.timestamp() * 1000)
+    end_ts = int(end_date.timestamp() * 1000)
+    for name, collector in (('binance_futures', BinanceFuturesCollector()), ('hyperliquid', HyperliquidCollector())):
+        symbols = collector.market_index()['perps']
+        added = queue.enqueue(plan_jobs(name, symbols, start_ts, end_ts, timeframe=timeframe))
+        print(f"{name}: {len(symbols)} markets, {added} new jobs queued.")
+    print(f"Jobs: {Orchestrator(db, queue, processes).run()}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect one year of funding and OHLCV data.")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Use the asyncio engine and fetch many symbols concurrently")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Symbols in flight per exchange in async mode (default 8)")
+    parser.add_argument('--processes', type=int, default=0,
+                        help="Run through the persistent job queue on this many worker processes")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch data newer than what is stored; resume from checkpoints")
+    parser.add_argument('--metrics-dir', default='data/metrics',
+                        help="Where metrics.prom and the per-run JSON summary are written")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Also serve Prometheus metrics on this port while running")
+    parser.add_argument('--profile', choices=['cprofile', 'sample'], default=None,
+                        help="Profile the collection into the metrics directory")
+    parser.add_argument('--spot', action='store_true',
+                        help="Also collect Binance spot candles for assets with a perp and build the basis table")
+    parser.add_argument('--timeframe', default='1h',
+                        help="Candle timeframe stored in ohlcv; coarser ones are rolled up from it (default 1h)")
+    parser.add_argument('--spot-workers', type=int, default=4,
+                        help="Concurrent requests for the spot collection (default 4)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
     print("Initializing collectors and database...")
     db = DatabaseManager('data/crypto.duckdb')
-    
+    # Flag outliers and update the cross-venue divergence inside every flush
+    quality = DataQuality(db.con, db)
+    # Records the funding ranges each flush writes for the panel refresh
+    aligner = FundingAligner(db.con, db)
+    # Remembers which funding series each flush wrote, so the signal catch-up reads only those
+    signals = FundingSignals(db.con, db)
+    # Refuses a timeframe other than the one the stored rollups were built from
+    rollups = OHLCVRollups(db.con, base_timeframe=args.timeframe)
+
     end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=365) # 1 year data
     print(f"Collection period: {start_date} to {end_date}")
 
-    # 1. Binance Futures
-    bf = BinanceFuturesCollector()
-    collect_exchange_data('binance_futures', bf, db, start_date, end_date)
+    state = CollectionState(db.con, db) if args.incremental else None
+
+    METRICS.reset()
+    server = METRICS.serve(args.metrics_port) if args.metrics_port else None
+    profile_path = None
+    if args.profile:
+        profile_path = os.path.join(args.metrics_dir, 'profile.pstats' if args.profile == 'cprofile' else 'profile.txt')
+
+    with profiled(profile_path, args.profile):
+        if args.processes:
+            run_orchestrated(db, start_date, end_date, args.processes, args.timeframe)
+        elif args.use_async:
+            asyncio.run(run_async(db, start_date, end_date, args.concurrency, state, args.timeframe))
+        else:
+            # 1. Binance Futures
+            bf = BinanceFuturesCollector()
+            collect_exchange_data('binance_futures', bf, db, start_date, end_date, state, args.timeframe)
+
+            # 2. Hyperliquid
+            hl = HyperliquidCollector()
+            collect_exchange_data('hyperliquid', hl, db, start_date, end_date, state, args.timeframe)
+
+        if args.spot:
+            # Perps were collected above; only the spot legs are missing
+            collect_basis_data(BinanceSpotCollector(), BinanceFuturesCollector(), db, start_date, end_date,
+                               args.spot_workers, include_perp=False, timeframe=args.timeframe)
+
+        # Fold the new funding rows into the aligned cross-exchange panel
+        db.flush()
+        print(f"Funding panel: {aligner.refresh()} rows updated.")
+        # Roll only the new funding / panel rows into the checkpointed statistics
+        print(f"Funding signals: {signals.catch_up()} observations applied.")
+        signals.checkpoint()
+        print(f"OHLCV rollups: {rollups.refresh()} buckets updated.")
+        if args.spot:
+            print(f"Basis: {BasisBuilder(db.con).refresh()} rows updated.")
+        db.flush()
+        print(f"Quality flags:\n{quality.summary().to_string(index=False)}")
 
-    # 2. Hyperliquid
-    hl = HyperliquidCollector()
-    collect_exchange_data('hyperliquid', hl, db, start_date, end_date)
+    print(f"Run summary written to {METRICS.write(args.metrics_dir)}")
+    if server is not None:
+        server.shutdown()
+        server.server_close()
 
     db.close()
     print("\nFull Data Collection Complete.")
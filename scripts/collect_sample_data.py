@@ -1,6 +1,7 @@
 import os
 import sys
 import random
+import argparse
 import pandas as pd
 from datetime import datetime, timedelta, timezone
 
@@ -10,22 +11,34 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from collector.binance_futures import BinanceFuturesCollector
 from collector.hyperliquid import HyperliquidCollector
 from database.database_manager import DatabaseManager
+from database.collection_state import CollectionState
+from database.funding_panel import FundingAligner
+from database.signals import FundingSignals
+from database.rollups import OHLCVRollups
+from scripts.collect_full_data import collect_symbol_incremental, stream_with_retry, store_funding, store_prices
 
-def get_random_markets(markets, count=10):
-    # Filter for USDT/USDC pairs which are active/spot/future depending on context
-    # For futures, usually end in USDT or USDC
-    valid_symbols = [
-        symbol for symbol, market in markets.items() 
-        if (market['quote'] in ['USDT', 'USDC']) and market.get('active', True)
-    ]
-    
+def get_random_markets(valid_symbols, count=10):
+    # valid_symbols: active USDT/USDC perps from the collector's market index
     if len(valid_symbols) < count:
         return valid_symbols
     return random.sample(valid_symbols, count)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect 30 days of data for a random sample of markets.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch data newer than what is stored; resume from checkpoints")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
     print("Initializing collectors and database...")
     db = DatabaseManager('data/crypto.duckdb')
+    # Records the funding ranges each flush writes for the panel refresh
+    aligner = FundingAligner(db.con, db)
+    # Marks the written funding series for the next signal catch-up
+    FundingSignals(db.con, db)
+    state = CollectionState(db.con, db) if args.incremental else None
     bf = BinanceFuturesCollector()
     hl = HyperliquidCollector()
     
@@ -37,30 +50,27 @@ def main():
     # --- Binance Futures ---
     print("\n--- Binance Futures Collection ---")
     try:
-        markets = bf.fetch_markets()
-        print(f"Fetched {len(markets)} markets.")
-        
-        # Convert list to dict for helper function if needed, or adjust helper
-        # ccxt load_markets returns dict, but we returned load_markets() result directly which IS a dict.
-        # Wait, bf.fetch_markets returns load_markets() result which is a dict of symbol->market.
-        
-        target_symbols = get_random_markets(markets, 10)
+        index = bf.market_index()
+        print(f"Fetched {len(index['markets'])} markets.")
+
+        target_symbols = get_random_markets(index['perps'], 10)
         print(f"Selected symbols: {target_symbols}")
         
         for symbol in target_symbols:
             print(f"Processing {symbol}...")
             try:
-                # Funding
-                df_fund = bf.fetch_funding_rates(symbol, start_date, end_date)
-                if not df_fund.empty:
-                    df_fund['ticker'] = symbol
-                    db.insert_funding(df_fund, 'binance_futures')
-                
-                # Prices
-                df_price = bf.fetch_prices(symbol, start_date, end_date)
-                if not df_price.empty:
-                    df_price['ticker'] = symbol
-                    db.insert_ohlcv(df_price, 'binance_futures')
+                if state is not None:
+                    collect_symbol_incremental('binance_futures', bf, db, state, symbol, start_date, end_date)
+                    continue
+
+                # Funding and prices are stored page by page as they arrive
+                start_ts = bf._to_timestamp(start_date)
+                stream_with_retry(
+                    lambda since: bf.iter_funding_rates(symbol, since, end_date),
+                    lambda chunk: store_funding(db, chunk, 'binance_futures', symbol), 'Funding', symbol, start_ts)
+                stream_with_retry(
+                    lambda since: bf.iter_prices(symbol, since, end_date),
+                    lambda chunk: store_prices(db, chunk, 'binance_futures', symbol), 'Prices', symbol, start_ts)
                     
             except Exception as e:
                 print(f"Error processing {symbol}: {e}")
@@ -71,26 +81,27 @@ def main():
     # --- Hyperliquid ---
     print("\n--- Hyperliquid Collection ---")
     try:
-        markets = hl.fetch_markets()
-        print(f"Fetched {len(markets)} markets.")
+        index = hl.market_index()
+        print(f"Fetched {len(index['markets'])} markets.")
         
-        target_symbols = get_random_markets(markets, 10)
+        target_symbols = get_random_markets(index['perps'], 10)
         print(f"Selected symbols: {target_symbols}")
         
         for symbol in target_symbols:
             print(f"Processing {symbol}...")
             try:
-                # Funding
-                df_fund = hl.fetch_funding_rates(symbol, start_date, end_date)
-                if not df_fund.empty:
-                    df_fund['ticker'] = symbol
-                    db.insert_funding(df_fund, 'hyperliquid')
-                
-                # Prices
-                df_price = hl.fetch_prices(symbol, start_date, end_date)
-                if not df_price.empty:
-                    df_price['ticker'] = symbol
-                    db.insert_ohlcv(df_price, 'hyperliquid')
+                if state is not None:
+                    collect_symbol_incremental('hyperliquid', hl, db, state, symbol, start_date, end_date)
+                    continue
+
+                # Funding and prices are stored page by page as they arrive
+                start_ts = hl._to_timestamp(start_date)
+                stream_with_retry(
+                    lambda since: hl.iter_funding_rates(symbol, since, end_date),
+                    lambda chunk: store_funding(db, chunk, 'hyperliquid', symbol), 'Funding', symbol, start_ts)
+                stream_with_retry(
+                    lambda since: hl.iter_prices(symbol, since, end_date),
+                    lambda chunk: store_prices(db, chunk, 'hyperliquid', symbol), 'Prices', symbol, start_ts)
                     
             except Exception as e:
                 print(f"Error processing {symbol}: {e}")
@@ -98,6 +109,11 @@ def main():
     except Exception as e:
          print(f"Hyperliquid error: {e}")
 
+    # Fold the new funding rows into the aligned cross-exchange panel
+    db.flush()
+    print(f"Funding panel: {aligner.refresh()} rows updated.")
+    print(f"OHLCV rollups: {OHLCVRollups(db.con).refresh()} buckets updated.")
+
     db.close()
     print("\nDone.")
 
@@ -0,0 +1,36 @@
+import os
+import sys
+import argparse
+import duckdb
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.parquet_store import ParquetStore, TABLES
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export DuckDB tables to a hive-partitioned Parquet lake.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--out', default='data/lake')
+    parser.add_argument('--table', choices=TABLES, default=None, help="Export one table (default: all)")
+    parser.add_argument('--exchange', default=None)
+    parser.add_argument('--since-days', type=int, default=None,
+                        help="Only rewrite months touched in the last N days (default: everything)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    start_ts = None
+    if args.since_days is not None:
+        start_ts = int((datetime.now(timezone.utc) - timedelta(days=args.since_days)).timestamp() * 1000)
+
+    con = duckdb.connect(args.db, read_only=True)
+    store = ParquetStore(args.out)
+    for table in ([args.table] if args.table else TABLES):
+        rows = store.export(con, table, args.exchange, start_ts)
+        print(f"{table}: {rows} rows written to {os.path.join(args.out, table)}")
+    con.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import time
+import argparse
+import duckdb
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import load_panels, run_backtest
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest Binance Futures vs Hyperliquid funding capture.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--entry', type=float, default=0.00002, help="Entry spread per hour")
+    parser.add_argument('--exit', type=float, default=0.000005, help="Exit spread per hour")
+    parser.add_argument('--fee', type=float, default=0.0005, help="Taker fee per leg")
+    parser.add_argument('--top', type=int, default=20, help="Rows of the per-asset summary to print")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    con = duckdb.connect(args.db, read_only=True)
+
+    started = time.perf_counter()
+    panel = load_panels(con)
+    loaded = time.perf_counter()
+    result = run_backtest(panel, args.entry, args.exit, args.fee)
+    done = time.perf_counter()
+
+    print(f"{len(panel['assets'])} common assets x {len(panel['timestamps'])} hours "
+          f"(load {loaded - started:.2f}s, simulate {done - loaded:.2f}s)")
+    print(result['summary'].head(args.top).to_string())
+    print(f"\nTotal PnL (sum of per-asset notional returns): {result['equity'].iloc[-1]:.4f}")
+    con.close()
+
+if __name__ == "__main__":
+    main()
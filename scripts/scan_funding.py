@@ -0,0 +1,32 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.binance_futures import BinanceFuturesCollector
+from collector.hyperliquid import HyperliquidCollector
+from collector.scanner import FundingScanner
+
+def print_top(ranked, top):
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    print(f"\n[{now}] {len(ranked)} assets on both exchanges, top {top} by annualized spread:")
+    columns = ['annualized_spread', 'direction', 'mark_divergence']
+    print(ranked[columns].head(top).to_string(float_format=lambda v: f"{v:.4f}"))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the live cross-exchange funding spread of every shared asset.")
+    parser.add_argument('--every', type=float, default=60.0, help="Seconds between scans (default 60)")
+    parser.add_argument('--iterations', type=int, default=None, help="Number of scans (default: forever)")
+    parser.add_argument('--top', type=int, default=20, help="Rows to print per scan (default 20)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scanner = FundingScanner(BinanceFuturesCollector(), HyperliquidCollector())
+    scanner.run(every=args.every, iterations=args.iterations, on_result=lambda ranked: print_top(ranked, args.top))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import argparse
+import duckdb
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest.search import FeatureStore, grid_search, bayes_search, OBJECTIVES
+
+def floats(value):
+    return [float(v) for v in value.split(',')]
+
+def ints(value):
+    return [int(v) for v in value.split(',')]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Search funding-arb strategy parameters over the collected data.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--method', choices=['grid', 'bayes'], default='grid')
+    parser.add_argument('--entry', type=floats, default=[0.00001, 0.00002, 0.00005, 0.0001],
+                        help="Entry spreads per hour (grid values, or low,high for bayes)")
+    parser.add_argument('--exit', type=floats, default=[0.0, 0.000005, 0.00001],
+                        help="Exit spreads per hour (grid values, or low,high for bayes)")
+    parser.add_argument('--window', type=ints, default=[1, 8, 24],
+                        help="Rolling windows in hours the spread is averaged over")
+    parser.add_argument('--min-hold', type=ints, default=[1, 8, 24],
+                        help="Minimum holding periods in hours")
+    parser.add_argument('--n-calls', type=int, default=200, help="Configurations evaluated by the bayes search")
+    parser.add_argument('--objective', choices=OBJECTIVES, default='sharpe')
+    parser.add_argument('--fee', type=float, default=0.0005, help="Taker fee per leg")
+    parser.add_argument('--jobs', type=int, default=-1, help="Worker processes (default: all cores)")
+    parser.add_argument('--features-dir', default='data/features', help="Where memoized feature arrays are kept")
+    parser.add_argument('--out', default=None, help="Write every evaluated configuration to this CSV")
+    parser.add_argument('--top', type=int, default=20, help="Rows to print")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    windows = args.window if args.method == 'grid' else range(min(args.window), max(args.window) + 1)
+
+    started = time.perf_counter()
+    con = duckdb.connect(args.db, read_only=True)
+    path = FeatureStore(args.features_dir).materialize(con, windows=windows)
+    con.close()
+    prepared = time.perf_counter()
+
+    if args.method == 'grid':
+        space = {'entry': args.entry, 'exit': args.exit, 'window': args.window, 'min_hold': args.min_hold}
+        results = grid_search(path, space, args.fee, args.objective, args.jobs)
+    else:
+        space = {'entry': (min(args.entry), max(args.entry)), 'exit': (min(args.exit), max(args.exit)),
+                 'window': (min(args.window), max(args.window)), 'min_hold': (min(args.min_hold), max(args.min_hold))}
+        results = bayes_search(path, space, args.n_calls, args.fee, args.objective, args.jobs)
+    done = time.perf_counter()
+
+    print(f"{len(results)} configurations (features {prepared - started:.2f}s, search {done - prepared:.2f}s)")
+    print(results.head(args.top).to_string())
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"Results written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import asyncio
+import argparse
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collector.binance_futures import BinanceFuturesCollector
+from collector.hyperliquid import HyperliquidCollector
+from collector.streaming import StreamingCollector, BinanceMarkPriceFeed, HyperliquidAssetCtxFeed
+from database.database_manager import DatabaseManager
+
+def build_feeds():
+    bf_markets = BinanceFuturesCollector().fetch_markets()
+    symbol_map = {m['id']: s for s, m in bf_markets.items() if m.get('swap') and m.get('active', True)}
+
+    hl_markets = HyperliquidCollector().fetch_markets()
+    coins = [m['base'] for m in hl_markets.values() if m.get('swap') and m.get('active', True)]
+
+    return [BinanceMarkPriceFeed(symbol_map=symbol_map), HyperliquidAssetCtxFeed(coins)]
+
+async def report(collector, every):
+    while True:
+        await asyncio.sleep(every)
+        snap = collector.snapshot()
+        print(f"{len(snap)} symbols live, {collector.stats['ticks']} ticks, "
+              f"{collector.stats['flushed']} flushed, {collector.stats['reconnects']} reconnects")
+
+async def run(args):
+    db = DatabaseManager(args.db)
+    collector = StreamingCollector(build_feeds(), con=db.con, flush_interval=args.flush_interval)
+    reporter = asyncio.create_task(report(collector, args.report_every))
+    try:
+        await collector.run(duration=args.duration)
+    finally:
+        reporter.cancel()
+        db.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stream live funding, mark and index prices into DuckDB.")
+    parser.add_argument('--db', default='data/crypto.duckdb')
+    parser.add_argument('--duration', type=float, default=None, help="Seconds to run (default: forever)")
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    parser.add_argument('--report-every', type=float, default=10.0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    asyncio.run(run(parse_args(argv)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import pytest
+import ccxt
+
+HOUR_MS = 60 * 60 * 1000
+
+class FakeExchange:
+    """
+    Minimal offline stand-in for a ccxt exchange. Serves deterministic OHLCV
+    and funding pages aligned to the requested timeframe / funding interval.
+    """
+    id = 'fake'
+    has = {'fetchFundingRateHistory': True}
+
+    def __init__(self, now_ms, funding_interval_ms=8 * HOUR_MS, markets=None, page_size=None):
+        self.now_ms = now_ms
+        # Server-side page cap below the requested limit, like some venues apply
+        self.page_size = page_size
+        self.funding_interval_ms = funding_interval_ms
+        self.markets = markets or {
+            'BTC/USDT:USDT': {'quote': 'USDT', 'base': 'BTC', 'active': True},
+            'ETH/USDT:USDT': {'quote': 'USDT', 'base': 'ETH', 'active': True},
+        }
+        self.calls = []
+        # Call number (1-based) -> exception raised instead of answering
+        self.failures = {}
+
+    def _call(self, *call):
+        self.calls.append(call)
+        error = self.failures.pop(len(self.calls), None)
+        if error is not None:
+            raise error
+
+    def parse_timeframe(self, timeframe):
+        return ccxt.Exchange.parse_timeframe(timeframe)
+
+    def load_markets(self, reload=False):
+        self.calls.append(('load_markets',))
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+
+    def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=1000, params={}):
+        self._call('fetch_ohlcv', symbol, since, limit)
+        limit = min(limit, self.page_size or limit)
+        step = self.parse_timeframe(timeframe) * 1000
+        ts = -(-since // step) * step
+        rows = []
+        while ts <= self.now_ms and len(rows) < limit:
+            price = 100.0 + (ts // step) % 50
+            rows.append([ts, price, price + 1, price - 1, price + 0.5, 10.0])
+            ts += step
+        return rows
+
+    def fetch_funding_rate_history(self, symbol, since=None, limit=1000, params={}):
+        self._call('fetch_funding_rate_history', symbol, since, limit)
+        limit = min(limit, self.page_size or limit)
+        step = self.funding_interval_ms
+        ts = -(-since // step) * step
+        rows = []
+        while ts <= self.now_ms and len(rows) < limit:
+            rows.append({
+                'info': {'symbol': symbol, 'fundingTime': ts},
+                'symbol': symbol,
+                'fundingRate': 0.0001 * (1 + (ts // step) % 3),
+                'timestamp': ts,
+                'datetime': ccxt.Exchange.iso8601(ts),
+            })
+            ts += step
+        return rows
+
+class AsyncFakeExchange(FakeExchange):
+    """Awaitable variant of FakeExchange for the ccxt.async_support collectors."""
+
+    async def load_markets(self, reload=False):
+        return FakeExchange.load_markets(self, reload)
+
+    async def fetch_ohlcv(self, *args, **kwargs):
+        return FakeExchange.fetch_ohlcv(self, *args, **kwargs)
+
+    async def fetch_funding_rate_history(self, *args, **kwargs):
+        return FakeExchange.fetch_funding_rate_history(self, *args, **kwargs)
+
+    async def close(self):
+        pass
+
+NOW_MS = 1_700_000_000_000 - (1_700_000_000_000 % (8 * HOUR_MS))
+
+@pytest.fixture(autouse=True)
+def market_cache_dir(tmp_path, monkeypatch):
+    # Keep each test's market cache out of data/ and away from other tests
+    path = str(tmp_path / 'markets')
+    monkeypatch.setenv('FUNDING_ARB_MARKET_CACHE_DIR', path)
+    return path
+
+@pytest.fixture
+def fake_exchange():
+    return FakeExchange(NOW_MS)
+
+@pytest.fixture
+def async_fake_exchange():
+    return AsyncFakeExchange(NOW_MS)
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from database import DatabaseManager, FundingAligner
+from backtest import load_panels, run_backtest
+from collector.symbols import base_asset, map_by_asset
+
+HOUR_MS = 60 * 60 * 1000
+
+def seed(db, hours=48):
+    hourly = np.arange(hours, dtype=np.int64) * HOUR_MS
+    eight_hourly = hourly[::8]
+    for ticker, hl_ticker, bn_rate, hl_rate in [('BTC/USDT:USDT', 'BTC/USDC:USDC', 0.0008, 0.0003),
+                                               ('1000PEPE/USDT:USDT', 'kPEPE/USDC:USDC', 0.0001, 0.0)]:
+        db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': eight_hourly, 'funding_rate': bn_rate}),
+                          'binance_futures')
+        db.insert_funding(pd.DataFrame({'ticker': hl_ticker, 'timestamp': hourly, 'funding_rate': hl_rate}),
+                          'hyperliquid')
+        for exchange, t in (('binance_futures', ticker), ('hyperliquid', hl_ticker)):
+            db.insert_ohlcv(pd.DataFrame({'ticker': t, 'timestamp': hourly, 'open': 1.0, 'high': 1.0,
+                                          'low': 1.0, 'close': 1.0, 'volume': 1.0}), exchange)
+    db.insert_funding(pd.DataFrame({'ticker': 'SOL/USDT:USDT', 'timestamp': eight_hourly, 'funding_rate': 0.0}),
+                      'binance_futures')
+    db.flush()
+
+def test_symbol_mapping_handles_scaled_contracts():
+    assert base_asset('kPEPE/USDC:USDC') == ('PEPE', 1000)
+    assert base_asset('1000PEPE/USDT:USDT') == ('PEPE', 1000)
+    assert base_asset('1INCH/USDT:USDT') == ('1INCH', 1)
+    assert map_by_asset(['BTC/USDT', 'BTC/USDC:USDC', 'BTC/USDT:USDT'])['BTC'] == ('BTC/USDT:USDT', 1)
+
+def test_backtest_captures_funding_spread():
+    db = DatabaseManager(':memory:')
+    seed(db)
+    panel = load_panels(db.con)
+
+    assert panel['assets'] == ['BTC', 'PEPE']
+    assert panel['rate_a'].shape == (48, 2)
+    np.testing.assert_allclose(panel['rate_a'][-1], [0.0001, 0.0001 / 8])
+
+    result = run_backtest(panel, entry_threshold=0.00002, exit_threshold=0.00001, fee_rate=0.0005)
+    btc = result['summary'].loc['BTC']
+    # Long Binance / short Hyperliquid from the first hour: receive 0.0003/h, pay 0.0008 per 8h
+    assert result['positions']['BTC'].iloc[0] == 1
+    assert btc['trades'] == 1
+    np.testing.assert_allclose(btc['funding_pnl'], 47 * 0.0003 - 5 * 0.0008)
+    np.testing.assert_allclose(btc['fees'], 0.001)
+    # PEPE spread (0.0000125/h) never clears the entry threshold
+    assert result['summary'].loc['PEPE', 'trades'] == 0
+
+def test_backtest_reads_precomputed_funding_panel():
+    db = DatabaseManager(':memory:')
+    seed(db)
+    on_the_fly = run_backtest(load_panels(db.con))['summary']
+
+    FundingAligner(db.con).refresh()
+    from_panel = run_backtest(load_panels(db.con))['summary']
+    pd.testing.assert_frame_equal(on_the_fly, from_panel)
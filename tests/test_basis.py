@@ -0,0 +1,107 @@
+import ccxt
+import numpy as np
+import pandas as pd
+from conftest import NOW_MS, HOUR_MS, FakeExchange
+from collector import BinanceFuturesCollector, BinanceSpotCollector
+from collector.market_cache import build_index
+from collector.symbols import pair_spot_perp
+from database import DatabaseManager, BasisBuilder
+from scripts.collect_full_data import collect_basis_data
+
+def insert_candles(db, exchange, ticker, hours, close):
+    db.insert_ohlcv(pd.DataFrame({'ticker': ticker, 'timestamp': np.asarray(hours) * HOUR_MS,
+                                  'open': close, 'high': close, 'low': close, 'close': close,
+                                  'volume': 1.0}), exchange)
+    db.flush()
+
+def insert_funding(db, ticker, hours, rate):
+    db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': np.asarray(hours) * HOUR_MS,
+                                    'funding_rate': rate}), 'binance_futures')
+    db.flush()
+
+def basis(db):
+    return db.con.execute("SELECT * FROM basis ORDER BY asset, timestamp").fetchdf()
+
+def test_pairing_prefers_same_quote_and_handles_scaled_contracts():
+    pairs = pair_spot_perp(['BTC/USDT', 'BTC/USDC', 'PEPE/USDT', 'SOL/BTC'],
+                           ['BTC/USDC:USDC', '1000PEPE/USDT:USDT', 'ETH/USDT:USDT'])
+    assert pairs == {
+        'BTC': ('BTC/USDC', 1, 'BTC/USDC:USDC', 1),
+        'PEPE': ('PEPE/USDT', 1, '1000PEPE/USDT:USDT', 1000),
+    }
+    index = build_index({'BTC/USDT': {'quote': 'USDT'}, 'BTC/USDT:USDT': {'quote': 'USDT'}})
+    assert index['spot'] == ['BTC/USDT'] and index['perps'] == ['BTC/USDT:USDT']
+
+def test_basis_and_annualized_carry():
+    db = DatabaseManager(':memory:')
+    insert_candles(db, 'binance_spot', 'PEPE/USDT', range(24), 0.001)
+    insert_candles(db, 'binance_futures', '1000PEPE/USDT:USDT', range(2, 24), 1.01)
+    insert_funding(db, '1000PEPE/USDT:USDT', range(0, 24, 8), 0.0008)
+
+    assert BasisBuilder(db.con).refresh() == 22
+    df = basis(db)
+    assert df['timestamp'].iloc[0] == 2 * HOUR_MS
+    np.testing.assert_allclose(df['spot_close'], 0.001)
+    np.testing.assert_allclose(df['perp_close'], 0.00101)
+    np.testing.assert_allclose(df['basis'], 0.01)
+    np.testing.assert_allclose(df['funding_rate_hourly'], 0.0001)
+    np.testing.assert_allclose(df['annualized_carry'], 0.0001 * 24 * 365)
+
+def test_incremental_refresh_matches_full_rebuild():
+    db = DatabaseManager(':memory:')
+    insert_candles(db, 'binance_spot', 'BTC/USDT', range(24), 100.0)
+    insert_candles(db, 'binance_futures', 'BTC/USDT:USDT', range(24), 101.0)
+    insert_funding(db, 'BTC/USDT:USDT', range(0, 24, 8), 0.0008)
+    builder = BasisBuilder(db.con)
+    builder.refresh()
+
+    insert_candles(db, 'binance_spot', 'BTC/USDT', range(23, 30), 100.0)
+    insert_candles(db, 'binance_futures', 'BTC/USDT:USDT', range(23, 30), 102.0)
+    insert_funding(db, 'BTC/USDT:USDT', [24], 0.0016)
+    written = builder.refresh()
+    incremental = basis(db)
+
+    # Recomputes from the oldest leg high-water mark (the 16h settlement)
+    assert written == 14 < len(incremental)
+    assert builder.refresh() == 0
+    builder.refresh(full=True)
+    pd.testing.assert_frame_equal(incremental, basis(db))
+    assert incremental['funding_rate_hourly'].iloc[-1] == 0.0002
+
+def test_collect_basis_data_fetches_both_legs():
+    spot = BinanceSpotCollector()
+    spot.exchange = FakeExchange(NOW_MS, markets={
+        'BTC/USDT': {'quote': 'USDT', 'base': 'BTC', 'active': True},
+        'DOGE/USDT': {'quote': 'USDT', 'base': 'DOGE', 'active': True},
+    })
+    perp = BinanceFuturesCollector()
+    perp.exchange = FakeExchange(NOW_MS)
+    db = DatabaseManager(':memory:')
+
+    pairs = collect_basis_data(spot, perp, db, NOW_MS - 48 * HOUR_MS, NOW_MS, max_workers=3)
+    db.flush()
+    assert list(pairs) == ['BTC']
+    counts = db.con.execute("SELECT exchange, ticker, count(*) FROM ohlcv GROUP BY ALL ORDER BY exchange").fetchall()
+    assert counts == [('binance_futures', 'BTC/USDT:USDT', 49), ('binance_spot', 'BTC/USDT', 49)]
+    assert BasisBuilder(db.con).refresh() == 49
+    assert basis(db)['funding_rate_hourly'].notna().all()
+
+def test_collect_basis_data_survives_a_failing_leg(monkeypatch):
+    monkeypatch.setattr('scripts.collect_full_data.retry_wait', lambda attempt, error: 0)
+    spot = BinanceSpotCollector()
+    spot.exchange = FakeExchange(NOW_MS, markets={'BTC/USDT': {'quote': 'USDT', 'base': 'BTC', 'active': True}},
+                                 page_size=10)
+    # The spot leg resumes after a dropped connection on its second page
+    spot.exchange.failures[3] = ccxt.NetworkError('connection reset')
+    perp = BinanceFuturesCollector()
+    perp.exchange = FakeExchange(NOW_MS)
+    perp.exchange.failures[2] = ValueError('malformed payload')
+    db = DatabaseManager(':memory:')
+
+    collect_basis_data(spot, perp, db, NOW_MS - 48 * HOUR_MS, NOW_MS, max_workers=3)
+    db.flush()
+    counts = dict(db.con.execute("SELECT exchange, count(*) FROM ohlcv GROUP BY ALL").fetchall())
+    assert counts['binance_spot'] == 49
+    # Only the perp leg that hit the bad payload is missing
+    fundings = db.con.execute("SELECT count(*) FROM fundings").fetchone()[0]
+    assert (counts.get('binance_futures', 0) > 0) != (fundings > 0)
@@ -0,0 +1,33 @@
+import json
+import ccxt
+import pytest
+from conftest import NOW_MS, HOUR_MS
+from benchmarks import SimulatedExchange
+from benchmarks.run import main
+
+def test_simulated_exchange_limits_and_errors():
+    exchange = SimulatedExchange(NOW_MS, page_size=500, rate_limit=2, error_rate=0.0)
+    assert len(exchange.fetch_ohlcv('S000/USDT:USDT', '1h', NOW_MS - 2000 * HOUR_MS, 1000)) == 500
+    exchange.fetch_funding_rate_history('S000/USDT:USDT', NOW_MS - 100 * HOUR_MS, 1000)
+    with pytest.raises(ccxt.RateLimitExceeded):
+        exchange.fetch_ohlcv('S000/USDT:USDT', '1h', NOW_MS - HOUR_MS, 1000)
+
+    flaky = SimulatedExchange(NOW_MS, error_rate=1.0)
+    with pytest.raises(ccxt.NetworkError):
+        flaky.fetch_ohlcv('S000/USDT:USDT', '1h', NOW_MS - HOUR_MS, 1000)
+    assert flaky.stats['errors'] == 1
+
+def test_benchmark_suite_writes_comparable_json(tmp_path):
+    out = tmp_path / 'run.json'
+    args = ['--symbols', '2', '--days', '10', '--insert-rows', '1000', '--out', str(out)]
+    main(args)
+    report = main(args + ['--compare', str(out)])
+
+    saved = json.loads(out.read_text())
+    assert set(saved['results']) == set(report['results']) == {
+        'fetch_prices', 'fetch_prices_compact', 'iter_prices', 'fetch_funding_rates',
+        'collect_exchange_data', 'collect_exchange_data_async', 'db_insert_ohlcv'}
+    collect = saved['results']['collect_exchange_data']
+    assert collect['rows'] == 2 * (10 * 24 + 1 + 10 * 3 + 1)
+    assert collect['requests'] == 1 + 2 * 2  # markets + one page per dataset and symbol
+    assert saved['config']['symbols'] == 2
@@ -0,0 +1,44 @@
+import os
+import sys
+import subprocess
+import cli
+from collector.binance_futures import BinanceFuturesCollector
+from collector.binance_spot import BinanceSpotCollector
+from collector.sessions import SharedSession, shared_session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loaded_after(code):
+    """
+    Run `code` in a fresh interpreter and return the names of the modules it left imported.
+    """
+    out = subprocess.run([sys.executable, '-c', code + "\nimport sys; print(' '.join(sys.modules))"],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return set(out.split())
+
+def test_packages_import_submodules_on_demand():
+    modules = loaded_after("import collector, database, backtest")
+    assert not {'ccxt', 'pandas', 'collector.binance_futures', 'database.orchestrator', 'backtest.search'} & modules
+
+    modules = loaded_after("from collector import BinanceFuturesCollector")
+    assert 'collector.binance_futures' in modules
+    assert not {'ccxt.async_support', 'collector.hyperliquid', 'collector.binance_spot'} & modules
+
+def test_cli_dispatches_remaining_arguments(monkeypatch):
+    seen = []
+    monkeypatch.setattr('scripts.scan_funding.main', seen.append)
+    cli.main(['scan', '--top', '5', '--iterations', '1'])
+    assert seen == [['--top', '5', '--iterations', '1']]
+
+def test_binance_collectors_share_one_pooled_session(monkeypatch):
+    futures, spot = BinanceFuturesCollector(), BinanceSpotCollector()
+    session = shared_session('binance')
+    assert isinstance(session, SharedSession)
+    assert futures.exchange.session is session and spot.exchange.session is session
+
+    # Closing one collector's exchange leaves the pool to the other
+    adapter = session.get_adapter('https://fapi.binance.com')
+    closed = []
+    monkeypatch.setattr(adapter, 'close', lambda: closed.append(adapter))
+    futures.exchange.close()
+    assert session.get_adapter('https://api.binance.com') is adapter and not closed
@@ -0,0 +1,93 @@
+import duckdb
+import pandas as pd
+from database import CollectionState
+
+def make_state():
+    con = duckdb.connect()
+    con.execute("CREATE TABLE ohlcv (exchange VARCHAR, ticker VARCHAR, timestamp BIGINT)")
+    con.execute("INSERT INTO ohlcv VALUES ('hl', 'BTC', 100), ('hl', 'BTC', 200), ('hl', 'ETH', 50)")
+    return con, CollectionState(con)
+
+def test_resume_from_high_water_mark_and_checkpoint():
+    con, state = make_state()
+    assert state.resume_from('hl', 'BTC', 'ohlcv', 0) == 200
+    assert state.resume_from('hl', 'SOL', 'ohlcv', 0) == 0
+    assert state.resume_from('hl', 'BTC', 'fundings', 0) == 0
+
+    state.save_checkpoint('hl', 'SOL', 'ohlcv', 500)
+    assert state.resume_from('hl', 'SOL', 'ohlcv', 0) == 500
+
+def test_run_incremental_resumes_at_failed_window():
+    con, state = make_state()
+    requested = []
+
+    def failing_fetch(ws, we):
+        requested.append(ws)
+        if len(requested) == 3:
+            return None
+        return pd.DataFrame({'timestamp': [ws, we - 10]})
+
+    stored = []
+    state.run_incremental('hl', 'SOL', 'ohlcv', failing_fetch, stored.append, 0, 999, 100)
+    assert requested == [0, 100, 200]
+    # Resume at the last stored row of the last complete window
+    assert state.get_checkpoint('hl', 'SOL', 'ohlcv') == 189
+
+    requested.clear()
+    state.run_incremental('hl', 'SOL', 'ohlcv', lambda ws, we: requested.append(ws) or pd.DataFrame(),
+                          stored.append, 0, 999, 100)
+    assert requested[0] == 189
+    assert state.get_checkpoint('hl', 'SOL', 'ohlcv') == 1000
+
+def test_incremental_rerun_only_fetches_new_pages(fake_exchange):
+    from collector import HyperliquidCollector
+    from database import DatabaseManager
+    from scripts.collect_full_data import collect_exchange_data
+    from conftest import NOW_MS, HOUR_MS
+
+    hl = HyperliquidCollector()
+    hl.exchange = fake_exchange
+    db = DatabaseManager(':memory:')
+    state = CollectionState(db.con, db)
+    start = NOW_MS - 2500 * HOUR_MS
+
+    collect_exchange_data('hyperliquid', hl, db, start, NOW_MS, state)
+    db.flush()
+    assert db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0] == 2 * 2501
+
+    fake_exchange.calls.clear()
+    fake_exchange.now_ms = NOW_MS + 2 * HOUR_MS
+    collect_exchange_data('hyperliquid', hl, db, start, fake_exchange.now_ms, CollectionState(db.con, db))
+    db.flush()
+    fetches = [c for c in fake_exchange.calls if c[0] == 'fetch_ohlcv']
+    assert len(fetches) == 2
+    assert db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0] == 2 * 2503
+
+def test_exchange_error_mid_window_does_not_checkpoint_it(fake_exchange, monkeypatch):
+    import ccxt
+    from collector import HyperliquidCollector
+    from collector.windows import page_window_ms
+    from database import DatabaseManager
+    from scripts.collect_full_data import fetch_with_retry, store_prices
+    from conftest import NOW_MS, HOUR_MS
+
+    monkeypatch.setattr('scripts.collect_full_data.retry_wait', lambda attempt, error: 0)
+    hl = HyperliquidCollector()
+    hl.exchange = fake_exchange
+    db = DatabaseManager(':memory:')
+    state = CollectionState(db.con, db)
+    start = NOW_MS - 4500 * HOUR_MS
+    # Two-page windows; the second page of the second window fails on every attempt
+    for call in (4, 6, 8):
+        fake_exchange.failures[call] = ccxt.NetworkError('connection reset')
+
+    def fetch(ws, we):
+        return fetch_with_retry(lambda: hl.fetch_prices('BTC', ws, we, compact=True), 'Prices', 'BTC')
+
+    state.run_incremental('hyperliquid', 'BTC', 'ohlcv', fetch,
+                          lambda df: store_prices(db, df, 'hyperliquid', 'BTC'),
+                          start, NOW_MS, page_window_ms(HOUR_MS, pages=2))
+    db.flush()
+    stored = db.con.execute("SELECT max(timestamp) FROM ohlcv").fetchone()[0]
+    assert stored == start + 1999 * HOUR_MS
+    assert state.get_checkpoint('hyperliquid', 'BTC', 'ohlcv') == stored
@@ -1,3 +1,4 @@
+import os
 import pytest
 import pandas as pd
 from datetime import datetime, timedelta, timezone
@@ -5,7 +6,11 @@ from collector import BinanceFuturesCollector, BinanceSpotCollector, Hyperliquid
 
 @pytest.fixture
 def date_range():
-    end_date = datetime.now(timezone.utc)
+    # Record/replay runs (FUNDING_ARB_CACHE_DIR set) need stable request keys
+    if os.environ.get('FUNDING_ARB_CACHE_DIR'):
+        end_date = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    else:
+        end_date = datetime.now(timezone.utc)
     start_date = end_date - timedelta(hours=4)
     return start_date, end_date
 
@@ -0,0 +1,49 @@
+import pandas as pd
+from database import DatabaseManager, CollectionState
+
+def funding_frame(timestamps, rate=0.0001):
+    return pd.DataFrame({
+        'ticker': 'BTC/USDT:USDT',
+        'timestamp': timestamps,
+        'fundingRate': rate,
+        'info': [{}] * len(timestamps),
+    })
+
+def test_reinsert_is_an_upsert():
+    db = DatabaseManager(':memory:')
+    db.insert_funding(funding_frame([1, 2, 3]), 'binance_futures')
+    db.flush()
+    db.insert_funding(funding_frame([2, 3, 4], rate=0.0005), 'binance_futures')
+    db.insert_funding(funding_frame([4]), 'hyperliquid')
+    db.flush()
+
+    rows = db.con.execute(
+        "SELECT exchange, timestamp, funding_rate FROM fundings ORDER BY exchange, timestamp").fetchall()
+    assert rows == [
+        ('binance_futures', 1, 0.0001),
+        ('binance_futures', 2, 0.0005),
+        ('binance_futures', 3, 0.0005),
+        ('binance_futures', 4, 0.0005),
+        ('hyperliquid', 4, 0.0001),
+    ]
+    assert db.ingest_stats['rows'] == 7
+    assert db.ingest_rate() > 0
+
+def test_writes_are_buffered_until_threshold():
+    db = DatabaseManager(':memory:', flush_rows=5)
+    candles = pd.DataFrame({'ticker': 'ETH', 'timestamp': range(3), 'open': 1.0, 'high': 2.0,
+                            'low': 0.5, 'close': 1.5, 'volume': 10.0})
+    db.insert_ohlcv(candles, 'hyperliquid')
+    assert db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0] == 0
+    db.insert_ohlcv(candles.assign(timestamp=range(3, 6)), 'hyperliquid')
+    assert db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0] == 6
+
+def test_checkpoints_commit_with_buffered_rows():
+    db = DatabaseManager(':memory:')
+    state = CollectionState(db.con, db)
+    db.insert_funding(funding_frame([1, 2]), 'hyperliquid')
+    state.save_checkpoint('hyperliquid', 'BTC/USDT:USDT', 'fundings', 3)
+
+    assert db.con.execute("SELECT count(*) FROM collection_checkpoints").fetchone()[0] == 0
+    db.flush()
+    assert db.con.execute("SELECT cursor_ts FROM collection_checkpoints").fetchone()[0] == 3
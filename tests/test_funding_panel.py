@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from database import DatabaseManager, FundingAligner
+
+HOUR_MS = 60 * 60 * 1000
+
+def insert(db, exchange, ticker, hours, rate):
+    db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': np.asarray(hours) * HOUR_MS,
+                                    'funding_rate': rate}), exchange)
+    db.flush()
+
+def panel(db):
+    return db.con.execute("SELECT * FROM funding_panel ORDER BY asset, timestamp").fetchdf()
+
+def test_panel_aligns_8h_and_1h_funding():
+    db = DatabaseManager(':memory:')
+    insert(db, 'binance_futures', 'BTC/USDT:USDT', range(0, 24, 8), 0.0008)
+    insert(db, 'hyperliquid', 'BTC/USDC:USDC', range(0, 24), 0.0002)
+    insert(db, 'hyperliquid', 'SOL/USDC:USDC', range(0, 24), 0.0002)
+
+    assert FundingAligner(db.con).refresh() == 24
+    df = panel(db)
+    assert df['asset'].unique().tolist() == ['BTC']
+    assert df['paid_a'].sum() == 3 * 0.0008
+    np.testing.assert_allclose(df['rate_a'], 0.0001)
+    np.testing.assert_allclose(df['spread'], 0.0001)
+
+def test_incremental_refresh_matches_full_rebuild():
+    db = DatabaseManager(':memory:')
+    insert(db, 'binance_futures', 'BTC/USDT:USDT', range(0, 24, 8), 0.0008)
+    insert(db, 'hyperliquid', 'BTC/USDC:USDC', range(0, 24), 0.0002)
+    aligner = FundingAligner(db.con)
+    aligner.refresh()
+
+    insert(db, 'binance_futures', 'BTC/USDT:USDT', [24, 28], 0.0004)
+    insert(db, 'hyperliquid', 'BTC/USDC:USDC', range(24, 30), 0.0003)
+    written = aligner.refresh()
+    incremental = panel(db)
+
+    assert written < len(incremental)
+    assert aligner.refresh() == 0
+    aligner.refresh(full=True)
+    pd.testing.assert_frame_equal(incremental, panel(db))
+    # 28h settlement came 4h after the previous one: per-hour rate is 0.0004 / 4
+    assert incremental.loc[incremental['timestamp'] == 28 * HOUR_MS, 'rate_a'].item() == 0.0001
+
+def test_rows_written_behind_the_high_water_mark_are_recomputed():
+    db = DatabaseManager(':memory:')
+    aligner = FundingAligner(db.con, db)
+    insert(db, 'binance_futures', 'BTC/USDT:USDT', range(0, 48, 8), 0.0008)
+    insert(db, 'hyperliquid', 'BTC/USDC:USDC', range(0, 48), 0.0002)
+    aligner.refresh()
+
+    # A restated settlement well before both legs' latest rows
+    insert(db, 'binance_futures', 'BTC/USDT:USDT', [16], 0.0016)
+    written = aligner.refresh()
+    incremental = panel(db)
+
+    assert 0 < written < len(incremental)
+    assert incremental.loc[incremental['timestamp'] == 16 * HOUR_MS, 'paid_a'].item() == 0.0016
+    assert aligner.refresh() == 0
+    aligner.refresh(full=True)
+    pd.testing.assert_frame_equal(incremental, panel(db))
@@ -0,0 +1,97 @@
+import ccxt
+import pandas as pd
+from conftest import FakeExchange, NOW_MS, HOUR_MS
+from collector import BinanceFuturesCollector
+from database import DatabaseManager, GapScanner
+
+def store(db, exchange, ticker, stamps, table):
+    df = pd.DataFrame({'ticker': ticker, 'timestamp': stamps})
+    if table == 'fundings':
+        db.insert_funding(df.assign(funding_rate=0.0001), exchange)
+    else:
+        db.insert_ohlcv(df.assign(open=1.0, high=1.0, low=1.0, close=1.0, volume=1.0), exchange)
+
+def test_find_gaps_uses_each_series_cadence():
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 400 * HOUR_MS
+    eight_h = [ts for ts in range(start, NOW_MS + 1, 8 * HOUR_MS) if ts != start + 80 * HOUR_MS]
+    four_h = [ts for ts in range(start, NOW_MS + 1, 4 * HOUR_MS) if ts != start + 40 * HOUR_MS]
+    hourly = [ts for ts in range(start, NOW_MS + 1, HOUR_MS) if not start + 10 * HOUR_MS <= ts < start + 13 * HOUR_MS]
+    store(db, 'binance_futures', 'BTC/USDT:USDT', eight_h, 'fundings')
+    store(db, 'binance_futures', 'AXS/USDT:USDT', four_h, 'fundings')
+    store(db, 'hyperliquid', 'BTC/USDC:USDC', hourly, 'fundings')
+    db.flush()
+
+    gaps = GapScanner(db.con).find_gaps('fundings')
+    assert gaps[['ticker', 'missing']].values.tolist() == [
+        ['AXS/USDT:USDT', 1], ['BTC/USDT:USDT', 1], ['BTC/USDC:USDC', 3]]
+    btc = gaps[gaps['ticker'] == 'BTC/USDC:USDC'].iloc[0]
+    assert (btc['gap_start'], btc['gap_end']) == (start + 9 * HOUR_MS + 1, start + 13 * HOUR_MS - 1)
+
+def test_backfill_requests_scale_with_damage():
+    exchange = FakeExchange(NOW_MS)
+    bf = BinanceFuturesCollector()
+    bf.exchange = exchange
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 5000 * HOUR_MS
+    holes = {start + 100 * HOUR_MS, start + 120 * HOUR_MS, start + 4000 * HOUR_MS}
+    store(db, 'binance_futures', 'BTC/USDT:USDT',
+          [ts for ts in range(start, NOW_MS + 1, HOUR_MS) if ts not in holes], 'ohlcv')
+    db.flush()
+
+    scanner = GapScanner(db.con)
+    result = scanner.backfill(db, {'binance_futures': bf}, 'ohlcv')
+
+    # Two nearby holes share one request (which also rewrites the 19 candles
+    # between them), the distant one gets its own
+    assert result == {'gaps': 3, 'requests': 2, 'failed': 0, 'rows': 3 + 19}
+    assert len([c for c in exchange.calls if c[0] == 'fetch_ohlcv']) == 2
+    assert scanner.find_gaps('ohlcv').empty
+
+def test_unrecoverable_gaps_are_not_refetched():
+    exchange = FakeExchange(NOW_MS, funding_interval_ms=16 * HOUR_MS)
+    bf = BinanceFuturesCollector()
+    bf.exchange = exchange
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 160 * HOUR_MS
+    # Stored 8h series with one hole at an hour the exchange has no row for
+    stamps = list(range(start, NOW_MS + 1, 8 * HOUR_MS))
+    hole = next(ts for ts in stamps[5:] if ts % (16 * HOUR_MS))
+    store(db, 'binance_futures', 'BTC/USDT:USDT', [ts for ts in stamps if ts != hole], 'fundings')
+    db.flush()
+
+    scanner = GapScanner(db.con)
+    first = scanner.backfill(db, {'binance_futures': bf}, 'fundings')
+    second = scanner.backfill(db, {'binance_futures': bf}, 'fundings')
+    assert first['gaps'] == 1 and first['rows'] == 0
+    assert second == {'gaps': 0, 'requests': 0, 'failed': 0, 'rows': 0}
+    assert len(scanner.find_gaps('fundings', recheck=True)) == 1
+
+def test_truncated_tails_are_gaps():
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 100 * HOUR_MS
+    store(db, 'hyperliquid', 'BTC/USDC:USDC', list(range(start, NOW_MS + 1, HOUR_MS)), 'ohlcv')
+    store(db, 'hyperliquid', 'ETH/USDC:USDC', list(range(start, NOW_MS - 29 * HOUR_MS, HOUR_MS)), 'ohlcv')
+    db.flush()
+
+    scanner = GapScanner(db.con)
+    tail = scanner.find_gaps('ohlcv').iloc[0]
+    assert (tail['ticker'], tail['gap_start'], tail['gap_end'], tail['missing']) == (
+        'ETH/USDC:USDC', NOW_MS - 30 * HOUR_MS + 1, NOW_MS, 30)
+    assert len(scanner.find_gaps('ohlcv', end_ts=NOW_MS + 10 * HOUR_MS)) == 2
+
+def test_failed_refetch_is_retried_next_scan():
+    exchange = FakeExchange(NOW_MS)
+    bf = BinanceFuturesCollector()
+    bf.exchange = exchange
+    exchange.failures[1] = ccxt.NetworkError('connection reset')
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 200 * HOUR_MS
+    store(db, 'binance_futures', 'BTC/USDT:USDT',
+          [ts for ts in range(start, NOW_MS + 1, HOUR_MS) if ts != start + 50 * HOUR_MS], 'ohlcv')
+    db.flush()
+
+    scanner = GapScanner(db.con)
+    assert scanner.backfill(db, {'binance_futures': bf}, 'ohlcv') == {'gaps': 1, 'requests': 1, 'failed': 1, 'rows': 0}
+    assert scanner.backfill(db, {'binance_futures': bf}, 'ohlcv') == {'gaps': 1, 'requests': 1, 'failed': 0, 'rows': 1}
+    assert scanner.find_gaps('ohlcv', recheck=True).empty
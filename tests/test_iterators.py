@@ -0,0 +1,79 @@
+import asyncio
+import ccxt
+import pandas as pd
+from conftest import FakeExchange, NOW_MS, HOUR_MS
+from collector import BinanceSpotCollector, HyperliquidCollector, AsyncBinanceFuturesCollector
+from database import DatabaseManager
+from scripts.collect_full_data import stream_with_retry, stream_with_retry_async, store_prices, store_funding
+
+def test_iter_prices_yields_one_chunk_per_page(fake_exchange):
+    spot = BinanceSpotCollector()
+    spot.exchange = fake_exchange
+    start = NOW_MS - 2500 * HOUR_MS
+
+    chunks = list(spot.iter_prices('BTC/USDT', start, NOW_MS))
+    assert [len(c) for c in chunks] == [1000, 1000, 501]
+    assert list(chunks[0].columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'ticker', 'exchange']
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), spot.fetch_prices('BTC/USDT', start, NOW_MS, compact=True),
+        check_categorical=False)
+
+def test_short_pages_do_not_end_the_range():
+    spot = BinanceSpotCollector()
+    spot.exchange = FakeExchange(NOW_MS, page_size=500)
+    start = NOW_MS - 2500 * HOUR_MS
+
+    chunks = list(spot.iter_prices('BTC/USDT', start, NOW_MS))
+    assert [len(c) for c in chunks] == [500] * 5 + [1]
+    assert len(spot.fetch_prices('BTC/USDT', start, NOW_MS - 1200 * HOUR_MS)) == 1301
+
+def test_iter_funding_rates_sync_and_async(fake_exchange, async_fake_exchange):
+    hl = HyperliquidCollector()
+    hl.exchange = fake_exchange
+    start = NOW_MS - 30 * 24 * HOUR_MS
+    sync_rows = sum(len(c) for c in hl.iter_funding_rates('BTC/USDC:USDC', start, NOW_MS))
+
+    bf = AsyncBinanceFuturesCollector()
+    asyncio.run(bf.close())
+    bf.exchange = async_fake_exchange
+
+    async def collect():
+        return [c async for c in bf.iter_funding_rates('BTC/USDT:USDT', start, NOW_MS)]
+
+    async_chunks = asyncio.run(collect())
+    assert sync_rows == sum(len(c) for c in async_chunks) == 91
+    assert all(c['funding_rate'].dtype == 'float64' for c in async_chunks)
+
+def test_stream_with_retry_resumes_after_last_stored_row(fake_exchange, monkeypatch):
+    monkeypatch.setattr('scripts.collect_full_data.retry_wait', lambda attempt, error: 0)
+    spot = BinanceSpotCollector()
+    spot.exchange = fake_exchange
+    # The second page request fails inside the collector's page loop
+    fake_exchange.failures[2] = ccxt.NetworkError('connection reset')
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 2500 * HOUR_MS
+
+    rows = stream_with_retry(lambda since: spot.iter_prices('BTC/USDT', since, NOW_MS),
+                             lambda chunk: store_prices(db, chunk, 'binance_spot', 'BTC/USDT'),
+                             'Prices', 'BTC/USDT', start)
+    db.flush()
+    starts = [call[2] for call in fake_exchange.calls]
+    assert starts == [start, start + 999 * HOUR_MS + 1, start + 999 * HOUR_MS + 1, start + 1999 * HOUR_MS + 1]
+    assert rows == 2501
+    assert db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0] == 2501
+
+def test_async_funding_errors_reach_stream_with_retry(async_fake_exchange, monkeypatch):
+    monkeypatch.setattr('scripts.collect_full_data.retry_wait', lambda attempt, error: 0)
+    bf = AsyncBinanceFuturesCollector()
+    asyncio.run(bf.close())
+    bf.exchange = async_fake_exchange
+    async_fake_exchange.failures[1] = ccxt.RateLimitExceeded('429')
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 30 * 24 * HOUR_MS
+
+    rows = asyncio.run(stream_with_retry_async(
+        lambda since: bf.iter_funding_rates('BTC/USDT:USDT', since, NOW_MS),
+        lambda chunk: store_funding(db, chunk, 'binance_futures', 'BTC/USDT:USDT'),
+        'Funding', 'BTC/USDT:USDT', start))
+    assert len(async_fake_exchange.calls) == 2
+    assert rows == 91
@@ -0,0 +1,60 @@
+import os
+import asyncio
+from conftest import FakeExchange, AsyncFakeExchange, NOW_MS
+from collector.market_cache import MarketCache, build_index
+
+MARKETS = {
+    'BTC/USDT:USDT': {'quote': 'USDT', 'base': 'BTC', 'active': True},
+    'BTC/USDT:USDT-250627': {'quote': 'USDT', 'base': 'BTC', 'active': True},
+    'BTC/USDT': {'quote': 'USDT', 'base': 'BTC', 'active': True},
+    '1000PEPE/USDT:USDT': {'quote': 'USDT', 'base': '1000PEPE', 'active': True},
+    'OLD/USDT:USDT': {'quote': 'USDT', 'base': 'OLD', 'active': False},
+    'BTC/BUSD:BUSD': {'quote': 'BUSD', 'base': 'BTC', 'active': True},
+}
+
+HL_MARKETS = {
+    'BTC/USDC:USDC': {'quote': 'USDC', 'base': 'BTC', 'active': True},
+    'kPEPE/USDC:USDC': {'quote': 'USDC', 'base': 'kPEPE', 'active': True},
+    'SOL/USDC:USDC': {'quote': 'USDC', 'base': 'SOL', 'active': True},
+}
+
+def test_build_index_keeps_active_linear_perps():
+    index = build_index(MARKETS)
+    assert index['active'] == ['1000PEPE/USDT:USDT', 'BTC/USDT', 'BTC/USDT:USDT', 'BTC/USDT:USDT-250627']
+    assert index['perps'] == ['1000PEPE/USDT:USDT', 'BTC/USDT:USDT']
+    assert index['assets'] == {'PEPE': ['1000PEPE/USDT:USDT', 1000], 'BTC': ['BTC/USDT:USDT', 1]}
+
+def test_entry_is_shared_across_instances_and_processes(tmp_path):
+    first = FakeExchange(NOW_MS, markets=dict(MARKETS))
+    MarketCache(str(tmp_path)).get(first, 'binance_futures')
+    assert first.calls == [('load_markets',)]
+
+    # A fresh cache object over the same directory stands in for another process
+    other = FakeExchange(NOW_MS)
+    other.markets = {}
+    cache = MarketCache(str(tmp_path))
+    entry = cache.get(other, 'binance_futures')
+    assert other.calls == []
+    assert set(other.markets) == set(MARKETS)
+    assert entry['perps'] == ['1000PEPE/USDT:USDT', 'BTC/USDT:USDT']
+
+    cache.get(FakeExchange(NOW_MS), 'binance_futures')
+    assert cache.stats == {'memory_hits': 1, 'disk_hits': 1, 'loads': 0}
+    assert os.listdir(tmp_path) == ['binance_futures.json']
+
+def test_expired_entry_is_reloaded(tmp_path):
+    exchange = FakeExchange(NOW_MS, markets=dict(MARKETS))
+    cache = MarketCache(str(tmp_path), ttl=0)
+    cache.get(exchange, 'binance_futures')
+    cache.get(exchange, 'binance_futures')
+    assert exchange.calls == [('load_markets',), ('load_markets',)]
+
+def test_async_get_and_cross_exchange_asset_map(tmp_path):
+    cache = MarketCache(str(tmp_path))
+    cache.get(FakeExchange(NOW_MS, markets=dict(MARKETS)), 'binance_futures')
+    asyncio.run(cache.get_async(AsyncFakeExchange(NOW_MS, markets=dict(HL_MARKETS)), 'hyperliquid'))
+
+    assert cache.asset_map(['binance_futures', 'hyperliquid']) == {
+        'BTC': {'binance_futures': 'BTC/USDT:USDT', 'hyperliquid': 'BTC/USDC:USDC'},
+        'PEPE': {'binance_futures': '1000PEPE/USDT:USDT', 'hyperliquid': 'kPEPE/USDC:USDC'},
+    }
@@ -0,0 +1,75 @@
+import json
+import urllib.request
+from conftest import NOW_MS, HOUR_MS
+from collector import HyperliquidCollector
+from collector.metrics import Metrics, METRICS, Histogram, attach_metrics
+from collector.rate_limiter import TokenBucket
+
+class FakeHttp:
+    def fetch(self, url, method='GET', headers=None, body=None):
+        if 'fail' in url:
+            raise ConnectionError(url)
+        return {}
+
+def test_histogram_and_prometheus_text():
+    hist = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value)
+    assert hist.counts == [1, 2, 1]
+    assert hist.quantile(0.5) == 1.0 and hist.quantile(1.0) == 3.0
+
+    metrics = Metrics()
+    http = FakeHttp()
+    attach_metrics(http, 'hyperliquid', metrics)
+    http.fetch('https://api.hyperliquid.xyz/info', 'POST', body='{"type": "candleSnapshot"}')
+    try:
+        http.fetch('https://fapi.binance.com/fapi/v1/fail')
+    except ConnectionError:
+        pass
+    metrics.record_page('hyperliquid', 'ohlcv', 'BTC/USDC:USDC', 500, 0.2)
+
+    text = metrics.to_prometheus()
+    assert 'funding_arb_request_seconds_bucket{exchange="hyperliquid",endpoint="info:candleSnapshot",le="+Inf"} 1' in text
+    assert 'funding_arb_requests_total{exchange="hyperliquid",endpoint="fail",status="error"} 1' in text
+    assert 'funding_arb_rows_total{exchange="hyperliquid",dataset="ohlcv",symbol="BTC/USDC:USDC"} 500' in text
+    assert metrics.summary()['requests']['hyperliquid']['fail']['errors'] == 1
+
+def test_collection_run_is_instrumented(fake_exchange, tmp_path):
+    METRICS.reset()
+    hl = HyperliquidCollector()
+    hl.exchange = fake_exchange
+    hl.fetch_prices('BTC/USDC:USDC', NOW_MS - 1500 * HOUR_MS, NOW_MS, compact=True)
+    TokenBucket(1200, name='hyperliquid').handle_response(429, {'Retry-After': '0'})
+
+    path = METRICS.write(str(tmp_path), 'test')
+    with open(path) as f:
+        summary = json.load(f)
+    assert summary['symbols']['hyperliquid']['BTC/USDC:USDC']['ohlcv']['pages'] == 2
+    assert summary['symbols']['hyperliquid']['BTC/USDC:USDC']['ohlcv']['rows'] == 1501
+    assert summary['slowest_symbols'][0]['symbol'] == 'BTC/USDC:USDC'
+    assert summary['rate_limited'] == {'hyperliquid:429': 1}
+    assert summary['summed_phase_seconds']['frame'] > 0
+    assert (tmp_path / 'metrics.prom').read_text().startswith('# HELP funding_arb_request_seconds')
+
+    server = METRICS.serve(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert 'funding_arb_pages_total' in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_drained_worker_metrics_merge_into_the_run():
+    worker, run = Metrics(), Metrics()
+    worker.observe_request('hyperliquid', 'info', 0.2)
+    worker.record_page('hyperliquid', 'ohlcv', 'BTC/USDC:USDC', 500, 0.2)
+    run.observe_request('hyperliquid', 'info', 0.3)
+    run.merge(worker.drain())
+    run.merge(worker.drain())
+
+    summary = run.summary()
+    assert summary['requests']['hyperliquid']['info']['count'] == 2
+    assert summary['symbols']['hyperliquid']['BTC/USDC:USDC']['ohlcv']['rows'] == 500
+    assert abs(summary['summed_phase_seconds']['network'] - 0.5) < 1e-9
+    assert worker.summary()['requests'] == {}
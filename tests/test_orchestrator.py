@@ -0,0 +1,100 @@
+import pytest
+import ccxt
+from conftest import NOW_MS, HOUR_MS, FakeExchange
+from collector import BinanceFuturesCollector, HyperliquidCollector
+from collector.metrics import METRICS
+from database import DatabaseManager, JobQueue, Orchestrator, plan_jobs
+
+def fake_collector(exchange):
+    # Built inside each worker process (must be importable for 'spawn')
+    collector = {'binance_futures': BinanceFuturesCollector, 'hyperliquid': HyperliquidCollector}[exchange]()
+    collector.exchange = FakeExchange(NOW_MS, funding_interval_ms=collector.funding_interval_ms)
+    return collector
+
+def flaky_collector(exchange):
+    # The first request made by each worker fails, in the middle of a job
+    collector = fake_collector(exchange)
+    collector.exchange.failures[2] = ccxt.NetworkError('connection reset')
+    return collector
+
+def failing_collector(exchange):
+    raise RuntimeError(f"cannot build {exchange}")
+
+def test_plan_is_aligned_and_enqueue_is_idempotent():
+    db = DatabaseManager(':memory:')
+    queue = JobQueue(db.con)
+    start = NOW_MS - 500 * HOUR_MS
+    jobs = plan_jobs('hyperliquid', ['BTC/USDC:USDC', 'ETH/USDC:USDC'], start, NOW_MS, window_pages=0.2)
+    # 200h windows aligned to the epoch: both datasets cover the range in 4 windows
+    assert len(jobs) == 2 * 2 * 4
+    assert jobs['start_ts'].min() <= start and (jobs['start_ts'] % (200 * HOUR_MS) == 0).all()
+    assert queue.enqueue(jobs) == 16
+    later = plan_jobs('hyperliquid', ['BTC/USDC:USDC', 'ETH/USDC:USDC'], start + HOUR_MS, NOW_MS, window_pages=0.2)
+    assert queue.enqueue(later) == 0
+
+def test_lease_respects_caps_and_retries_until_failed():
+    db = DatabaseManager(':memory:')
+    queue = JobQueue(db.con, max_attempts=2, retry_backoff_ms=0)
+    for exchange, symbol in (('binance_futures', 'BTC/USDT:USDT'), ('hyperliquid', 'BTC/USDC:USDC')):
+        queue.enqueue(plan_jobs(exchange, [symbol], 0, 3500 * HOUR_MS, datasets=('ohlcv',), window_pages=1))
+
+    leased = queue.lease('me', 10, caps={'binance_futures': 2}, in_flight={'binance_futures': 1})
+    assert sorted(leased['exchange']) == ['binance_futures'] + ['hyperliquid'] * 4
+    assert queue.lease('me', 10, caps={'binance_futures': 2}, in_flight={'binance_futures': 2}).empty
+
+    job = leased['job_id'].iloc[0]
+    assert queue.fail(job, 'timeout') == 'pending'
+    assert job in set(queue.lease('me', 10)['job_id'])
+    assert queue.fail(job, 'timeout') == 'failed'
+    assert queue.recover() == 7
+    assert queue.counts() == {'pending': 7, 'failed': 1}
+
+def test_orchestrator_collects_with_worker_processes(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'crypto.duckdb'))
+    queue = JobQueue(db.con, max_attempts=1)
+    start = NOW_MS - 1500 * HOUR_MS
+    queue.enqueue(plan_jobs('binance_futures', ['BTC/USDT:USDT', 'ETH/USDT:USDT'], start, NOW_MS))
+    queue.enqueue(plan_jobs('hyperliquid', ['BTC/USDC:USDC'], start, NOW_MS))
+    # No collector exists for this exchange, so its job fails inside the worker
+    queue.enqueue(plan_jobs('binance_FAIL', ['X/USDT:USDT'], start, NOW_MS, datasets=('ohlcv',)))
+
+    METRICS.reset()
+    orchestrator = Orchestrator(db, queue, processes=2, factory=fake_collector,
+                                rate_limit_dir=str(tmp_path / 'limits'))
+    counts = orchestrator.run()
+    assert counts == {'done': 6, 'failed': 1}
+    assert orchestrator.stats['done'] == 6
+    rows = dict(db.con.execute("SELECT exchange || ' ' || ticker, count(*) FROM ohlcv GROUP BY ALL").fetchall())
+    # Pages fetched in the workers are part of this process's run summary
+    fetched = METRICS.summary()['symbols']['hyperliquid']['BTC/USDC:USDC']['ohlcv']['rows']
+    assert fetched == rows['hyperliquid BTC/USDC:USDC']
+    # One 5000-candle window, aligned to the epoch, covers the whole range
+    aligned = start // (5000 * HOUR_MS) * (5000 * HOUR_MS)
+    assert rows['hyperliquid BTC/USDC:USDC'] == (NOW_MS - aligned) // HOUR_MS + 1
+    funding = db.con.execute(
+        "SELECT count(*) FROM fundings WHERE exchange = 'binance_futures' AND ticker = 'BTC/USDT:USDT'").fetchone()[0]
+    assert funding > 1500 / 8
+
+    # A rerun finds nothing left to do and fetches nothing
+    again = Orchestrator(db, queue, processes=2, factory=failing_collector)
+    assert again.run() == counts
+    assert again.stats['done'] == 0
+
+def test_fetch_errors_fail_the_job_instead_of_storing_it(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'crypto.duckdb'))
+    queue = JobQueue(db.con, max_attempts=2, retry_backoff_ms=0)
+    start = NOW_MS - 1500 * HOUR_MS
+    queue.enqueue(plan_jobs('hyperliquid', ['BTC/USDC:USDC'], start, NOW_MS, datasets=('ohlcv',), window_pages=2))
+
+    orchestrator = Orchestrator(db, queue, processes=1, factory=flaky_collector,
+                                rate_limit_dir=str(tmp_path / 'limits'))
+    assert orchestrator.run() == {'done': 2}
+    assert orchestrator.stats['retried'] == 1
+    aligned = start // (2000 * HOUR_MS) * (2000 * HOUR_MS)
+    rows = db.con.execute("SELECT count(*) FROM ohlcv").fetchone()[0]
+    assert rows == (NOW_MS - aligned) // HOUR_MS + 1
+
+def test_zero_caps_are_rejected():
+    db = DatabaseManager(':memory:')
+    with pytest.raises(ValueError, match='hyperliquid'):
+        Orchestrator(db, processes=1, caps={'binance_futures': 2, 'hyperliquid': 0})
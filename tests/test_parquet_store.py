@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+from conftest import HOUR_MS, NOW_MS
+from database.database_manager import DatabaseManager
+from database.parquet_store import ParquetStore, month_of
+
+DAY_MS = 24 * HOUR_MS
+
+def make_db(days=70):
+    db = DatabaseManager(':memory:')
+    stamps = list(range(NOW_MS - days * DAY_MS, NOW_MS + 1, 8 * HOUR_MS))
+    for exchange, ticker in (('binance_futures', 'BTC/USDT:USDT'), ('binance_futures', 'ETH/USDT:USDT'),
+                             ('hyperliquid', 'BTC/USDC:USDC')):
+        db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': stamps, 'funding_rate': 0.0001}), exchange)
+        db.insert_ohlcv(pd.DataFrame({'ticker': ticker, 'timestamp': stamps, 'open': 1.0, 'high': 2.0,
+                                      'low': 0.5, 'close': 1.5, 'volume': 10.0}), exchange)
+    db.flush()
+    return db, stamps
+
+def test_export_partitions_by_exchange_ticker_month(tmp_path):
+    db, stamps = make_db()
+    store = ParquetStore(str(tmp_path))
+
+    assert store.export_all(db.con) == {'fundings': 3 * len(stamps), 'ohlcv': 3 * len(stamps)}
+    ticker_dir = tmp_path / 'fundings' / 'exchange=binance_futures' / 'ticker=BTC%2FUSDT%3AUSDT'
+    months = sorted(os.listdir(ticker_dir))
+    assert months == sorted({f"month={month_of(ts)}" for ts in stamps})
+    meta = db.con.execute(f"SELECT DISTINCT compression FROM parquet_metadata('{tmp_path}/**/*.parquet')").fetchall()
+    assert meta == [('ZSTD',)]
+
+def test_load_pushes_down_filters(tmp_path):
+    db, stamps = make_db()
+    store = ParquetStore(str(tmp_path))
+    store.export_all(db.con)
+
+    start, end = stamps[10], stamps[20]
+    df = store.load('ohlcv', 'binance_futures', 'BTC/USDT:USDT', start, end, columns=['timestamp', 'close'])
+    assert df.columns.tolist() == ['timestamp', 'close']
+    assert df['timestamp'].tolist() == stamps[10:21]
+
+    plan = db.con.execute(f"""EXPLAIN ANALYZE SELECT close FROM {store._scan('ohlcv')}
+        WHERE exchange = 'hyperliquid' AND month = '{month_of(NOW_MS)}'""").fetchall()[0][1]
+    assert 'Scanning Files: 1/' in plan
+
+def test_reexport_rewrites_only_changed_months(tmp_path):
+    db, stamps = make_db()
+    store = ParquetStore(str(tmp_path))
+    store.export(db.con, 'fundings')
+
+    db.con.execute("UPDATE fundings SET funding_rate = 0.0005 WHERE timestamp = ?", [NOW_MS])
+    written = store.export(db.con, 'fundings', start_ts=NOW_MS)
+
+    df = store.load('fundings')
+    assert len(df) == 3 * len(stamps)
+    assert written == (df['timestamp'].map(month_of) == month_of(NOW_MS)).sum()
+    assert (df.loc[df['timestamp'] == NOW_MS, 'funding_rate'] == 0.0005).all()
+    assert store.load('ohlcv').empty
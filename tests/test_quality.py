@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from conftest import HOUR_MS
+from database import DatabaseManager, DataQuality
+
+HOURS = 200
+
+def candles(ticker, close, volume=10.0):
+    return pd.DataFrame({'ticker': ticker, 'timestamp': np.arange(len(close)) * HOUR_MS,
+                         'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                         'volume': volume})
+
+def sample_data():
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, HOURS)))
+    a = candles('BTC/USDT:USDT', close)
+    b = candles('BTC/USDC:USDC', close * (1 + rng.normal(0, 0.0005, HOURS)))
+    a.loc[150, ['close', 'high']] = a.loc[150, 'close'] * 1.5
+    b.loc[100, 'volume'] = 0.0
+    b.loc[120:123, ['open', 'high', 'low', 'close']] = b.loc[119, 'close']
+    funding_a = pd.DataFrame({'ticker': 'BTC/USDT:USDT', 'timestamp': np.arange(0, HOURS, 8) * HOUR_MS,
+                              'funding_rate': 0.0001})
+    funding_a.loc[20, 'funding_rate'] = 0.003
+    funding_b = pd.DataFrame({'ticker': 'BTC/USDC:USDC', 'timestamp': np.arange(HOURS) * HOUR_MS,
+                              'funding_rate': 0.0000125 + rng.normal(0, 1e-6, HOURS)})
+    return a, b, funding_a, funding_b
+
+def ingest(db, a, b, funding_a, funding_b):
+    db.insert_ohlcv(a, 'binance_futures')
+    db.insert_ohlcv(b, 'hyperliquid')
+    db.insert_funding(funding_a, 'binance_futures')
+    db.insert_funding(funding_b, 'hyperliquid')
+    db.flush()
+
+def tables(db):
+    return (db.con.execute("SELECT * FROM quality_flags ORDER BY ALL").fetchdf(),
+            db.con.execute("SELECT * FROM divergence ORDER BY asset, timestamp").fetchdf())
+
+def test_flags_and_divergence_are_computed_on_flush():
+    db = DatabaseManager(':memory:')
+    quality = DataQuality(db.con, db)
+    ingest(db, *sample_data())
+
+    flags, divergence = tables(db)
+    found = set(zip(flags['exchange'], flags['flag'], flags['timestamp'] // HOUR_MS))
+    assert found == {
+        ('binance_futures', 'price_jump', 150), ('binance_futures', 'funding_spike', 160),
+        ('hyperliquid', 'zero_volume', 100),
+        ('hyperliquid', 'stale_close', 121), ('hyperliquid', 'stale_close', 122), ('hyperliquid', 'stale_close', 123),
+    }
+    assert len(divergence) == HOURS
+    assert divergence['divergence_index'].iloc[:10].isna().all()
+    assert divergence.loc[divergence['price_z'].abs().idxmax(), 'timestamp'] == 150 * HOUR_MS
+    assert divergence.loc[divergence['funding_z'].abs().idxmax(), 'timestamp'] == 160 * HOUR_MS
+    assert db.con.execute("SELECT count(*) FROM ohlcv_clean").fetchone()[0] == 2 * HOURS - 5
+    assert quality.summary()['rows'].sum() == 6
+
+def test_batches_match_full_rebuild_and_repairs_clear_flags():
+    a, b, funding_a, funding_b = sample_data()
+    db = DatabaseManager(':memory:')
+    quality = DataQuality(db.con, db)
+    for lo, hi in ((0, 90), (90, 130), (130, HOURS)):
+        hours = funding_a['timestamp'] // HOUR_MS
+        ingest(db, a.iloc[lo:hi], b.iloc[lo:hi], funding_a[(hours >= lo) & (hours < hi)], funding_b.iloc[lo:hi])
+    incremental = tables(db)
+    quality.rebuild()
+    for got, want in zip(incremental, tables(db)):
+        pd.testing.assert_frame_equal(got, want)
+
+    # Refetched candles without the outlier replace its flag
+    a.loc[150, ['close', 'high']] = a.loc[150, ['close', 'high']] / 1.5
+    db.insert_ohlcv(a.iloc[150:151], 'binance_futures')
+    db.flush()
+    flags, divergence = tables(db)
+    assert 'price_jump' not in set(flags['flag'])
+    assert abs(divergence.set_index('timestamp').loc[150 * HOUR_MS, 'price_z']) < 3
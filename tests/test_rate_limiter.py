@@ -0,0 +1,38 @@
+from collector import BinanceFuturesCollector, BinanceSpotCollector
+from collector.rate_limiter import TokenBucket, FileBackend
+
+def test_bucket_queues_callers_once_burst_is_spent():
+    bucket = TokenBucket(budget_per_minute=600, burst_seconds=1)  # 10 tokens/sec, capacity 10
+    assert bucket.reserve(10) == 0
+    assert 0.45 < bucket.reserve(5) <= 0.5
+    assert 0.95 < bucket.reserve(5) <= 1.0
+
+def test_limiters_are_per_api_family():
+    futures = BinanceFuturesCollector()
+    spot = BinanceSpotCollector()
+    assert futures.exchange.rate_limiter is BinanceFuturesCollector().exchange.rate_limiter
+    assert futures.exchange.rate_limiter is not spot.exchange.rate_limiter
+    assert (futures.exchange.rate_limiter.budget_per_minute, spot.exchange.rate_limiter.budget_per_minute) == (2400, 6000)
+
+    # Spot weight reported to the futures instance only clamps the spot bucket
+    futures.exchange.on_rest_response(200, 'OK', 'https://api.binance.com/api/v3/exchangeInfo', 'GET',
+                                      {'x-mbx-used-weight-1m': '6000'}, '{}', {}, None)
+    assert spot.exchange.rate_limiter.reserve(1) > 0
+    assert futures.exchange.rate_limiter.reserve(1) == 0
+
+def test_rate_limit_responses_penalize_and_used_weight_clamps():
+    bucket = TokenBucket(budget_per_minute=600, burst_seconds=1)
+    bucket.handle_response(200, {'X-MBX-USED-WEIGHT-1M': '2400'})
+    assert bucket.reserve(1) > 0
+
+    bucket = TokenBucket(budget_per_minute=600, burst_seconds=1)
+    bucket.handle_response(429, {'Retry-After': '7'})
+    assert 6.9 < bucket.reserve(1) <= 7.2
+    assert bucket.stats['penalties'] == 1
+
+def test_file_backend_shares_budget(tmp_path):
+    path = str(tmp_path / 'binance.json')
+    a = TokenBucket(600, burst_seconds=1, backend=FileBackend(path))
+    b = TokenBucket(600, burst_seconds=1, backend=FileBackend(path))
+    assert a.reserve(10) == 0
+    assert b.reserve(10) > 0.9
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from collector.rolling import RollingStats
+from collector.schema import funding_chunk
+from database import DatabaseManager, FundingAligner, FundingSignals
+
+HOUR_MS = 60 * 60 * 1000
+
+def expected(values, window, alpha):
+    s = pd.Series(values)
+    rolling = s.rolling(window, min_periods=1)
+    return {
+        'mean': rolling.mean().iloc[-1],
+        'std': rolling.std().iloc[-1],
+        'min': rolling.min().iloc[-1],
+        'max': rolling.max().iloc[-1],
+        'ewma': s.ewm(alpha=alpha, adjust=False).mean().iloc[-1],
+    }
+
+def test_matches_pandas_rolling_across_keys():
+    rng = np.random.default_rng(0)
+    stats = RollingStats(window=24, halflife=6, capacity=2)
+    series = {key: rng.normal(size=300) for key in ('a', 'b', 'c')}
+    for t in range(300):
+        # Keys arrive interleaved; 'c' sends two observations per call
+        if t % 2 == 0:
+            stats.update(['a', 'b', 'c', 'c'], [series['a'][t], series['b'][t], series['c'][t], series['c'][t + 1]])
+        else:
+            stats.update(['a', 'b'], [series['a'][t], series['b'][t]])
+
+    snap = stats.snapshot()
+    for key, values in (('a', series['a']), ('b', series['b']), ('c', series['c'][:300])):
+        want = expected(values, 24, stats.alpha)
+        for column, value in want.items():
+            np.testing.assert_allclose(snap.loc[key, column], value, rtol=1e-9, err_msg=f"{key} {column}")
+        np.testing.assert_allclose(snap.loc[key, 'zscore'], (values[-1] - want['mean']) / want['std'])
+    assert snap.loc['a', 'n'] == 24
+
+def test_replayed_rows_are_ignored():
+    stats = RollingStats(window=4)
+    assert stats.update(['x'] * 3, [1.0, 2.0, 3.0], [10, 20, 30]) == 3
+    assert stats.update(['x', 'x', 'x'], [2.0, np.nan, 9.0], [20, 40, 50]) == 1
+    snap = stats.snapshot().loc['x']
+    assert snap['n'] == 4 and snap['last_ts'] == 50 and snap['max'] == 9.0
+
+def test_checkpoint_restore_continues_without_replay():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=100)
+    db = DatabaseManager(':memory:')
+    continuous = RollingStats(window=10)
+    continuous.update(['k'] * 100, values, np.arange(100))
+
+    first = RollingStats(window=10)
+    first.update(['k'] * 57, values[:57], np.arange(57))
+    first.save(db.con, 'test')
+    restored = RollingStats.load(db.con, 'test')
+    restored.update(['k'] * 100, values, np.arange(100))
+
+    pd.testing.assert_frame_equal(restored.snapshot(), continuous.snapshot())
+    assert RollingStats.load(db.con, 'missing') is None
+
+def test_funding_signals_feed_from_collectors_and_panel():
+    db = DatabaseManager(':memory:')
+    hours = np.arange(48)
+    db.insert_funding(pd.DataFrame({'ticker': 'BTC/USDT:USDT', 'timestamp': hours[::8] * HOUR_MS,
+                                    'funding_rate': 0.0008}), 'binance_futures')
+    db.insert_funding(pd.DataFrame({'ticker': 'BTC/USDC:USDC', 'timestamp': hours * HOUR_MS,
+                                    'funding_rate': 0.0001 + hours * 1e-6}), 'hyperliquid')
+    db.flush()
+    FundingAligner(db.con).refresh()
+
+    signals = FundingSignals(db.con, window=24)
+    assert signals.catch_up() == {'rates': 48 + 6, 'spreads': 48}
+    signals.checkpoint()
+
+    # Live rows from a collector page, partly overlapping what is stored
+    rates = [{'timestamp': h * HOUR_MS, 'fundingRate': 0.0002} for h in (47, 48)]
+    restarted = FundingSignals(db.con)
+    assert restarted.on_funding(funding_chunk(rates, 'BTC/USDC:USDC', 'hyperliquid')) == 1
+    assert restarted.catch_up() == {'rates': 0, 'spreads': 0}
+    snap = restarted.rates.snapshot()
+    assert snap.loc['hyperliquid:BTC/USDC:USDC', 'last'] == 0.0002
+    assert restarted.spreads.snapshot().loc['BTC', 'n'] == 24
+
+def test_attached_signals_only_read_flushed_series():
+    db = DatabaseManager(':memory:')
+    signals = FundingSignals(db.con, db, window=24)
+    for exchange, ticker in (('binance_futures', 'BTC/USDT:USDT'), ('binance_futures', 'ETH/USDT:USDT')):
+        db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': np.arange(0, 48, 8) * HOUR_MS,
+                                        'funding_rate': 0.0001}), exchange)
+    db.flush()
+    assert signals.catch_up()['rates'] == 12
+    signals.checkpoint()
+    assert db.con.execute("SELECT count(*) FROM funding_signals_dirty").fetchone()[0] == 0
+
+    # A writer that bypasses the DatabaseManager is not seen; flushed rows are
+    db.con.execute(f"INSERT INTO fundings (exchange, ticker, timestamp, funding_rate) "
+                   f"VALUES ('binance_futures', 'ETH/USDT:USDT', {48 * HOUR_MS}, 0.0002)")
+    db.insert_funding(pd.DataFrame({'ticker': 'BTC/USDT:USDT', 'timestamp': [48 * HOUR_MS, 56 * HOUR_MS],
+                                    'funding_rate': 0.0003}), 'binance_futures')
+    db.flush()
+    assert signals.catch_up()['rates'] == 2
+    assert signals.rates.snapshot().loc['binance_futures:BTC/USDT:USDT', 'last'] == 0.0003
+
+    # Rows flushed after the catch-up stay dirty through the checkpoint
+    db.insert_funding(pd.DataFrame({'ticker': 'BTC/USDT:USDT', 'timestamp': [64 * HOUR_MS],
+                                    'funding_rate': 0.0004}), 'binance_futures')
+    db.flush()
+    signals.checkpoint()
+    assert FundingSignals(db.con, db).catch_up()['rates'] == 1
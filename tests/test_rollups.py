@@ -0,0 +1,71 @@
+import pytest
+import pandas as pd
+from conftest import NOW_MS, HOUR_MS
+from database import DatabaseManager, OHLCVRollups
+from database.rollups import candle_table
+
+MINUTE_MS = 60 * 1000
+
+def candles(start, count):
+    ts = [start + i * MINUTE_MS for i in range(count)]
+    return pd.DataFrame({'ticker': 'BTC/USDT:USDT', 'timestamp': ts, 'open': [float(i) for i in range(count)],
+                         'high': [i + 0.5 for i in range(count)], 'low': [i - 0.5 for i in range(count)],
+                         'close': [i + 0.25 for i in range(count)], 'volume': 1.0})
+
+def test_rollups_aggregate_and_update_incrementally():
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 24 * HOUR_MS
+    db.insert_ohlcv(candles(start, 90), 'binance_futures')
+    db.flush()
+
+    rollups = OHLCVRollups(db.con, base_timeframe='1m', timeframes=('1m', '5m', '1h'))
+    assert rollups.timeframes == ['5m', '1h']
+    assert rollups.refresh() == {'5m': 18, '1h': 2}
+
+    hourly = rollups.load('1h')
+    assert hourly[['open', 'high', 'low', 'close', 'volume']].values.tolist() == [
+        [0.0, 59.5, -0.5, 59.25, 60.0], [60.0, 89.5, 59.5, 89.25, 30.0]]
+
+    # New minutes only touch the partial head bucket and the ones after it
+    db.insert_ohlcv(candles(start, 150).iloc[90:], 'binance_futures')
+    db.flush()
+    assert rollups.refresh() == {'5m': 13, '1h': 2}
+    assert rollups.refresh() == {'5m': 0, '1h': 0}
+    assert rollups.load('1h')['volume'].tolist() == [60.0, 60.0, 30.0]
+
+def test_load_builds_unmaterialized_timeframes_from_rollups():
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 24 * HOUR_MS
+    db.insert_ohlcv(candles(start, 240), 'binance_futures')
+    db.flush()
+    rollups = OHLCVRollups(db.con, base_timeframe='1m', timeframes=('1h',))
+    rollups.refresh()
+
+    two_hour = rollups.load('2h', ticker='BTC/USDT:USDT')
+    assert two_hour['timestamp'].tolist() == [start, start + 2 * HOUR_MS]
+    assert two_hour['close'].tolist() == [119.25, 239.25]
+    assert rollups.load('1m', start_ts=start + 239 * MINUTE_MS)['close'].tolist() == [239.25]
+
+def test_base_timeframe_is_recorded_and_enforced():
+    db = DatabaseManager(':memory:')
+    db.insert_ohlcv(candles(NOW_MS - 24 * HOUR_MS, 120), 'binance_futures')
+    db.flush()
+    assert candle_table(db.con, '1h') == 'ohlcv'
+    OHLCVRollups(db.con, base_timeframe='1m', timeframes=('1h',)).refresh()
+    assert candle_table(db.con, '1h') == 'ohlcv_1h'
+
+    with pytest.raises(ValueError, match='1m'):
+        OHLCVRollups(db.con, base_timeframe='1h')
+
+def test_since_dict_only_recomputes_repaired_series():
+    db = DatabaseManager(':memory:')
+    start = NOW_MS - 24 * HOUR_MS
+    db.insert_ohlcv(candles(start, 180), 'binance_futures')
+    db.insert_ohlcv(candles(start, 180).assign(ticker='ETH/USDT:USDT'), 'binance_futures')
+    db.flush()
+    rollups = OHLCVRollups(db.con, base_timeframe='1m', timeframes=('1h',))
+    rollups.refresh()
+
+    # A backfilled ETH candle in the first hour rewrites only ETH's buckets from there
+    written = rollups.refresh(since_ts={('binance_futures', 'ETH/USDT:USDT'): start + 30 * MINUTE_MS})
+    assert written == {'1h': 3}
@@ -0,0 +1,50 @@
+from collector import BinanceFuturesCollector, HyperliquidCollector
+from collector.scanner import FundingScanner
+
+class BulkFundingExchange:
+    def __init__(self, rates, intervals=None):
+        self.rates = rates
+        self.intervals = intervals or {}
+        self.calls = 0
+        self.interval_calls = 0
+
+    def fetch_funding_intervals(self, symbols=None):
+        self.interval_calls += 1
+        return {s: {'symbol': s, 'interval': i} for s, i in self.intervals.items()}
+
+    def fetch_funding_rates(self, symbols=None):
+        self.calls += 1
+        return {s: {'symbol': s, 'fundingRate': r, 'interval': i, 'markPrice': p, 'indexPrice': p,
+                    'fundingTimestamp': 1_000}
+                for s, (r, i, p) in self.rates.items()}
+
+def test_scan_ranks_annualized_spread_with_one_request_per_exchange():
+    bf = BinanceFuturesCollector()
+    bf.exchange = BulkFundingExchange({
+        'BTC/USDT:USDT': (0.0008, None, 60000.0),   # no interval reported: collector default (8h)
+        'ETH/USDT:USDT': (0.0004, None, 3000.0),    # 4h, only reported by fundingInfo
+        '1000PEPE/USDT:USDT': (0.0001, '8h', 0.010),
+        'DOGE/USDT:USDT': (0.0001, '8h', 0.1),
+    }, intervals={'ETH/USDT:USDT': '4h'})
+    hl = HyperliquidCollector()
+    hl.exchange = BulkFundingExchange({
+        'BTC/USDC:USDC': (0.0001, '1h', 60060.0),
+        'ETH/USDC:USDC': (0.00005, '1h', 3000.0),
+        'kPEPE/USDC:USDC': (-0.0001, '1h', 0.010),
+    })
+
+    ranked = FundingScanner(bf, hl).scan()
+
+    assert bf.exchange.calls == hl.exchange.calls == 1
+    assert bf.exchange.interval_calls == 1
+    assert ranked.index.tolist() == ['PEPE', 'ETH', 'BTC']
+    pepe = ranked.loc['PEPE']
+    assert abs(pepe['annualized_spread'] - (-0.0001 - 0.0001 / 8) * 24 * 365) < 1e-12
+    assert pepe['direction'] == 'long hyperliquid / short binance_futures'
+    assert ranked.loc['BTC', 'spread'] == 0.0
+    assert abs(ranked.loc['BTC', 'mark_divergence'] - 0.001) < 1e-12
+    assert abs(ranked.loc['ETH', 'hourly_rate_binance_futures'] - 0.0004 / 4) < 1e-12
+
+    # Intervals are served from the market cache on the next scan
+    FundingScanner(bf, hl).scan()
+    assert bf.exchange.interval_calls == 1
@@ -0,0 +1,38 @@
+import numpy as np
+from conftest import NOW_MS, HOUR_MS
+from collector import BinanceFuturesCollector
+from collector.schema import FundingBuffer
+
+def test_compact_funding_schema(fake_exchange):
+    bf = BinanceFuturesCollector()
+    bf.exchange = fake_exchange
+    start = NOW_MS - 24 * HOUR_MS
+
+    df = bf.fetch_funding_rates('BTC/USDT:USDT', start, NOW_MS, compact=True)
+    full = bf.fetch_funding_rates('BTC/USDT:USDT', start, NOW_MS)
+
+    assert list(df.columns) == ['timestamp', 'funding_rate', 'ticker', 'exchange']
+    assert df['timestamp'].dtype == np.int64
+    assert df['funding_rate'].dtype == np.float64
+    assert df['ticker'].dtype == 'category'
+    assert df['exchange'].iloc[0] == 'binance_futures'
+    assert df['timestamp'].tolist() == full['timestamp'].tolist()
+    assert df['funding_rate'].tolist() == full['fundingRate'].tolist()
+
+def test_compact_prices_match_default(fake_exchange):
+    bf = BinanceFuturesCollector()
+    bf.exchange = fake_exchange
+    start = NOW_MS - 2500 * HOUR_MS
+
+    df = bf.fetch_prices('BTC/USDT:USDT', start, NOW_MS, compact=True)
+    full = bf.fetch_prices('BTC/USDT:USDT', start, NOW_MS)
+
+    assert len(df) == len(full) == 2501
+    assert (df[['open', 'high', 'low', 'close', 'volume']].values ==
+            full[['open', 'high', 'low', 'close', 'volume']].values).all()
+
+def test_funding_buffer_grows():
+    buf = FundingBuffer(capacity=2)
+    buf.extend([{'timestamp': i, 'fundingRate': 0.1} for i in range(5)])
+    assert len(buf) == 5
+    assert buf.to_frame('X', 'ex', end_ts=3)['timestamp'].tolist() == [0, 1, 2, 3]
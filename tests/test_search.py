@@ -0,0 +1,75 @@
+import os
+import numpy as np
+import pandas as pd
+from database import DatabaseManager
+from backtest import load_panels, run_backtest
+from backtest.search import FeatureStore, load_features, evaluate, hold_positions, grid_search, bayes_search
+
+HOUR_MS = 60 * 60 * 1000
+
+def seed(db, hours=96):
+    hourly = np.arange(hours, dtype=np.int64) * HOUR_MS
+    # Hyperliquid funding oscillates around a flat Binance rate
+    for ticker, hl_ticker, amplitude in [('BTC/USDT:USDT', 'BTC/USDC:USDC', 0.0002),
+                                         ('ETH/USDT:USDT', 'ETH/USDC:USDC', 0.00005)]:
+        db.insert_funding(pd.DataFrame({'ticker': ticker, 'timestamp': hourly[::8], 'funding_rate': 0.0008}),
+                          'binance_futures')
+        db.insert_funding(pd.DataFrame({'ticker': hl_ticker, 'timestamp': hourly,
+                                        'funding_rate': 0.0001 + amplitude * np.sin(np.arange(hours) / 6)}),
+                          'hyperliquid')
+        for exchange, t in (('binance_futures', ticker), ('hyperliquid', hl_ticker)):
+            db.insert_ohlcv(pd.DataFrame({'ticker': t, 'timestamp': hourly, 'open': 1.0, 'high': 1.0,
+                                          'low': 1.0, 'close': 1.0, 'volume': 1.0}), exchange)
+    db.flush()
+
+def test_features_are_memoized_and_match_the_backtest(tmp_path):
+    db = DatabaseManager(':memory:')
+    seed(db)
+    store = FeatureStore(str(tmp_path))
+    path = store.materialize(db.con, windows=(1, 8))
+    mtime = os.path.getmtime(os.path.join(path, 'rate_a.npy'))
+    assert store.materialize(db.con, windows=(1, 8, 24)) == path
+    assert os.path.getmtime(os.path.join(path, 'rate_a.npy')) == mtime
+
+    features = load_features(path)
+    assert isinstance(features['rate_b'], np.memmap)
+    assert features['assets'] == ['BTC', 'ETH']
+    expected = run_backtest(load_panels(db.con), 0.00005, 0.00001)['equity'].iloc[-1]
+    np.testing.assert_allclose(evaluate(features, 0.00005, 0.00001)['total_pnl'], expected)
+    # Smoothed spreads come from disk or are computed on the fly, with the same result
+    assert evaluate(features, 0.00005, 0.00001, window=24) == evaluate(load_panels(db.con), 0.00005, 0.00001, window=24)
+
+    seed(db, hours=120)
+    assert store.materialize(db.con) != path
+
+def test_hold_positions_keeps_trades_open():
+    target = np.array([[1.0], [0.0], [0.0], [-1.0], [0.0], [0.0], [0.0]])
+    held = hold_positions(target, 3)
+    assert held[:, 0].tolist() == [1, 1, 1, -1, -1, -1, 0]
+    assert hold_positions(target, 1) is target
+
+def test_grid_search_in_parallel_matches_serial(tmp_path):
+    db = DatabaseManager(':memory:')
+    seed(db)
+    space = {'entry': [0.00002, 0.00005, 0.0001], 'exit': [0.0, 0.00005], 'window': [1, 8], 'min_hold': [1, 12]}
+    path = FeatureStore(str(tmp_path)).materialize(db.con, windows=space['window'])
+
+    parallel = grid_search(path, space, n_jobs=2, batch_size=5)
+    serial = grid_search(path, space, n_jobs=1)
+    # exit 0.00005 is not below entry 0.00002 or 0.00005, leaving 4 of 6 threshold pairs
+    assert len(parallel) == 4 * 2 * 2
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert parallel['sharpe'].is_monotonic_decreasing
+
+def test_bayes_search_evaluates_requested_calls(tmp_path):
+    db = DatabaseManager(':memory:')
+    seed(db)
+    path = FeatureStore(str(tmp_path)).materialize(db.con, windows=range(1, 9))
+    space = {'entry': (0.00001, 0.0002), 'exit': (0.0, 0.00001), 'window': (1, 8), 'min_hold': (1, 1)}
+
+    results = bayes_search(path, space, n_calls=6, objective='total_pnl', n_jobs=2,
+                           n_initial_points=4, random_state=0)
+    assert len(results) == 6
+    assert (results['min_hold'] == 1).all()
+    assert results['window'].between(1, 8).all()
+    assert results['total_pnl'].is_monotonic_decreasing
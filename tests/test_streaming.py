@@ -0,0 +1,92 @@
+import json
+import asyncio
+import duckdb
+from aiohttp import web
+from collector.streaming import StreamingCollector, BinanceMarkPriceFeed, HyperliquidAssetCtxFeed, TickRingBuffer
+
+def mark_price_message(ts, rate):
+    return [
+        {'e': 'markPriceUpdate', 'E': ts, 's': 'BTCUSDT', 'p': '60000.0', 'i': '59990.0',
+         'r': rate, 'T': ts + 3600000},
+        {'e': 'markPriceUpdate', 'E': ts, 's': 'ETHUSDT', 'p': '3000.0', 'i': '2999.0',
+         'r': '0.0001', 'T': ts + 3600000},
+    ]
+
+async def fake_exchange_server(handler):
+    app = web.Application()
+    app.router.add_get('/ws', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/ws"
+
+def test_ring_buffer_keeps_latest_ticks():
+    buf = TickRingBuffer(capacity=3, max_symbols=1)
+    a, b = buf.index_of(('x', 'A')), buf.index_of(('x', 'B'))
+    for i in range(5):
+        buf.push_many([a, b], [[i, 0.1 * i, 1, 1, 0], [i, 0.0, 2, 2, 0]])
+    assert buf.history(('x', 'A'))['timestamp'].tolist() == [2, 3, 4]
+    assert buf.latest()['mark_price'].tolist() == [1, 2]
+
+def test_streaming_collector_against_fake_websocket():
+    subscriptions = []
+
+    async def binance(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for i in range(3):
+            await ws.send_str(json.dumps(mark_price_message(1_000 + i, ['0.0001', '0.0002', '0.0003'][i])))
+        await asyncio.sleep(1)
+        return ws
+
+    async def hyperliquid(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subscriptions.append(json.loads((await ws.receive()).data))
+        await ws.send_str(json.dumps({'channel': 'activeAssetCtx', 'data': {
+            'coin': 'BTC', 'ctx': {'funding': '0.0000125', 'markPx': '60010.0', 'oraclePx': '60000.0'}}}))
+        await asyncio.sleep(1)
+        return ws
+
+    async def run():
+        bn_runner, bn_url = await fake_exchange_server(binance)
+        hl_runner, hl_url = await fake_exchange_server(hyperliquid)
+        con = duckdb.connect()
+        collector = StreamingCollector(
+            [BinanceMarkPriceFeed(url=bn_url), HyperliquidAssetCtxFeed(['BTC'], url=hl_url)],
+            con=con, flush_interval=0.05)
+        await collector.run(duration=0.5)
+        await bn_runner.cleanup()
+        await hl_runner.cleanup()
+        return collector, con
+
+    collector, con = asyncio.run(run())
+    snap = collector.snapshot().set_index(['exchange', 'ticker'])
+    assert snap.loc[('binance_futures', 'BTC/USDT:USDT'), 'funding_rate'] == 0.0003
+    assert snap.loc[('hyperliquid', 'BTC/USDC:USDC'), 'mark_price'] == 60010.0
+    assert subscriptions[0]['subscription'] == {'type': 'activeAssetCtx', 'coin': 'BTC'}
+    assert con.execute("SELECT count(*) FROM funding_ticks").fetchone()[0] == 7
+
+def test_malformed_messages_are_skipped_without_reconnecting():
+    async def binance(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str('not json')
+        await ws.send_str(json.dumps([{'e': 'markPriceUpdate', 'E': 1_000, 's': 'BTCUSDT'}]))
+        await ws.send_str(json.dumps(mark_price_message(1_001, '0.0002')))
+        await asyncio.sleep(1)
+        return ws
+
+    async def run():
+        runner, url = await fake_exchange_server(binance)
+        collector = StreamingCollector([BinanceMarkPriceFeed(url=url)])
+        await collector.run(duration=0.3)
+        await runner.cleanup()
+        return collector
+
+    collector = asyncio.run(run())
+    assert collector.stats['parse_errors'] == 2
+    assert collector.stats['reconnects'] == 0
+    assert collector.snapshot()['funding_rate'].tolist() == [0.0002, 0.0001]
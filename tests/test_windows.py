@@ -0,0 +1,38 @@
+import asyncio
+from conftest import NOW_MS, HOUR_MS
+from collector import BinanceFuturesCollector, AsyncHyperliquidCollector
+from collector.windows import split_windows
+
+def test_split_windows_is_contiguous_and_non_overlapping():
+    windows = split_windows(0, 2500, 1000)
+    assert windows == [(0, 999), (1000, 1999), (2000, 2500)]
+
+def test_windowed_prices_match_sequential(fake_exchange):
+    bf = BinanceFuturesCollector()
+    bf.exchange = fake_exchange
+    start = NOW_MS - 3000 * HOUR_MS
+
+    sequential = bf.fetch_prices('BTC/USDT:USDT', start, NOW_MS)
+    windowed = bf.fetch_prices_windowed('BTC/USDT:USDT', start, NOW_MS, max_workers=3)
+
+    assert len(windowed) == 3001
+    assert windowed['timestamp'].tolist() == sequential['timestamp'].tolist()
+
+def test_windowed_funding_deduplicates(fake_exchange):
+    bf = BinanceFuturesCollector()
+    bf.exchange = fake_exchange
+    start = NOW_MS - 9000 * 8 * HOUR_MS // 8
+
+    df = bf.fetch_funding_rates_windowed('BTC/USDT:USDT', start, NOW_MS, window_pages=0.1)
+    assert df['timestamp'].is_unique
+    assert len(df) == 9000 // 8 + 1
+
+def test_async_windowed_funding(async_fake_exchange):
+    hl = AsyncHyperliquidCollector()
+    asyncio.run(hl.close())
+    hl.exchange = async_fake_exchange
+    start = NOW_MS - 2400 * HOUR_MS
+
+    df = asyncio.run(hl.fetch_funding_rates_windowed('BTC/USDC:USDC', start, NOW_MS))
+    assert df['timestamp'].is_monotonic_increasing
+    assert len(df) == 2400 // 8 + 1